@@ -0,0 +1,8 @@
+import os
+
+from benchmarks.runner import main
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    main()
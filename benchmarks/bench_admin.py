@@ -0,0 +1,68 @@
+"""
+Request time of the Django Admin changelist of a model with ``ZomboDBAdminMixin``.
+"""
+from django.contrib.auth.models import User
+from django.test import Client
+from django.urls import reverse
+
+from benchmarks.runner import benchmark
+from tests.restaurants.models import Restaurant
+
+
+RESTAURANTS_COUNT = 1000
+
+
+def _create_restaurants():
+    missing_count = RESTAURANTS_COUNT - Restaurant.objects.count()
+    Restaurant.objects.bulk_create([
+        Restaurant(
+            url='http://example.org?restaurant{}'.format(i),
+            name='Restaurant {}'.format(i),
+            street='{} Skillman Ave'.format(i),
+            zip_code='11377',
+            city='New York City',
+            state='NY',
+            phone='+1 718-205-2088',
+            email='restaurant{}@example.org'.format(i),
+            website='http://example.org/',
+            categories=['Pizza', 'Italian'],
+        )
+        for i in range(missing_count)
+    ])
+
+
+def _get_logged_in_client():
+    user = User.objects.filter(username='benchmarks').first()
+    if user is None:
+        user = User.objects.create_superuser(
+            username='benchmarks', email='benchmarks@example.org', password='benchmarks')
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+def _changelist(params):
+    _create_restaurants()
+    client = _get_logged_in_client()
+    url = reverse('admin:restaurants_restaurant_changelist')
+
+    def get():
+        response = client.get(url, params)
+        assert response.status_code == 200, response.status_code
+
+    return get
+
+
+@benchmark('admin.changelist', requires_db=True)
+def changelist():
+    return _changelist({})
+
+
+@benchmark('admin.changelist_search', requires_db=True)
+def changelist_search():
+    return _changelist({'q': 'pizza'})
+
+
+@benchmark('admin.changelist_search_page_5', requires_db=True)
+def changelist_search_page_5():
+    return _changelist({'q': 'pizza', 'p': 4})
@@ -0,0 +1,38 @@
+"""
+Generation of the ``CREATE INDEX`` SQL of ``ZomboDBIndex``, for wide models.
+The SQL is only generated, not executed.
+"""
+from django.db import connection, models
+
+from benchmarks.runner import benchmark
+from django_zombodb.indexes import ZomboDBIndex
+
+
+def make_wide_model(fields_count):
+    field_names = ['field_{}'.format(i) for i in range(fields_count)]
+    attrs = {name: models.TextField() for name in field_names}
+    attrs['__module__'] = __name__
+    attrs['Meta'] = type('Meta', (), {
+        'app_label': 'restaurants',
+        'indexes': [
+            ZomboDBIndex(
+                name='wide_{}_zombodb'.format(fields_count),
+                fields=field_names,
+                field_mapping={name: {'type': 'keyword'} for name in field_names[::2]},
+            ),
+        ],
+    })
+    return type('BenchmarkWideModel{}'.format(fields_count), (models.Model,), attrs)
+
+
+def _register(fields_count):
+    @benchmark('ddl.create_index_sql_{}_fields'.format(fields_count))
+    def create_index_sql():
+        model = make_wide_model(fields_count)
+        index = model._meta.indexes[0]
+        schema_editor = connection.schema_editor()
+        return lambda: str(index.create_sql(model, schema_editor))
+
+
+for _fields_count in (10, 100, 500):
+    _register(_fields_count)
@@ -0,0 +1,73 @@
+"""
+Search queryset construction and SQL compilation. None of these hit the database.
+"""
+from django.db import DEFAULT_DB_ALIAS
+
+from elasticsearch_dsl import Q as ElasticsearchQ
+
+from benchmarks.runner import benchmark
+from tests.restaurants.models import Restaurant
+
+
+def make_dsl_query(terms_count):
+    return ElasticsearchQ(
+        'bool',
+        should=[ElasticsearchQ('term', name='term{}'.format(i)) for i in range(terms_count)],
+        filter=[ElasticsearchQ('match', city='new york')],
+    )
+
+
+def _compile(queryset):
+    return queryset.query.get_compiler(DEFAULT_DB_ALIAS).as_sql()
+
+
+@benchmark('queries.query_string_search')
+def query_string_search():
+    return lambda: Restaurant.objects.query_string_search('brasil~ AND steak*')
+
+
+@benchmark('queries.query_string_search_limit')
+def query_string_search_limit():
+    return lambda: Restaurant.objects.query_string_search('brasil~ AND steak*', limit=100)
+
+
+@benchmark('queries.dict_search_100_terms')
+def dict_search_100_terms():
+    query = make_dsl_query(100).to_dict()
+    return lambda: Restaurant.objects.dict_search(query)
+
+
+@benchmark('queries.dsl_search_100_terms')
+def dsl_search_100_terms():
+    query = make_dsl_query(100)
+    return lambda: Restaurant.objects.dsl_search(query)
+
+
+@benchmark('queries.dsl_search_100_terms_uncached')
+def dsl_search_100_terms_uncached():
+    query = make_dsl_query(100)
+    return lambda: Restaurant.objects.dsl_search(query, cache=False)
+
+
+@benchmark('queries.compile_search')
+def compile_search():
+    queryset = Restaurant.objects.query_string_search('pizza')
+    return lambda: _compile(queryset)
+
+
+@benchmark('queries.compile_annotate_score')
+def compile_annotate_score():
+    queryset = Restaurant.objects.query_string_search('pizza').annotate_score()
+    return lambda: _compile(queryset)
+
+
+@benchmark('queries.compile_order_by_score')
+def compile_order_by_score():
+    queryset = Restaurant.objects.query_string_search('pizza').order_by_score()
+    return lambda: _compile(queryset)
+
+
+@benchmark('queries.compile_order_by_score_slice')
+def compile_order_by_score_slice():
+    queryset = Restaurant.objects.query_string_search('pizza').order_by_score()
+    return lambda: _compile(queryset[200:250])
@@ -0,0 +1,58 @@
+"""
+JSON serializers available for ``ZOMBODB_JSON_SERIALIZER``, on the payloads
+django-zombodb serializes and parses the most: bool queries with many terms,
+like the ones of ``dict_search`` and validation.
+"""
+import datetime
+import decimal
+import functools
+import uuid
+
+from django.core.exceptions import ImproperlyConfigured
+
+from elasticsearch.serializer import JSONSerializer
+
+from benchmarks.runner import benchmark
+from django_zombodb.serializers import OrjsonSerializer
+
+
+def make_bool_query(terms_count):
+    return {
+        'query': {
+            'bool': {
+                'should': [{'term': {'name': 'term{}'.format(i)}} for i in range(terms_count)],
+                'filter': [
+                    {'range': {'created': {'gte': datetime.date(2019, 1, 1)}}},
+                    {'range': {'price': {'lte': decimal.Decimal('99.90')}}},
+                    {'terms': {'owner': [uuid.UUID(int=i) for i in range(terms_count // 10)]}},
+                ],
+            },
+        },
+    }
+
+
+def _get_serializer_classes():
+    serializer_classes = [('json', JSONSerializer)]
+    try:
+        OrjsonSerializer()
+    except ImproperlyConfigured:
+        pass
+    else:
+        serializer_classes.append(('orjson', OrjsonSerializer))
+    return serializer_classes
+
+
+def _register(serializer_name, serializer_class, terms_count):
+    @benchmark('serializers.{}.dumps_{}_terms'.format(serializer_name, terms_count))
+    def dumps():
+        return functools.partial(serializer_class().dumps, make_bool_query(terms_count))
+
+    @benchmark('serializers.{}.loads_{}_terms'.format(serializer_name, terms_count))
+    def loads():
+        query_json = JSONSerializer().dumps(make_bool_query(terms_count))
+        return functools.partial(serializer_class().loads, query_json)
+
+
+for _serializer_name, _serializer_class in _get_serializer_classes():
+    for _terms_count in (10, 1000):
+        _register(_serializer_name, _serializer_class, _terms_count)
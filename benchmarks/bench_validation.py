@@ -0,0 +1,39 @@
+"""
+Overhead of the validation helpers. With the zdb stub, ``zdb.request``
+answers right away, so the timings are django-zombodb's and Postgres' share only.
+"""
+from benchmarks.runner import benchmark
+from django_zombodb.helpers import validate_queries, validate_query_dict, validate_query_string
+from django_zombodb.query_string import validate_query_string_syntax
+from tests.restaurants.models import Restaurant
+
+
+QUERY_STRING = 'name:(pizza OR "fast food") AND city:"New York" AND -street:school~2'
+
+
+@benchmark('validation.query_string_syntax')
+def query_string_syntax():
+    return lambda: validate_query_string_syntax(QUERY_STRING)
+
+
+@benchmark('validation.query_string_syntax_error')
+def query_string_syntax_error():
+    # rejected locally, without a database round trip
+    return lambda: validate_query_string(Restaurant, QUERY_STRING + ' AND')
+
+
+@benchmark('validation.validate_query_string', requires_db=True)
+def validate_query_string_():
+    return lambda: validate_query_string(Restaurant, QUERY_STRING)
+
+
+@benchmark('validation.validate_query_dict', requires_db=True)
+def validate_query_dict_():
+    query = {'bool': {'must': [{'match': {'name': 'pizza'}}, {'match': {'city': 'new york'}}]}}
+    return lambda: validate_query_dict(Restaurant, query)
+
+
+@benchmark('validation.validate_queries_100', requires_db=True)
+def validate_queries_100():
+    queries = ['name:pizza{}'.format(i) for i in range(100)]
+    return lambda: validate_queries(Restaurant, queries)
@@ -0,0 +1,70 @@
+import os
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+
+from django_zombodb.indexes import ZomboDBIndexCreateStatementAdapter
+from django_zombodb.registry import registry
+
+
+ZDB_STUB_SQL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'zdb_stub.sql')
+
+
+def is_database_available():
+    try:
+        connection.ensure_connection()
+    except Exception:  # pylint: disable=broad-except
+        return False
+    return True
+
+
+def is_zombodb_installed():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT EXISTS(SELECT 1 FROM pg_extension WHERE extname = 'zombodb')")
+        return cursor.fetchone()[0]
+
+
+def install_zdb_stub(stub_path=ZDB_STUB_SQL_PATH):
+    # the stub replaces the zdb functions, so it must not touch a real ZomboDB
+    if is_zombodb_installed():
+        raise CommandError(
+            "The ZomboDB extension is installed on this database, "
+            "refusing to replace its functions with the zdb stub.")
+    with open(stub_path) as f:
+        stub_sql = f.read()
+    with connection.cursor() as cursor:
+        cursor.execute(stub_sql)
+
+
+def create_model_table(model):
+    """
+    Creates the table of ``model``. Its ZomboDB index is replaced by a btree index
+    with the same name, since the stub has no zombodb index access method.
+    """
+    if model._meta.db_table in connection.introspection.table_names():
+        return
+
+    with connection.schema_editor() as schema_editor:
+        schema_editor.create_model(model)
+        schema_editor.deferred_sql = [
+            sql for sql in schema_editor.deferred_sql
+            if not isinstance(sql, ZomboDBIndexCreateStatementAdapter)
+        ]
+        info = registry.get(model)
+        if info.index is not None:
+            schema_editor.execute('CREATE INDEX {index_name} ON {table} ({column})'.format(
+                index_name=schema_editor.quote_name(info.index_name),
+                table=info.quoted_table,
+                column=schema_editor.quote_name(model._meta.pk.column)))
+
+
+def setup_database(models):
+    """
+    Prepares the benchmark database: the zdb stub, Django's own tables and
+    the tables of ``models``. Safe to run on an already prepared database.
+    """
+    install_zdb_stub()
+    call_command('migrate', verbosity=0, interactive=False)
+    for model in models:
+        create_model_table(model)
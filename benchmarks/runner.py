@@ -0,0 +1,138 @@
+"""
+Minimal benchmark runner. Benchmarks are functions registered with
+:py:func:`benchmark` that do their setup and return the callable to be timed.
+"""
+import argparse
+import datetime
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections import OrderedDict, namedtuple
+
+import django
+
+
+Benchmark = namedtuple('Benchmark', ['name', 'func', 'requires_db'])
+
+BENCHMARKS = OrderedDict()
+
+BENCHMARK_MODULES = [
+    'benchmarks.bench_queries',
+    'benchmarks.bench_serializers',
+    'benchmarks.bench_validation',
+    'benchmarks.bench_admin',
+    'benchmarks.bench_ddl',
+]
+
+
+def benchmark(name, requires_db=False):
+    def decorator(func):
+        BENCHMARKS[name] = Benchmark(name=name, func=func, requires_db=requires_db)
+        return func
+    return decorator
+
+
+def _calibrate(timed, min_time):
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for __ in range(iterations):
+            timed()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or iterations >= 10 ** 6:
+            return iterations
+        iterations *= 2 if elapsed <= 0 else max(2, int(min_time / elapsed * 1.2))
+
+
+def run_benchmark(bench, rounds, min_time):
+    timed = bench.func()
+    iterations = _calibrate(timed, min_time)
+    timings = []
+    for __ in range(rounds):
+        start = time.perf_counter()
+        for __ in range(iterations):
+            timed()
+        timings.append((time.perf_counter() - start) / iterations * 1e6)
+
+    return OrderedDict([
+        ('name', bench.name),
+        ('unit', 'us'),
+        ('rounds', rounds),
+        ('iterations', iterations),
+        ('min', min(timings)),
+        ('median', statistics.median(timings)),
+        ('mean', statistics.mean(timings)),
+        ('stdev', statistics.stdev(timings) if rounds > 1 else 0.0),
+    ])
+
+
+def _get_git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _get_postgres_version():
+    from django.db import connection
+    return connection.pg_version
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Runs the django-zombodb benchmarks.")
+    parser.add_argument(
+        '--output', default='benchmark-results.json',
+        help="Path of the JSON results file. Default: %(default)s")
+    parser.add_argument(
+        '--filter', default='',
+        help="Run only benchmarks with this substring in their names.")
+    parser.add_argument(
+        '--no-db', action='store_true',
+        help="Skip benchmarks that need the database.")
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument(
+        '--min-time', type=float, default=0.1,
+        help="Minimum duration of each round, in seconds. Default: %(default)s")
+    args = parser.parse_args(argv)
+
+    django.setup()
+    from benchmarks.database import is_database_available, setup_database
+    from tests.restaurants.models import Restaurant
+
+    for module in BENCHMARK_MODULES:
+        __import__(module)
+
+    use_db = not args.no_db and is_database_available()
+    if not args.no_db and not use_db:
+        print("Database unavailable, skipping benchmarks that need it.", file=sys.stderr)
+    if use_db:
+        setup_database([Restaurant])
+
+    results = []
+    print("{:<50} {:>12} {:>12}".format('benchmark', 'median (us)', 'stdev (us)'))
+    for bench in BENCHMARKS.values():
+        if args.filter not in bench.name or (bench.requires_db and not use_db):
+            continue
+        result = run_benchmark(bench, rounds=args.rounds, min_time=args.min_time)
+        results.append(result)
+        print("{:<50} {:>12.1f} {:>12.1f}".format(
+            result['name'], result['median'], result['stdev']))
+
+    report = OrderedDict([
+        ('created_at', datetime.datetime.utcnow().isoformat() + 'Z'),
+        ('commit', _get_git_commit()),
+        ('environment', OrderedDict([
+            ('python', platform.python_version()),
+            ('django', django.get_version()),
+            ('platform', platform.platform()),
+            ('postgres', _get_postgres_version() if use_db else None),
+        ])),
+        ('benchmarks', results),
+    ])
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print("Results written to {}".format(args.output))
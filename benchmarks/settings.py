@@ -0,0 +1,26 @@
+from decouple import config
+
+from tests.settings import *  # noqa
+
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.postgresql_psycopg2',
+        'USER': config('BENCHMARK_DB_USER', default='django_zombodb'),
+        'NAME': config('BENCHMARK_DB_NAME', default='django_zombodb_benchmarks'),
+        'PASSWORD': config('BENCHMARK_DB_PASSWORD', default='password'),
+        'HOST': config('BENCHMARK_DB_HOST', default='127.0.0.1'),
+        'PORT': config('POSTGRES_PORT', default='5432'),
+    }
+}
+
+# the models of the tests apps are created by benchmarks.database,
+# since their migrations need the zombodb extension
+MIGRATION_MODULES = {
+    'tests': None,
+    'restaurants': None,
+}
+
+ALLOWED_HOSTS = ['testserver']
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
@@ -0,0 +1,57 @@
+-- Stand-in for the parts of ZomboDB's SQL API used by django-zombodb,
+-- for running the benchmarks on a plain PostgreSQL, without the extension
+-- or Elasticsearch. It measures django-zombodb's own overhead only:
+-- every row matches every query and scores are derived from the ctid.
+--
+-- zdbquery is replaced by text, and there's no zombodb index access method.
+-- The benchmarks create a btree index with the ZomboDB index name instead,
+-- so the ::regclass casts of index names work.
+
+CREATE SCHEMA IF NOT EXISTS zdb;
+CREATE SCHEMA IF NOT EXISTS dsl;
+
+CREATE OR REPLACE FUNCTION zdb.stub_matches(anyelement, text) RETURNS boolean
+    LANGUAGE sql IMMUTABLE AS $$ SELECT true $$;
+
+DROP OPERATOR IF EXISTS ==> (anyelement, text);
+CREATE OPERATOR ==> (LEFTARG = anyelement, RIGHTARG = text, PROCEDURE = zdb.stub_matches);
+
+CREATE OR REPLACE FUNCTION zdb.score(tid) RETURNS real
+    LANGUAGE sql IMMUTABLE AS $$ SELECT ((hashtext($1::text) & 65535) / 65535.0)::real $$;
+
+CREATE OR REPLACE FUNCTION zdb.request(
+        index_name text, endpoint text, method text DEFAULT 'GET', post_data text DEFAULT NULL)
+    RETURNS text
+    LANGUAGE sql IMMUTABLE AS $$ SELECT '{"valid": true}'::text $$;
+
+CREATE OR REPLACE FUNCTION zdb.count(index regclass, query text) RETURNS bigint
+    LANGUAGE plpgsql STABLE AS $$
+DECLARE
+    result bigint;
+BEGIN
+    EXECUTE format(
+        'SELECT count(*) FROM %s',
+        (SELECT indrelid::regclass FROM pg_index WHERE indexrelid = index))
+    INTO result;
+    RETURN result;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION dsl.match_all() RETURNS text
+    LANGUAGE sql IMMUTABLE AS $$ SELECT '{"match_all":{}}'::text $$;
+
+CREATE OR REPLACE FUNCTION dsl.and(VARIADIC queries text[]) RETURNS text
+    LANGUAGE sql IMMUTABLE AS $$ SELECT array_to_string(queries, ' AND ') $$;
+
+CREATE OR REPLACE FUNCTION dsl.limit(limit_value bigint, query text) RETURNS text
+    LANGUAGE sql IMMUTABLE AS $$ SELECT query $$;
+
+CREATE OR REPLACE FUNCTION dsl.offset(offset_value bigint, query text) RETURNS text
+    LANGUAGE sql IMMUTABLE AS $$ SELECT query $$;
+
+CREATE OR REPLACE FUNCTION dsl.offset_limit(offset_value bigint, limit_value bigint, query text)
+    RETURNS text
+    LANGUAGE sql IMMUTABLE AS $$ SELECT query $$;
+
+CREATE OR REPLACE FUNCTION dsl.sort_direct(sort_json json, query text) RETURNS text
+    LANGUAGE sql IMMUTABLE AS $$ SELECT query $$;
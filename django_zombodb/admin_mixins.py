@@ -1,14 +1,47 @@
 
-from django.contrib.admin.views.main import SEARCH_VAR
+from django.contrib.admin.views.main import SEARCH_VAR, ChangeList
 from django.db.models import FloatField
 from django.db.models.expressions import Value
 from django.utils.translation import gettext as _
 
+from django_zombodb import metrics, tracing
 from django_zombodb.helpers import validate_query_string
+from django_zombodb.querysets import SearchQuerySetMixin
+
+
+class ZomboDBChangeList(ChangeList):
+    """
+    ChangeList that uses the Postgres estimate for the total number of objects
+    (the count shown besides the number of search results), if the ModelAdmin
+    has ``estimate_full_result_count = True``.
+    """
+
+    def get_results(self, request):
+        if self.model_admin.estimate_full_result_count and \
+                isinstance(self.root_queryset, SearchQuerySetMixin):
+            # root_queryset is only used by get_results to count all objects
+            self.root_queryset = self.root_queryset._chain()
+            self.root_queryset._zombodb_estimate_count = True
+
+        if not self.query:
+            super().get_results(request)
+            return
+
+        with tracing.start_span('zombodb.admin_search', {
+            'zombodb.model': self.model._meta.label,
+            'zombodb.valid': getattr(request, '_has_valid_search', False),
+            'zombodb.limit': self.model_admin.max_search_results,
+        }) as span:
+            super().get_results(request)
+            span.set_attribute('zombodb.result_count', self.result_count)
 
 
 class ZomboDBAdminMixin:
     max_search_results = None
+    estimate_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return ZomboDBChangeList
 
     def get_search_fields(self, request):
         """
@@ -38,6 +71,8 @@ class ZomboDBAdminMixin:
 
     def get_search_results(self, request, queryset, search_term):
         if search_term:
+            metrics.ADMIN_SEARCHES.inc(
+                model=self.model._meta.label, valid=request._has_valid_search)
             if request._has_valid_search:
                 queryset = queryset.query_string_search(
                     search_term,
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 
 class DjangoZomboDBConfig(AppConfig):
     name = 'django_zombodb'
+
+    def ready(self):
+        from django_zombodb.registry import registry
+
+        registry.populate(self.apps.get_models())
@@ -0,0 +1,65 @@
+"""
+Support for the async counterparts of the search and validation methods.
+
+Django's database connections are blocking, so database work still runs
+in a thread, through asgiref's ``sync_to_async``. The async methods only hop
+to that thread when they actually hit the database: building lazy querysets,
+checking query string syntax and reading the local validation cache don't.
+"""
+import itertools
+from collections import deque
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+def db_sync_to_async(func):
+    """
+    Wraps ``func`` to run in the thread Django uses for sync code,
+    so the database connection is the same as the one of sync code.
+    """
+    try:
+        from asgiref.sync import sync_to_async
+    except ImportError:
+        raise ImproperlyConfigured(
+            "The async methods of django-zombodb require asgiref. "
+            "Please install it with `pip install django-zombodb[async]`.")
+
+    return sync_to_async(func, thread_sensitive=True)
+
+
+class AsyncChunkedIterator:
+    """
+    Async iterator over the sync iterable returned by ``iterable_factory``.
+    Items are fetched ``chunk_size`` at a time, each chunk in a single
+    thread hop. If ``chunk_size`` is ``None``, all items are fetched at once.
+    """
+
+    def __init__(self, iterable_factory, chunk_size=None):
+        self.iterable_factory = iterable_factory
+        self.chunk_size = chunk_size
+        self._iterator = None
+        self._buffer = deque()
+        self._is_exhausted = False
+
+    def _fetch_chunk(self):
+        if self._iterator is None:
+            self._iterator = iter(self.iterable_factory())
+        if self.chunk_size is None:
+            chunk = list(self._iterator)
+            self._is_exhausted = True
+        else:
+            chunk = list(itertools.islice(self._iterator, self.chunk_size))
+            self._is_exhausted = len(chunk) < self.chunk_size
+        return chunk
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._buffer:
+            if self._is_exhausted:
+                raise StopAsyncIteration
+            self._buffer.extend(await db_sync_to_async(self._fetch_chunk)())
+            if not self._buffer:
+                raise StopAsyncIteration
+        return self._buffer.popleft()
@@ -0,0 +1,64 @@
+from django.db.migrations.autodetector import MigrationAutodetector
+
+from django_zombodb.indexes import ZomboDBIndex
+from django_zombodb.operations import (
+    AlterZomboDBFieldMapping, AlterZomboDBIndexOptions, get_index_changes
+)
+
+
+class ZomboDBMigrationAutodetector(MigrationAutodetector):
+    """
+    Autodetector that alters ZomboDB indexes in place, with
+    :py:class:`~django_zombodb.operations.AlterZomboDBIndexOptions` and
+    :py:class:`~django_zombodb.operations.AlterZomboDBFieldMapping`, instead of
+    removing and adding them again, when only online options changed
+    or ``field_mapping`` changed additively.
+    """
+
+    def create_altered_indexes(self):
+        super().create_altered_indexes()
+
+        self.altered_zombodb_indexes = {}
+        for (app_label, model_name), alt_indexes in self.altered_indexes.items():
+            removed_indexes = {
+                index.name: index for index in alt_indexes['removed_indexes']
+                if isinstance(index, ZomboDBIndex)
+            }
+            altered = []
+            for new_index in alt_indexes['added_indexes']:
+                old_index = removed_indexes.get(new_index.name)
+                if not isinstance(new_index, ZomboDBIndex) or old_index is None:
+                    continue
+                if get_index_changes(old_index, new_index) is not None:
+                    altered.append((old_index, new_index))
+
+            for old_index, new_index in altered:
+                alt_indexes['removed_indexes'].remove(old_index)
+                alt_indexes['added_indexes'].remove(new_index)
+            if altered:
+                self.altered_zombodb_indexes[app_label, model_name] = altered
+
+    def generate_added_indexes(self):
+        super().generate_added_indexes()
+
+        for (app_label, model_name), altered in sorted(self.altered_zombodb_indexes.items()):
+            for old_index, new_index in altered:
+                options, __ = get_index_changes(old_index, new_index)
+                if options:
+                    self.add_operation(
+                        app_label,
+                        AlterZomboDBIndexOptions(
+                            model_name=model_name,
+                            name=new_index.name,
+                            options=options,
+                        )
+                    )
+                if old_index.field_mapping != new_index.field_mapping:
+                    self.add_operation(
+                        app_label,
+                        AlterZomboDBFieldMapping(
+                            model_name=model_name,
+                            name=new_index.name,
+                            field_mapping=new_index.field_mapping,
+                        )
+                    )
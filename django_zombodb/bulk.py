@@ -0,0 +1,284 @@
+"""
+Fast loading of rows into tables with ZomboDB indexes, and bulk indexing settings.
+"""
+import csv
+import io
+import itertools
+import json
+import time
+from collections import OrderedDict, deque, namedtuple
+from contextlib import ContextDecorator
+from multiprocessing import get_context
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.transaction import TransactionManagementError
+
+from django_zombodb.helpers import get_zombodb_index_from_model
+
+
+# ZomboDB's default batch_size, in bytes
+DEFAULT_BATCH_SIZE = 8 * 1024 * 1024
+BULK_LOAD_FORMATS = ('csv', 'jsonl')
+# NULLs of these fields are loaded as empty strings, like Django does for blank values
+TEXT_INTERNAL_TYPES = frozenset(['CharField', 'TextField', 'SlugField'])
+# Postgres functions take at most 100 arguments
+_MAX_OBJECT_PAIRS = 50
+
+BulkLoadResult = namedtuple('BulkLoadResult', ['rows', 'chunks', 'elapsed'])
+_LoadPlan = namedtuple('_LoadPlan', ['create_sql', 'copy_sql', 'insert_sql', 'drop_sql'])
+
+
+def _get_field(model, name):
+    for field in model._meta.concrete_fields:
+        if name in (field.name, field.attname, field.column):
+            return field
+    raise ValueError("{model} has no field {name!r}.".format(
+        model=model._meta.label, name=name))
+
+
+def _get_select_sql(field, column_sql, expressions):
+    if field.name in expressions:
+        return expressions[field.name].format(column=column_sql)
+    if not field.null and field.get_internal_type() in TEXT_INTERNAL_TYPES:
+        return "COALESCE(" + column_sql + ", '')"
+    return column_sql
+
+
+def _get_csv_plan(model, connection, header, expressions, delimiter):
+    quote_name = connection.ops.quote_name
+    temp_table = quote_name('zombodb_bulk_load_' + model._meta.db_table)
+    fields = [_get_field(model, name) for name in header]
+
+    temp_columns = []
+    selects = []
+    for position, field in enumerate(fields):
+        temp_column = quote_name('c' + str(position))
+        temp_columns.append(temp_column + ' text')
+        column_sql = 't.' + temp_column
+        if field.name not in expressions:
+            column_sql += '::' + field.cast_db_type(connection)
+        selects.append(_get_select_sql(field, column_sql, expressions))
+
+    return _LoadPlan(
+        create_sql='CREATE TEMPORARY TABLE {} ({})'.format(temp_table, ', '.join(temp_columns)),
+        copy_sql="COPY {} FROM STDIN WITH (FORMAT csv, DELIMITER '{}')".format(
+            temp_table, delimiter.replace("'", "''")),
+        insert_sql='INSERT INTO {table} ({columns}) SELECT {selects} FROM {temp_table} t'.format(
+            table=quote_name(model._meta.db_table),
+            columns=', '.join(quote_name(field.column) for field in fields),
+            selects=', '.join(selects),
+            temp_table=temp_table),
+        drop_sql='DROP TABLE ' + temp_table)
+
+
+def _get_jsonl_plan(model, connection, keys, expressions):
+    quote_name = connection.ops.quote_name
+    temp_table = quote_name('zombodb_bulk_load_' + model._meta.db_table)
+    table = quote_name(model._meta.db_table)
+    fields = [_get_field(model, key) for key in keys]
+
+    # the record is built with the column names,
+    # so jsonb_populate_record converts each value to the column type
+    pairs = [
+        "'" + field.column.replace("'", "''") + "', t.doc -> '" + key.replace("'", "''") + "'"
+        for field, key in zip(fields, keys)
+    ]
+    objects = [
+        'jsonb_build_object(' + ', '.join(pairs[start:start + _MAX_OBJECT_PAIRS]) + ')'
+        for start in range(0, len(pairs), _MAX_OBJECT_PAIRS)
+    ]
+    selects = [
+        _get_select_sql(field, 'r.' + quote_name(field.column), expressions)
+        for field in fields
+    ]
+
+    return _LoadPlan(
+        create_sql='CREATE TEMPORARY TABLE {} (doc jsonb)'.format(temp_table),
+        # CSV with control characters as quote and delimiter,
+        # so each line is copied as is, without escaping
+        copy_sql="COPY {} FROM STDIN WITH (FORMAT csv, QUOTE e'\\x01', DELIMITER e'\\x02')".format(
+            temp_table),
+        insert_sql=(
+            'INSERT INTO {table} ({columns}) SELECT {selects} FROM {temp_table} t, '
+            'jsonb_populate_record(NULL::{table}, {record}) r').format(
+                table=table,
+                columns=', '.join(quote_name(field.column) for field in fields),
+                selects=', '.join(selects),
+                temp_table=temp_table,
+                record=' || '.join(objects)),
+        drop_sql='DROP TABLE ' + temp_table)
+
+
+def _iter_chunks(lines, chunk_size, count_quotes):
+    chunk = []
+    size = 0
+    in_quotes = False
+    for line in lines:
+        if not count_quotes and not line.strip():
+            continue
+        chunk.append(line)
+        size += len(line)
+        if count_quotes and line.count('"') % 2:
+            # a quoted CSV value with line breaks continues on the next line
+            in_quotes = not in_quotes
+        if size >= chunk_size and not in_quotes:
+            yield ''.join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield ''.join(chunk)
+
+
+def _load_chunk(using, plan, chunk):
+    connection = connections[using]
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(plan.create_sql)
+        cursor.copy_expert(plan.copy_sql, io.StringIO(chunk))
+        cursor.execute(plan.insert_sql)
+        rows = cursor.rowcount
+        cursor.execute(plan.drop_sql)
+    return rows
+
+
+def close_inherited_connections():
+    """
+    Initializer of forked worker processes, which must not use the sockets
+    of the database connections inherited from the parent.
+    """
+    for connection in connections.all():
+        connection.connection = None
+
+
+def bulk_load(
+        model, file, format='csv', chunk_size=None, workers=1, columns=None,
+        expressions=None, delimiter=',', using=DEFAULT_DB_ALIAS, progress=None):
+    """
+    Loads the rows of ``file``, a text file object, into the table of ``model``,
+    with ``COPY`` into a temporary table and ``INSERT ... SELECT`` from it.
+    Returns a :py:class:`BulkLoadResult`.
+
+    ``format`` is ``'csv'``, with a header of field names, or ``'jsonl'``, with a
+    JSON object per line, all with the keys of the first one. Values are converted
+    by Postgres to the column types, so arrays must be Postgres array literals on CSV
+    and JSON arrays on JSONL. Nulls of non-nullable text fields are loaded as ``''``.
+    ``columns`` are the field names of the CSV columns, if the header has other names.
+    ``expressions`` maps field names to SQL expressions to load them with,
+    where ``{column}`` is the text value, e.g.
+    ``{'categories': "regexp_split_to_array({column}, ',')"}``.
+    ``columns`` and ``expressions`` are only supported on CSV.
+
+    Rows are inserted in chunks of about ``chunk_size`` characters of ``file``,
+    the ``batch_size`` of the model ZomboDB index by default, each in its own transaction.
+    With ``workers`` greater than 1, chunks are loaded in parallel by forked
+    worker processes, each with its own database connection.
+    ``progress`` is called after each chunk with the number of rows loaded so far.
+    """
+    if format not in BULK_LOAD_FORMATS:
+        raise ValueError("format must be one of: {}.".format(', '.join(BULK_LOAD_FORMATS)))
+    expressions = expressions or {}
+    if (expressions or columns) and format != 'csv':
+        raise ValueError("columns and expressions are only supported on CSV.")
+    connection = connections[using]
+    if workers > 1 and connection.in_atomic_block:
+        raise TransactionManagementError(
+            "bulk_load can't load in parallel inside an atomic block.")
+    index = get_zombodb_index_from_model(model)
+    if chunk_size is None:
+        chunk_size = index.batch_size or DEFAULT_BATCH_SIZE
+
+    lines = iter(file)
+    first_line = next(lines, '')
+    if format == 'csv':
+        header = columns or next(csv.reader([first_line], delimiter=delimiter), None)
+        if not header:
+            return BulkLoadResult(rows=0, chunks=0, elapsed=0.0)
+        plan = _get_csv_plan(model, connection, header, expressions, delimiter)
+    else:
+        while first_line and not first_line.strip():
+            first_line = next(lines, '')
+        if not first_line:
+            return BulkLoadResult(rows=0, chunks=0, elapsed=0.0)
+        plan = _get_jsonl_plan(model, connection, list(json.loads(first_line)), expressions)
+        lines = itertools.chain([first_line], lines)
+    chunks = _iter_chunks(lines, chunk_size, count_quotes=format == 'csv')
+
+    start = time.perf_counter()
+    rows = 0
+    chunk_count = 0
+    for chunk_rows in _load_chunks(using, plan, chunks, workers):
+        rows += chunk_rows
+        chunk_count += 1
+        if progress is not None:
+            progress(rows)
+    return BulkLoadResult(rows=rows, chunks=chunk_count, elapsed=time.perf_counter() - start)
+
+
+def _load_chunks(using, plan, chunks, workers):
+    if workers <= 1:
+        for chunk in chunks:
+            yield _load_chunk(using, plan, chunk)
+        return
+
+    # forked workers must not share the parent connections
+    connections.close_all()
+    with get_context('fork').Pool(workers, initializer=close_inherited_connections) as pool:
+        # only a few chunks per worker are read ahead, so the file isn't read into memory
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(pool.apply_async(_load_chunk, (using, plan, chunk)))
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().get()
+        while in_flight:
+            yield in_flight.popleft().get()
+
+
+class bulk_indexing_mode(ContextDecorator):  # pylint: disable=invalid-name
+    """
+    Context manager and decorator that changes the options of the ZomboDB index
+    of ``model`` for mass writes, with ``ALTER INDEX ... SET``, and restores the
+    values declared on the :py:class:`~django_zombodb.indexes.ZomboDBIndex` on exit,
+    even on errors. Options declared as ``None`` are restored to ZomboDB defaults.
+
+    By default, Elasticsearch refreshes (``refresh_interval='-1'``) and replicas
+    (``replicas=0``) are disabled. ``bulk_concurrency`` and ``batch_size`` are
+    only changed if given. Pass ``None`` to leave an option unchanged.
+
+    Options are changed for all the index users, not only for the current connection,
+    and nesting ``bulk_indexing_mode`` restores them on the inner exit.
+
+    ZomboDB applies the options to Elasticsearch right away, and rolling back a
+    transaction doesn't revert them there, so it can't be used inside an atomic block.
+    """
+
+    def __init__(
+            self, model, refresh_interval='-1', replicas=0, bulk_concurrency=None,
+            batch_size=None, using=DEFAULT_DB_ALIAS):
+        self.model = model
+        self.options = OrderedDict(
+            (option, value) for option, value in [
+                ('refresh_interval', refresh_interval),
+                ('replicas', replicas),
+                ('bulk_concurrency', bulk_concurrency),
+                ('batch_size', batch_size),
+            ] if value is not None)
+        self.using = using
+
+    def _alter_options(self, options):
+        connection = connections[self.using]
+        index = get_zombodb_index_from_model(self.model)
+        with connection.cursor() as cursor:
+            for sql in index.get_alter_options_sql(connection.ops.quote_name, options):
+                cursor.execute(sql)
+
+    def __enter__(self):
+        if connections[self.using].in_atomic_block:
+            # an error would abort the transaction before the options are restored
+            raise TransactionManagementError(
+                "bulk_indexing_mode can't be used inside an atomic block.")
+        self._alter_options(self.options)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        index = get_zombodb_index_from_model(self.model)
+        self._alter_options({option: getattr(index, option) for option in self.options})
+        return False
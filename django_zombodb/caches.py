@@ -0,0 +1,283 @@
+import datetime
+import decimal
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+from elasticsearch_dsl.utils import AttrDict, AttrList, DslBase
+
+from django_zombodb import metrics
+from django_zombodb.lazy_settings import LazySetting
+
+
+DEFAULT_TIMEOUT = 300
+DEFAULT_MAX_ENTRIES = 1024
+
+
+class BaseValidationCache:
+    """
+    Stores the results of Elasticsearch query validations,
+    keyed by index name and serialized query.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_entries=DEFAULT_MAX_ENTRIES):
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def make_key(self, index_name, post_data):
+        digest = hashlib.sha1(post_data.encode('utf-8')).hexdigest()
+        return 'django_zombodb:validation:{index_name}:{digest}'.format(
+            index_name=index_name, digest=digest)
+
+    def get(self, index_name, post_data):
+        is_valid = self._get(self.make_key(index_name, post_data))
+        with self._stats_lock:
+            if is_valid is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        metrics.VALIDATION_CACHE.inc(
+            index=index_name, result='miss' if is_valid is None else 'hit')
+        return is_valid
+
+    def set(self, index_name, post_data, is_valid):
+        self._set(self.make_key(index_name, post_data), is_valid)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.hits = 0
+            self.misses = 0
+
+    def clear(self):
+        raise NotImplementedError  # pragma: no cover
+
+    def _get(self, key):
+        raise NotImplementedError  # pragma: no cover
+
+    def _set(self, key, is_valid):
+        raise NotImplementedError  # pragma: no cover
+
+
+class LocMemValidationCache(BaseValidationCache):
+    """
+    In-process LRU cache. Entries expire after ``timeout`` seconds
+    and the least recently used ones are evicted after ``max_entries``.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_entries=DEFAULT_MAX_ENTRIES):
+        super().__init__(timeout=timeout, max_entries=max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def make_key(self, index_name, post_data):
+        # no need to hash, keys never leave the process
+        return (index_name, post_data)
+
+    def _get(self, key):
+        with self._lock:
+            try:
+                is_valid, expires_at = self._entries[key]
+            except KeyError:
+                return None
+
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return is_valid
+
+    def _set(self, key, is_valid):
+        expires_at = None
+        if self.timeout is not None:
+            expires_at = time.monotonic() + self.timeout
+
+        with self._lock:
+            self._entries[key] = (is_valid, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DjangoValidationCache(BaseValidationCache):
+    """
+    Uses one of the caches from Django's ``CACHES`` setting,
+    so validation results can be shared between processes.
+    Eviction is up to the chosen cache backend.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_entries=None, alias='default'):
+        super().__init__(timeout=timeout, max_entries=max_entries)
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _get(self, key):
+        return self.cache.get(key)
+
+    def _set(self, key, is_valid):
+        self.cache.set(key, is_valid, timeout=self.timeout)
+
+    def clear(self):
+        # only stats are local, entries are shared with other processes
+        self.reset_stats()
+
+
+def _create_validation_cache():
+    config = dict(getattr(settings, 'ZOMBODB_VALIDATION_CACHE', None) or {})
+    if not config:
+        return None
+
+    backend = import_string(
+        config.pop('BACKEND', 'django_zombodb.caches.LocMemValidationCache'))
+    kwargs = {key.lower(): value for key, value in config.items()}
+    return backend(**kwargs)
+
+
+_validation_cache = LazySetting(['ZOMBODB_VALIDATION_CACHE'], _create_validation_cache)
+
+
+def get_validation_cache():
+    """
+    Returns the validation cache configured at ``settings.ZOMBODB_VALIDATION_CACHE``,
+    or ``None`` if caching is disabled.
+    """
+    return _validation_cache.get()
+
+
+# immutable values that may appear on queries, besides str, dict and list
+_QUERY_KEY_SCALAR_TYPES = frozenset([
+    int, float, bool, type(None),
+    decimal.Decimal, datetime.date, datetime.datetime, uuid.UUID,
+])
+_DICT_MARKER = '{'
+_LIST_MARKER = '['
+
+
+def _make_query_key(value):
+    value_type = value.__class__
+    if value_type is str:
+        return value
+    if value_type is dict:
+        key = [_DICT_MARKER]
+        for item_key, item_value in value.items():
+            key.append(_make_query_key(item_key))
+            key.append(_make_query_key(item_value))
+        return tuple(key)
+    if value_type is list or value_type is tuple:
+        return (_LIST_MARKER,) + tuple([_make_query_key(item) for item in value])
+    if value_type in _QUERY_KEY_SCALAR_TYPES:
+        # the type is part of the key because True == 1 == 1.0
+        return (value_type, value)
+    if isinstance(value, DslBase):
+        return (value_type, value.name, _make_query_key(value._params))
+    if isinstance(value, AttrList):
+        return _make_query_key(value._l_)
+    if isinstance(value, AttrDict):
+        return _make_query_key(value._d_)
+    raise TypeError("Can't make a query key with {!r}".format(value))
+
+
+class CompiledQueryCache:
+    """
+    In-process LRU cache of the query strings compiled from ``dict`` and
+    elasticsearch-dsl-py queries. Keys are built from the structure of the
+    queries, so equal queries built on different requests share the same entry.
+    The least recently used entries are evicted after ``max_entries``.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def make_key(self, query):
+        return _make_query_key(query)
+
+    def get_or_compile(self, query, compile_fn):
+        """
+        Returns the cached query string of ``query``,
+        or calls ``compile_fn(query)`` and caches its result.
+        Queries with values that can't be part of a key aren't cached.
+        """
+        try:
+            key = self.make_key(query)
+        except TypeError:
+            return compile_fn(query)
+
+        with self._lock:
+            query_str = self._entries.get(key)
+            if query_str is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return query_str
+            self.misses += 1
+
+        query_str = compile_fn(query)
+        with self._lock:
+            self._entries[key] = query_str
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return query_str
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _create_compiled_query_cache():
+    config = getattr(settings, 'ZOMBODB_COMPILED_QUERY_CACHE', {})
+    if config is None or config is False:
+        return None
+    if config is True:
+        config = {}
+
+    kwargs = {key.lower(): value for key, value in config.items()}
+    return CompiledQueryCache(**kwargs)
+
+
+# query strings depend on the JSON serializer too
+_compiled_query_cache = LazySetting(
+    ['ZOMBODB_COMPILED_QUERY_CACHE', 'ZOMBODB_JSON_SERIALIZER'], _create_compiled_query_cache)
+
+
+def get_compiled_query_cache():
+    """
+    Returns the compiled query cache configured at
+    ``settings.ZOMBODB_COMPILED_QUERY_CACHE``, or ``None`` if it's disabled.
+    Unlike the validation cache, it's enabled by default.
+    """
+    return _compiled_query_cache.get()
@@ -1,49 +1,218 @@
+import time
+from collections import OrderedDict
+
 from django.core.exceptions import ImproperlyConfigured
 from django.db import connection
 
-from django_zombodb.indexes import ZomboDBIndex
+from django_zombodb import metrics, tracing
+from django_zombodb.async_utils import db_sync_to_async
+from django_zombodb.caches import LocMemValidationCache, get_validation_cache
+from django_zombodb.query_string import validate_query_string_syntax
+from django_zombodb.registry import registry
 from django_zombodb.serializers import ES_JSON_SERIALIZER
+from django_zombodb.slow_searches import get_slow_search_threshold, log_slow_validation
 
 
 def get_zombodb_index_from_model(model):
-    for index in model._meta.indexes:
-        if isinstance(index, ZomboDBIndex):
-            return index
+    index = registry.get(model).index
+    if index is not None:
+        return index
 
     raise ImproperlyConfigured(
         "Can't find a ZomboDBIndex at model {model}. "
         "Did you forget it? ".format(model=model))
 
 
+VALIDATE_QUERIES_CHUNK_SIZE = 500
+
+
+def _get_validation_result(index, response):
+    validation_result = ES_JSON_SERIALIZER.loads(response)
+    if 'error' in validation_result:
+        raise ImproperlyConfigured(
+            "Unexpected Elasticsearch error. "
+            "You may need to recreate your index={index}. "
+            "Details:\n"
+            "{error}".format(index=index, error=validation_result))
+    return validation_result['valid']
+
+
 def _validate_query(index, post_data):
-    with connection.cursor() as cursor:
-        cursor.execute('''
-            SELECT zdb.request(%(index_name)s, %(endpoint)s, 'POST', %(post_data)s);
-        ''', {
-            'index_name': index.name,
-            'endpoint': '_validate/query',
-            'post_data': post_data
-        })
-        validation_result = ES_JSON_SERIALIZER.loads(cursor.fetchone()[0])
-        if 'error' in validation_result:
-            raise ImproperlyConfigured(
-                "Unexpected Elasticsearch error. "
-                "You may need to recreate your index={index}. "
-                "Details:\n"
-                "{error}".format(index=index, error=validation_result))
-        return validation_result['valid']
+    cache = get_validation_cache()
+    if cache is not None:
+        is_valid = cache.get(index.name, post_data)
+        if is_valid is not None:
+            return is_valid
 
+    return _request_validation(index, post_data, cache)
 
-def validate_query_string(model, query):
-    post_data = ES_JSON_SERIALIZER.dumps(
+
+async def _avalidate_query(index, post_data):
+    cache = get_validation_cache()
+    if not isinstance(cache, LocMemValidationCache):
+        # other caches may do blocking I/O
+        return await db_sync_to_async(_validate_query)(index, post_data)
+
+    is_valid = cache.get(index.name, post_data)
+    if is_valid is not None:
+        return is_valid
+    return await db_sync_to_async(_request_validation)(index, post_data, cache)
+
+
+def _record_validation(index, is_valid):
+    if is_valid is None:
+        result = 'error'
+    else:
+        result = 'valid' if is_valid else 'invalid'
+    metrics.VALIDATIONS.inc(index=index.name, result=result)
+
+
+def _request_validation(index, post_data, cache):
+    start = time.perf_counter()
+    is_valid = None
+    try:
+        with tracing.start_span('zombodb.validation', {
+            'zombodb.index': index.name,
+            'zombodb.queries': 1,
+        }) as span, connection.cursor() as cursor:
+            cursor.execute('''
+                SELECT zdb.request(%(index_name)s, %(endpoint)s, 'POST', %(post_data)s);
+            ''', {
+                'index_name': index.name,
+                'endpoint': '_validate/query',
+                'post_data': post_data
+            })
+            is_valid = _get_validation_result(index, cursor.fetchone()[0])
+            span.set_attribute('zombodb.valid', is_valid)
+    finally:
+        duration = time.perf_counter() - start
+        metrics.VALIDATION_DURATION.observe(duration, index=index.name)
+        _record_validation(index, is_valid)
+        threshold = get_slow_search_threshold()
+        if threshold is not None and duration >= threshold:
+            log_slow_validation(index.name, post_data, duration)
+
+    if cache is not None:
+        cache.set(index.name, post_data, is_valid)
+    return is_valid
+
+
+def _get_query_string_post_data(query):
+    return ES_JSON_SERIALIZER.dumps(
         {'query': {'query_string': {'query': query}}})
+
+
+def _get_query_dict_post_data(query):
+    return ES_JSON_SERIALIZER.dumps({'query': query})
+
+
+def validate_query_string(model, query):
     index = get_zombodb_index_from_model(model)
+    # reject syntax errors locally, without a round trip to Elasticsearch
+    if not validate_query_string_syntax(query):
+        metrics.VALIDATION_SYNTAX_ERRORS.inc(index=index.name)
+        return False
+
+    post_data = _get_query_string_post_data(query)
 
     return _validate_query(index, post_data)
 
 
 def validate_query_dict(model, query):
-    post_data = ES_JSON_SERIALIZER.dumps({'query': query})
+    post_data = _get_query_dict_post_data(query)
     index = get_zombodb_index_from_model(model)
 
     return _validate_query(index, post_data)
+
+
+async def avalidate_query_string(model, query):
+    """
+    Async version of :py:func:`validate_query_string`.
+    """
+    index = get_zombodb_index_from_model(model)
+    if not validate_query_string_syntax(query):
+        metrics.VALIDATION_SYNTAX_ERRORS.inc(index=index.name)
+        return False
+
+    post_data = _get_query_string_post_data(query)
+
+    return await _avalidate_query(index, post_data)
+
+
+async def avalidate_query_dict(model, query):
+    """
+    Async version of :py:func:`validate_query_dict`.
+    """
+    post_data = _get_query_dict_post_data(query)
+    index = get_zombodb_index_from_model(model)
+
+    return await _avalidate_query(index, post_data)
+
+
+def validate_queries(model, queries, chunk_size=VALIDATE_QUERIES_CHUNK_SIZE):
+    """
+    Validates many queries at once. Each query can be a query string (``str``)
+    or an Elasticsearch JSON query (``dict``).
+    Returns a list with a ``bool`` for each query, in the same order.
+
+    All validations are sent in a single SQL statement per ``chunk_size`` queries,
+    instead of one statement per query.
+    """
+    index = get_zombodb_index_from_model(model)
+    cache = get_validation_cache()
+
+    results = [None] * len(queries)
+    pending = OrderedDict()  # post_data -> positions, so duplicates are sent only once
+    for position, query in enumerate(queries):
+        if isinstance(query, str):
+            if not validate_query_string_syntax(query):
+                metrics.VALIDATION_SYNTAX_ERRORS.inc(index=index.name)
+                results[position] = False
+                continue
+            post_data = _get_query_string_post_data(query)
+        else:
+            post_data = _get_query_dict_post_data(query)
+
+        if cache is not None and post_data not in pending:
+            results[position] = cache.get(index.name, post_data)
+            if results[position] is not None:
+                continue
+        pending.setdefault(post_data, []).append(position)
+
+    if not pending:
+        return results
+
+    pending = list(pending.items())
+    with connection.cursor() as cursor:
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start:start + chunk_size]
+            start_time = time.perf_counter()
+            with tracing.start_span('zombodb.validation', {
+                'zombodb.index': index.name,
+                'zombodb.queries': len(chunk),
+            }):
+                cursor.execute('''
+                    SELECT zdb.request(%(index_name)s, %(endpoint)s, 'POST', post_data)
+                    FROM unnest(%(post_data)s::text[]) WITH ORDINALITY AS t(post_data, position)
+                    ORDER BY position;
+                ''', {
+                    'index_name': index.name,
+                    'endpoint': '_validate/query',
+                    'post_data': [post_data for post_data, __ in chunk]
+                })
+                responses = cursor.fetchall()
+            metrics.VALIDATION_DURATION.observe(
+                time.perf_counter() - start_time, index=index.name)
+            for (post_data, positions), (response,) in zip(chunk, responses):
+                try:
+                    is_valid = _get_validation_result(index, response)
+                except ImproperlyConfigured:
+                    _record_validation(index, None)
+                    raise
+                _record_validation(index, is_valid)
+                for position in positions:
+                    results[position] = is_valid
+                if cache is not None:
+                    cache.set(index.name, post_data, is_valid)
+
+    return results
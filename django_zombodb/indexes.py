@@ -190,6 +190,33 @@ class ZomboDBIndex(PostgresIndex):
                 kwargs[param] = value
         return path, args, kwargs
 
+    def get_alter_options_sql(self, quote_name, options):
+        """
+        Returns the ``ALTER INDEX`` statements that change ``options``, a ``dict`` of
+        option names to values, on this index. Options with ``None`` values are reset
+        to ZomboDB defaults.
+        """
+        set_params = []
+        reset_params = []
+        for param, __, param_type in self._get_params():
+            if param not in options:
+                continue
+            value = options[param]
+            if value is None:
+                reset_params.append(param)
+            else:
+                value_formatted = self._format_param_value(value, param_type)
+                set_params.append('%s = %s' % (param, value_formatted))
+
+        statements = []
+        if set_params:
+            statements.append('ALTER INDEX %s SET (%s)' % (
+                quote_name(self.name), ', '.join(set_params)))
+        if reset_params:
+            statements.append('ALTER INDEX %s RESET (%s)' % (
+                quote_name(self.name), ', '.join(reset_params)))
+        return statements
+
     def get_with_params(self):
         with_params = []
         for param, value, param_type in self._get_params():
@@ -0,0 +1,37 @@
+import threading
+
+from django.core.signals import setting_changed
+
+
+_NOT_CONFIGURED = object()
+
+
+class LazySetting:
+    """
+    A value built by ``factory()`` from Django settings when first needed,
+    once even if many threads need it at the same time. It's built again after
+    any of ``setting_names`` changes, e.g. with ``override_settings`` on tests.
+    """
+
+    def __init__(self, setting_names, factory):
+        self.setting_names = frozenset(setting_names)
+        self.factory = factory
+        self._value = _NOT_CONFIGURED
+        self._lock = threading.Lock()
+        setting_changed.connect(self._setting_changed, weak=False)
+
+    def get(self):
+        value = self._value
+        if value is _NOT_CONFIGURED:
+            with self._lock:
+                value = self._value
+                if value is _NOT_CONFIGURED:
+                    value = self._value = self.factory()
+        return value
+
+    def reset(self):
+        self._value = _NOT_CONFIGURED
+
+    def _setting_changed(self, setting, **kwargs):
+        if setting in self.setting_names:
+            self.reset()
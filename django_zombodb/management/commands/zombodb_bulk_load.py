@@ -0,0 +1,99 @@
+import os
+import sys
+
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from django_zombodb.bulk import BULK_LOAD_FORMATS, bulk_load
+
+
+class Command(BaseCommand):
+    help = (
+        'Loads rows from a CSV or JSONL file into the table of a model with a ZomboDB index, '
+        'with COPY and INSERT ... SELECT in chunks.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'model', metavar='app_label.ModelName',
+            help='Model to load the rows into.')
+        parser.add_argument(
+            'path',
+            help='Path of the file to load, or - for the standard input.')
+        parser.add_argument(
+            '--format', choices=BULK_LOAD_FORMATS,
+            help='Format of the file. Default: guessed from the file extension, or csv.')
+        parser.add_argument(
+            '--columns',
+            help=(
+                'Comma-separated field names of the CSV columns, '
+                'if the header has other names.'))
+        parser.add_argument(
+            '--delimiter', default=',',
+            help='Delimiter of CSV values. Default: "%(default)s"')
+        parser.add_argument(
+            '--chunk-size', type=int,
+            help=(
+                'Approximate size of each chunk, in characters. '
+                'Default: the batch_size of the ZomboDB index, or 8MB.'))
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help=(
+                'Number of worker processes, each with its own database connection, '
+                'loading chunks in parallel. Default: %(default)s'))
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Database to load the rows into. Default: "%(default)s"')
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))
+        if options['workers'] < 1:
+            raise CommandError("--workers must be at least 1.")
+
+        path = options['path']
+        file_format = options['format']
+        if file_format is None:
+            extension = os.path.splitext(path)[1].lower()
+            file_format = 'jsonl' if extension in ('.jsonl', '.ndjson') else 'csv'
+
+        if path == '-':
+            file = sys.stdin
+        else:
+            try:
+                file = open(path, newline='' if file_format == 'csv' else None)
+            except OSError as e:
+                raise CommandError(str(e))
+
+        def progress(rows):
+            if options['verbosity'] >= 2:
+                self.stdout.write("{:,} rows loaded".format(rows))
+
+        try:
+            result = bulk_load(
+                model, file,
+                format=file_format,
+                chunk_size=options['chunk_size'],
+                workers=options['workers'],
+                columns=options['columns'].split(',') if options['columns'] else None,
+                delimiter=options['delimiter'],
+                using=options['database'],
+                progress=progress)
+        except (ValueError, ImproperlyConfigured) as e:
+            raise CommandError(str(e))
+        finally:
+            if file is not sys.stdin:
+                file.close()
+
+        rows_per_second = result.rows / result.elapsed if result.elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            "Loaded {rows:,} rows into {model} in {chunks} chunk(s) and {elapsed:.1f}s: "
+            "{rows_per_second:,.0f} rows/s".format(
+                rows=result.rows,
+                model=model._meta.label,
+                chunks=result.chunks,
+                elapsed=result.elapsed,
+                rows_per_second=rows_per_second)))
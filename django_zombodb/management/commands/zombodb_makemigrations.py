@@ -0,0 +1,39 @@
+import types
+
+from django.core.management.commands import makemigrations
+
+from django_zombodb.autodetector import ZomboDBMigrationAutodetector
+
+
+def _with_zombodb_autodetector(function):
+    """
+    Returns a copy of ``function`` that builds ``ZomboDBMigrationAutodetector``
+    where it builds ``MigrationAutodetector``, through a copy of its module globals,
+    so Django's ``makemigrations`` module is left untouched.
+    """
+    function_globals = dict(
+        function.__globals__, MigrationAutodetector=ZomboDBMigrationAutodetector)
+    return types.FunctionType(
+        function.__code__, function_globals, function.__name__,
+        function.__defaults__, function.__closure__)
+
+
+def _get_handle():
+    handle = makemigrations.Command.handle
+    # Django 2.1+ wraps handle with no_translations, which doesn't use functools.wraps
+    for cell in handle.__closure__ or ():
+        wrapped = cell.cell_contents
+        if isinstance(wrapped, types.FunctionType) and wrapped.__name__ == 'handle':
+            from django.core.management.base import no_translations
+            return no_translations(_with_zombodb_autodetector(wrapped))
+    return _with_zombodb_autodetector(handle)
+
+
+class Command(makemigrations.Command):
+    help = (
+        makemigrations.Command.help + ' ZomboDB index options that can change online '
+        'and additive field_mapping changes are applied in place, without rebuilding the index.')
+
+    # Django's makemigrations reads the autodetector from here since 5.2
+    autodetector = ZomboDBMigrationAutodetector
+    handle = _get_handle()
@@ -0,0 +1,232 @@
+import time
+from collections import OrderedDict
+from multiprocessing import get_context
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from django_zombodb.bulk import close_inherited_connections
+from django_zombodb.indexes import ZomboDBIndex
+
+
+PROGRESS_SQL = '''
+    SELECT p.relid::regclass::text, p.index_relid, p.phase,
+           p.blocks_done, p.blocks_total, p.tuples_done, p.tuples_total
+    FROM pg_stat_progress_create_index p
+    WHERE p.datname = current_database() AND p.command = 'REINDEX'
+'''
+
+
+def get_zombodb_indexes(app_labels=()):
+    """
+    Returns ``(model, index)`` tuples of the ZomboDB indexes of the installed models,
+    or only of the models of ``app_labels``. Items of ``app_labels`` are app labels
+    (``'restaurants'``) or model labels (``'restaurants.Restaurant'``).
+    """
+    if app_labels:
+        models = []
+        for label in app_labels:
+            try:
+                if '.' in label:
+                    models.append(apps.get_model(label))
+                else:
+                    models.extend(apps.get_app_config(label).get_models())
+            except LookupError as e:
+                raise CommandError(str(e))
+    else:
+        models = apps.get_models()
+
+    indexes = []
+    for model in models:
+        if model._meta.proxy or model._meta.swapped:
+            continue
+        for index in model._meta.indexes:
+            if isinstance(index, ZomboDBIndex):
+                indexes.append((model, index))
+    return indexes
+
+
+def _reindex(database, index_name):
+    """
+    Rebuilds the index ``index_name`` on the database connection of the worker process.
+    Returns the elapsed time, in seconds, and the number of indexed rows.
+    """
+    connection = connections[database]
+    quoted_index_name = connection.ops.quote_name(index_name)
+    try:
+        with connection.cursor() as cursor:
+            start = time.perf_counter()
+            cursor.execute('REINDEX INDEX ' + quoted_index_name)
+            elapsed = time.perf_counter() - start
+            # REINDEX updates the index statistics with the number of indexed rows
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [quoted_index_name])
+            rows = max(cursor.fetchone()[0], 0)
+    finally:
+        connection.close()
+    return elapsed, rows
+
+
+def _format_progress(row):
+    __, __, phase, blocks_done, blocks_total, tuples_done, tuples_total = row
+    if tuples_total:
+        done = '{:,}/{:,} rows ({:.0%})'.format(
+            tuples_done, tuples_total, tuples_done / tuples_total)
+    elif blocks_total:
+        done = '{:,}/{:,} blocks ({:.0%})'.format(
+            blocks_done, blocks_total, blocks_done / blocks_total)
+    else:
+        done = '{:,} rows'.format(tuples_done)
+    return '{phase}: {done}'.format(phase=phase, done=done)
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuilds the ZomboDB indexes of all installed models, or of the given apps or models, '
+        'with REINDEX, running several indexes in parallel.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'labels', metavar='app_label[.ModelName]', nargs='*',
+            help='Only rebuild the ZomboDB indexes of these apps or models.')
+        parser.add_argument(
+            '--workers', type=int, default=2,
+            help=(
+                'Number of worker processes, each with its own database connection, '
+                'rebuilding indexes in parallel. Default: %(default)s'))
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Database to rebuild the indexes on. Default: "%(default)s"')
+        parser.add_argument(
+            '--progress-interval', type=float, default=10.0,
+            help=(
+                'Seconds between progress reports from pg_stat_progress_create_index. '
+                '0 disables them. Default: %(default)s'))
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError("--workers must be at least 1.")
+        database = options['database']
+
+        indexes = get_zombodb_indexes(options['labels'])
+        if not indexes:
+            self.stdout.write("No ZomboDB indexes found.")
+            return
+
+        connection = connections[database]
+        table_names = set(connection.introspection.table_names())
+        for model, index in indexes:
+            if model._meta.db_table not in table_names:
+                self.stderr.write(self.style.WARNING(
+                    "Skipping {index_name}: table {table} doesn't exist.".format(
+                        index_name=index.name, table=model._meta.db_table)))
+        indexes = [
+            (model, index) for model, index in indexes if model._meta.db_table in table_names]
+        if not indexes:
+            return
+        # biggest tables first, so they don't start last and hold the whole run
+        table_sizes = self._get_table_sizes(connection, indexes)
+        indexes.sort(key=lambda item: table_sizes.get(item[0]._meta.db_table, 0), reverse=True)
+
+        progress_interval = options['progress_interval']
+        if progress_interval and connection.pg_version < 120000:
+            self.stderr.write(self.style.WARNING(
+                "Progress reports need PostgreSQL 12 or later."))
+            progress_interval = 0
+
+        workers = min(options['workers'], len(indexes))
+        self.stdout.write("Rebuilding {count} ZomboDB index(es) with {workers} worker(s)...".format(
+            count=len(indexes), workers=workers))
+
+        # forked workers must not share the parent connections
+        connections.close_all()
+        start = time.perf_counter()
+        with get_context('fork').Pool(workers, initializer=close_inherited_connections) as pool:
+            pending = OrderedDict(
+                (index.name, (model, pool.apply_async(_reindex, (database, index.name))))
+                for model, index in indexes)
+            results = self._wait(connection, pending, progress_interval)
+        elapsed = time.perf_counter() - start
+        connection.close()
+
+        self._write_summary(results, elapsed)
+        failed = [index_name for index_name, result in results if isinstance(result, Exception)]
+        if failed:
+            raise CommandError("Failed to rebuild: {}".format(', '.join(failed)))
+
+    def _get_table_sizes(self, connection, indexes):
+        tables = list({model._meta.db_table for model, __ in indexes})
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT relname, relpages FROM pg_class '
+                'WHERE relname = ANY(%s) AND relkind = \'r\'', [tables])
+            return dict(cursor.fetchall())
+
+    def _wait(self, connection, pending, progress_interval):
+        results = []
+        last_progress = time.perf_counter()
+        while pending:
+            time.sleep(0.1)
+            for index_name, (__, async_result) in list(pending.items()):
+                if not async_result.ready():
+                    continue
+                del pending[index_name]
+                try:
+                    result = async_result.get()
+                except Exception as e:  # pylint: disable=broad-except
+                    self.stderr.write(self.style.ERROR(
+                        "{index_name} failed: {error}".format(index_name=index_name, error=e)))
+                    result = e
+                else:
+                    self.stdout.write("{index_name} done in {elapsed:.1f}s".format(
+                        index_name=index_name, elapsed=result[0]))
+                results.append((index_name, result))
+
+            if pending and progress_interval and \
+                    time.perf_counter() - last_progress >= progress_interval:
+                self._write_progress(connection, pending)
+                last_progress = time.perf_counter()
+        return results
+
+    def _write_progress(self, connection, pending):
+        with connection.cursor() as cursor:
+            cursor.execute(PROGRESS_SQL)
+            rows = cursor.fetchall()
+            index_oids = {}
+            if rows:
+                cursor.execute(
+                    'SELECT relname, oid FROM pg_class WHERE relname = ANY(%s)', [list(pending)])
+                index_oids = dict(cursor.fetchall())
+
+        progress_by_index = {}
+        for row in rows:
+            table, index_relid = row[:2]
+            for index_name, (model, __) in pending.items():
+                if index_oids.get(index_name) == index_relid or \
+                        (not index_relid and model._meta.db_table == table):
+                    progress_by_index[index_name] = row
+
+        for index_name in pending:
+            row = progress_by_index.get(index_name)
+            self.stdout.write("  {index_name}: {progress}".format(
+                index_name=index_name,
+                progress=_format_progress(row) if row else 'waiting'))
+
+    def _write_summary(self, results, elapsed):
+        row = '{:<40} {:>12} {:>10} {:>12}'
+        self.stdout.write(row.format('index', 'rows', 'seconds', 'rows/s'))
+        total_rows = 0
+        for index_name, result in results:
+            if isinstance(result, Exception):
+                self.stdout.write(row.format(index_name, '-', '-', 'failed'))
+                continue
+            index_elapsed, rows = result
+            total_rows += rows
+            self.stdout.write(row.format(
+                index_name, '{:,}'.format(rows), '{:.1f}'.format(index_elapsed),
+                '{:,.0f}'.format(rows / index_elapsed) if index_elapsed else '-'))
+        self.stdout.write(row.format(
+            'total', '{:,}'.format(total_rows), '{:.1f}'.format(elapsed),
+            '{:,.0f}'.format(total_rows / elapsed) if elapsed else '-'))
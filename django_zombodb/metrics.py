@@ -0,0 +1,342 @@
+"""
+Prometheus-style counters and histograms of searches, validations,
+admin searches and ZomboDB index DDL.
+
+Metrics are sent to the exporters configured at ``settings.ZOMBODB_METRICS_EXPORTERS``.
+Without exporters, recording a metric is a no-op.
+"""
+import bisect
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from django_zombodb.lazy_settings import LazySetting
+from django_zombodb.statements import get_search_table, get_zombodb_call_kinds
+
+
+INF = float('inf')
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+LIMIT_BUCKETS = (10, 100, 1000, 10000, 100000)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def __repr__(self):
+        return '<%s %s>' % (self.__class__.__name__, self.name)
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        for exporter in get_metrics_exporters():
+            exporter.inc(self, labels, amount)
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        buckets = tuple(buckets)
+        if not buckets or buckets[-1] != INF:
+            buckets += (INF,)
+        self.buckets = buckets
+
+    def observe(self, value, **labels):
+        for exporter in get_metrics_exporters():
+            exporter.observe(self, labels, value)
+
+
+SEARCHES = Counter(
+    'zombodb_searches_total',
+    'Calls to the search methods of search querysets.',
+    ['model', 'query_type', 'limited'])
+SEARCH_LIMIT = Histogram(
+    'zombodb_search_limit',
+    'The limit parameter of limited searches.',
+    ['model', 'query_type'],
+    buckets=LIMIT_BUCKETS)
+SEARCH_DURATION = Histogram(
+    'zombodb_search_duration_seconds',
+    'Execution time of SQL statements with ZomboDB searches.',
+    ['table'])
+VALIDATIONS = Counter(
+    'zombodb_validations_total',
+    'Query validations sent to Elasticsearch, by result: valid, invalid or error.',
+    ['index', 'result'])
+VALIDATION_DURATION = Histogram(
+    'zombodb_validation_duration_seconds',
+    'Time of each SQL statement with query validations.',
+    ['index'])
+VALIDATION_SYNTAX_ERRORS = Counter(
+    'zombodb_validation_syntax_errors_total',
+    'Query strings rejected locally, without reaching Elasticsearch.',
+    ['index'])
+VALIDATION_CACHE = Counter(
+    'zombodb_validation_cache_requests_total',
+    'Validation cache lookups, by result: hit or miss.',
+    ['index', 'result'])
+ADMIN_SEARCHES = Counter(
+    'zombodb_admin_searches_total',
+    'Searches on ZomboDBAdminMixin changelists, by validity of the query.',
+    ['model', 'valid'])
+DDL_DURATION = Histogram(
+    'zombodb_ddl_duration_seconds',
+    'Execution time of ZomboDB index DDL, by operation: create_index or drop_index.',
+    ['operation'])
+
+DDL_KINDS = ('create_index', 'drop_index')
+
+
+def _label_value(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def _escape_label_value(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels_key(metric, labels):
+    return tuple(_label_value(labels[name]) for name in metric.labelnames)
+
+
+class BaseMetricsExporter:
+    """
+    Receives the metrics recorded by django-zombodb. Subclasses
+    must implement :py:meth:`inc` for counters and :py:meth:`observe` for histograms.
+    """
+
+    def inc(self, metric, labels, amount):
+        raise NotImplementedError  # pragma: no cover
+
+    def observe(self, metric, labels, value):
+        raise NotImplementedError  # pragma: no cover
+
+
+class LocMemMetricsExporter(BaseMetricsExporter):
+    """
+    Keeps the metrics in process memory. :py:meth:`render` returns them
+    in the Prometheus text exposition format, and :py:meth:`get_sample_value`
+    returns a single sample, e.g. for tests.
+    """
+
+    def __init__(self):
+        self._metrics = OrderedDict()  # metric name -> (metric, {labels key: value})
+        self._lock = threading.Lock()
+
+    def _get_values(self, metric):
+        try:
+            return self._metrics[metric.name][1]
+        except KeyError:
+            values = OrderedDict()
+            self._metrics[metric.name] = (metric, values)
+            return values
+
+    def inc(self, metric, labels, amount):
+        key = _labels_key(metric, labels)
+        with self._lock:
+            values = self._get_values(metric)
+            values[key] = values.get(key, 0) + amount
+
+    def observe(self, metric, labels, value):
+        key = _labels_key(metric, labels)
+        with self._lock:
+            values = self._get_values(metric)
+            try:
+                bucket_counts, total = values[key]
+            except KeyError:
+                bucket_counts, total = [0] * len(metric.buckets), 0
+            bucket_counts[bisect.bisect_left(metric.buckets, value)] += 1
+            values[key] = (bucket_counts, total + value)
+
+    def _iter_samples(self):
+        with self._lock:
+            metrics = [(metric, list(values.items())) for metric, values in self._metrics.values()]
+
+        for metric, values in metrics:
+            for key, value in values:
+                labels = OrderedDict(zip(metric.labelnames, key))
+                if metric.type == 'counter':
+                    yield metric, metric.name, labels, value
+                    continue
+
+                bucket_counts, total = value
+                cumulative_count = 0
+                for bucket, count in zip(metric.buckets, bucket_counts):
+                    cumulative_count += count
+                    bucket_labels = OrderedDict(labels)
+                    bucket_labels['le'] = '+Inf' if bucket == INF else repr(bucket)
+                    yield metric, metric.name + '_bucket', bucket_labels, cumulative_count
+                yield metric, metric.name + '_count', labels, cumulative_count
+                yield metric, metric.name + '_sum', labels, total
+
+    def get_sample_value(self, name, labels=None):
+        """
+        Returns the value of the sample ``name`` with ``labels``, or ``None``.
+        Histograms have ``_count``, ``_sum`` and ``_bucket`` samples.
+        """
+        labels = {key: _label_value(value) for key, value in (labels or {}).items()}
+        for __, sample_name, sample_labels, value in self._iter_samples():
+            if sample_name == name and sample_labels == labels:
+                return value
+        return None
+
+    def render(self):
+        lines = []
+        last_metric = None
+        for metric, sample_name, labels, value in self._iter_samples():
+            if metric is not last_metric:
+                lines.append('# HELP %s %s' % (metric.name, metric.documentation))
+                lines.append('# TYPE %s %s' % (metric.name, metric.type))
+                last_metric = metric
+            labels_str = ','.join(
+                '%s="%s"' % (name, _escape_label_value(label)) for name, label in labels.items())
+            if labels_str:
+                sample_name += '{' + labels_str + '}'
+            lines.append('%s %s' % (sample_name, repr(float(value))))
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def clear(self):
+        with self._lock:
+            self._metrics.clear()
+
+
+class PrometheusMetricsExporter(BaseMetricsExporter):
+    """
+    Records the metrics with the official Prometheus client, ``prometheus_client``,
+    on its default registry or on ``registry``. Expose them as usual,
+    e.g. with ``prometheus_client.start_http_server``.
+    """
+
+    def __init__(self, registry=None):
+        try:
+            import prometheus_client
+        except ImportError:
+            raise ImproperlyConfigured(
+                "PrometheusMetricsExporter requires prometheus_client. "
+                "Install it with: pip install django-zombodb[prometheus]")
+
+        self._prometheus_client = prometheus_client
+        self.registry = registry if registry is not None else prometheus_client.REGISTRY
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_metric(self, metric):
+        try:
+            return self._metrics[metric.name]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if metric.name not in self._metrics:
+                kwargs = {'registry': self.registry}
+                if metric.type == 'counter':
+                    metric_class = self._prometheus_client.Counter
+                else:
+                    metric_class = self._prometheus_client.Histogram
+                    kwargs['buckets'] = metric.buckets
+                self._metrics[metric.name] = metric_class(
+                    metric.name, metric.documentation, metric.labelnames, **kwargs)
+            return self._metrics[metric.name]
+
+    def _get_child(self, metric, labels):
+        prometheus_metric = self._get_metric(metric)
+        if not metric.labelnames:
+            return prometheus_metric
+        return prometheus_metric.labels(*_labels_key(metric, labels))
+
+    def inc(self, metric, labels, amount):
+        self._get_child(metric, labels).inc(amount)
+
+    def observe(self, metric, labels, value):
+        self._get_child(metric, labels).observe(value)
+
+
+def _create_exporter(config):
+    if isinstance(config, str):
+        return import_string(config)()
+
+    config = dict(config)
+    backend = import_string(config.pop('BACKEND'))
+    kwargs = {key.lower(): value for key, value in config.items()}
+    return backend(**kwargs)
+
+
+def _create_exporters():
+    configs = getattr(settings, 'ZOMBODB_METRICS_EXPORTERS', None) or ()
+    return tuple(_create_exporter(config) for config in configs)
+
+
+_exporters = LazySetting(['ZOMBODB_METRICS_EXPORTERS'], _create_exporters)
+
+
+def get_metrics_exporters():
+    """
+    Returns the tuple of exporters configured at ``settings.ZOMBODB_METRICS_EXPORTERS``.
+    Each item of the setting is the dotted path of an exporter class,
+    or a ``dict`` with the path at ``'BACKEND'`` and the exporter arguments.
+    """
+    return _exporters.get()
+
+
+def metrics_enabled():
+    return bool(get_metrics_exporters())
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    if not get_metrics_exporters():
+        return execute(sql, params, many, context)
+
+    kinds = get_zombodb_call_kinds(sql, params)
+    is_search = 'search' in kinds
+    ddl_kinds = [kind for kind in kinds if kind in DDL_KINDS]
+    if not is_search and not ddl_kinds:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        if is_search:
+            SEARCH_DURATION.observe(duration, table=get_search_table(sql))
+        for kind in ddl_kinds:
+            DDL_DURATION.observe(duration, operation=kind)
+
+
+def _install_execute_wrapper(connection):
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+@receiver(connection_created)
+def _on_connection_created(sender, connection, **kwargs):  # pylint: disable=unused-argument
+    # search and DDL statements are timed only while metrics are enabled,
+    # so there's no overhead on other statements otherwise
+    if get_metrics_exporters():
+        _install_execute_wrapper(connection)
+
+
+@receiver(setting_changed)
+def _install_execute_wrappers(**kwargs):
+    if kwargs['setting'] == 'ZOMBODB_METRICS_EXPORTERS':
+        if kwargs['value']:
+            for connection in connections.all():
+                _install_execute_wrapper(connection)
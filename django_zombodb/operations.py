@@ -1,7 +1,311 @@
+from collections import OrderedDict
+
 from django.contrib.postgres.operations import CreateExtension
+from django.db.migrations.operations.models import IndexOperation
+
+from django_zombodb.serializers import ES_JSON_SERIALIZER
+
+
+# ZomboDB index options that can be changed with ALTER INDEX ... SET,
+# without rebuilding the Elasticsearch index
+ONLINE_OPTIONS = (
+    'replicas',
+    'refresh_interval',
+    'bulk_concurrency',
+    'batch_size',
+    'compression_level',
+)
+# ZomboDB's default type_name
+DEFAULT_TYPE_NAME = 'doc'
 
 
 class ZomboDBExtension(CreateExtension):
 
     def __init__(self):
         self.name = 'zombodb'
+
+
+def _get_index(state, app_label, model_name, name):
+    model_state = state.models[app_label, model_name]
+    for index in model_state.options[IndexOperation.option_name]:
+        if index.name == name:
+            return index
+    raise ValueError("Model %s has no index named %r." % (model_state.name, name))
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return list(value)
+
+
+def _is_additive_mapping(old_mapping, new_mapping):
+    for key in set(old_mapping) | set(new_mapping):
+        old_value = old_mapping.get(key)
+        new_value = new_mapping.get(key)
+        if old_value == new_value:
+            continue
+        if key == 'copy_to':
+            if not set(_as_list(old_value)) <= set(_as_list(new_value)):
+                return False
+        elif key in ('fields', 'properties'):
+            old_value = old_value or {}
+            new_value = new_value or {}
+            for name, old_sub_mapping in old_value.items():
+                if name not in new_value:
+                    return False
+                if not _is_additive_mapping(old_sub_mapping, new_value[name]):
+                    return False
+        else:
+            return False
+    return True
+
+
+def get_field_mapping_changes(old_field_mapping, new_field_mapping, fields):
+    """
+    Returns a ``dict`` of the fields whose mapping changed between ``old_field_mapping``
+    and ``new_field_mapping``, with their new mappings, or ``None`` if a change isn't
+    additive and the index must be rebuilt. Additive changes are new ``copy_to``
+    targets, new sub-fields and object properties, and mappings of new fields that
+    aren't among the indexed ``fields``, like ``copy_to`` targets.
+    """
+    old_field_mapping = old_field_mapping or {}
+    new_field_mapping = new_field_mapping or {}
+    changes = {}
+    for field, old_mapping in old_field_mapping.items():
+        if field not in new_field_mapping:
+            return None
+        new_mapping = new_field_mapping[field]
+        if old_mapping == new_mapping:
+            continue
+        if not _is_additive_mapping(old_mapping, new_mapping):
+            return None
+        changes[field] = new_mapping
+    for field, new_mapping in new_field_mapping.items():
+        if field in old_field_mapping:
+            continue
+        if field in fields:
+            # the field was indexed with ZomboDB's default mapping
+            return None
+        changes[field] = new_mapping
+    return changes
+
+
+def get_index_changes(old_index, new_index):
+    """
+    Returns a ``dict`` of the :py:data:`ONLINE_OPTIONS` that differ between ``old_index``
+    and ``new_index``, with their new values, and the ``field_mapping`` changes
+    from :py:func:`get_field_mapping_changes`, or ``None`` if the index must be rebuilt.
+    """
+    old_path, old_args, old_kwargs = old_index.deconstruct()
+    new_path, new_args, new_kwargs = new_index.deconstruct()
+    for option in ONLINE_OPTIONS + ('field_mapping',):
+        old_kwargs.pop(option, None)
+        new_kwargs.pop(option, None)
+    if (old_path, old_args, old_kwargs) != (new_path, new_args, new_kwargs):
+        return None
+
+    field_mapping_changes = get_field_mapping_changes(
+        old_index.field_mapping, new_index.field_mapping, new_index.fields)
+    if field_mapping_changes is None:
+        return None
+    options = {
+        option: getattr(new_index, option)
+        for option in ONLINE_OPTIONS
+        if getattr(old_index, option) != getattr(new_index, option)
+    }
+    return options, field_mapping_changes
+
+
+class AlterZomboDBIndexOptions(IndexOperation):
+    """
+    Alters the :py:data:`ONLINE_OPTIONS` of a ZomboDB index with ``ALTER INDEX ... SET``,
+    without rebuilding it. ``options`` maps option names to their new values,
+    where ``None`` resets an option to the ZomboDB default.
+    """
+
+    def __init__(self, model_name, name, options):
+        unknown_options = sorted(set(options) - set(ONLINE_OPTIONS))
+        if unknown_options:
+            raise ValueError(
+                "Options %s can't be altered without rebuilding the index." % (
+                    ', '.join(unknown_options)))
+        self.model_name = model_name
+        self.name = name
+        self.options = options
+
+    def state_forwards(self, app_label, state):
+        model_state = state.models[app_label, self.model_name_lower]
+        old_index = _get_index(state, app_label, self.model_name_lower, self.name)
+        new_index = old_index.clone()
+        for option, value in self.options.items():
+            setattr(new_index, option, value)
+        model_state.options[self.option_name] = [
+            new_index if index is old_index else index
+            for index in model_state.options[self.option_name]
+        ]
+        state.reload_model(app_label, self.model_name_lower, delay=True)
+
+    def _alter_options(self, app_label, schema_editor, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        # the values of to_state are the new ones forwards and the old ones backwards
+        index = _get_index(to_state, app_label, self.model_name_lower, self.name)
+        options = {option: getattr(index, option) for option in self.options}
+        for sql in index.get_alter_options_sql(schema_editor.quote_name, options):
+            schema_editor.execute(sql)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        self._alter_options(app_label, schema_editor, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        self._alter_options(app_label, schema_editor, to_state)
+
+    def deconstruct(self):
+        kwargs = {
+            'model_name': self.model_name,
+            'name': self.name,
+            'options': self.options,
+        }
+        return (
+            self.__class__.__qualname__,
+            [],
+            kwargs,
+        )
+
+    def describe(self):
+        return 'Alter options %s of ZomboDB index %s of model %s' % (
+            ', '.join(sorted(self.options)),
+            self.name,
+            self.model_name,
+        )
+
+
+class AlterZomboDBFieldMapping(IndexOperation):
+    """
+    Applies additive changes of the ``field_mapping`` of a ZomboDB index in place,
+    without rebuilding it. ``field_mapping`` is the new mapping of the index.
+
+    Changed mappings are stored with ``zdb.define_field_mapping``, for future rebuilds,
+    and sent to the Elasticsearch index mapping. Then, only the documents with values
+    on fields whose mapping changed are reindexed, with ``_update_by_query``, to fill
+    their new ``copy_to`` targets and sub-fields. The reindex runs in the background,
+    as an Elasticsearch task, after the migration returns. Changes that aren't additive,
+    as defined by :py:func:`get_field_mapping_changes`, raise ``ValueError``.
+
+    Backwards, the old mappings are stored again with ``zdb.define_field_mapping``,
+    but the Elasticsearch index mapping keeps the new fields, since Elasticsearch
+    can't remove them without a rebuild.
+    """
+
+    def __init__(self, model_name, name, field_mapping):
+        self.model_name = model_name
+        self.name = name
+        self.field_mapping = field_mapping
+
+    def state_forwards(self, app_label, state):
+        model_state = state.models[app_label, self.model_name_lower]
+        old_index = _get_index(state, app_label, self.model_name_lower, self.name)
+        new_index = old_index.clone()
+        new_index.field_mapping = self.field_mapping
+        model_state.options[self.option_name] = [
+            new_index if index is old_index else index
+            for index in model_state.options[self.option_name]
+        ]
+        state.reload_model(app_label, self.model_name_lower, delay=True)
+
+    def _get_changes(self, app_label, from_state, to_state):
+        old_index = _get_index(from_state, app_label, self.model_name_lower, self.name)
+        new_index = _get_index(to_state, app_label, self.model_name_lower, self.name)
+        changes = get_field_mapping_changes(
+            old_index.field_mapping, new_index.field_mapping, new_index.fields)
+        if changes is None:
+            raise ValueError(
+                "The field_mapping changes of %s aren't additive, "
+                "please remove and add the index again instead." % self.name)
+        return old_index, new_index, changes
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        old_index, new_index, changes = self._get_changes(app_label, from_state, to_state)
+        if not changes:
+            return
+
+        table = schema_editor.quote_name(model._meta.db_table)
+        for field, mapping in sorted(changes.items()):
+            schema_editor.execute(
+                'SELECT zdb.define_field_mapping(%s, %s, %s)',
+                [table, field, ES_JSON_SERIALIZER.dumps(mapping)])
+
+        # the typed mapping endpoint of Elasticsearch 6, that rejects include_type_name before 6.7
+        type_name = new_index.type_name or DEFAULT_TYPE_NAME
+        schema_editor.execute(
+            "SELECT zdb.request(%s, %s, 'PUT', %s)",
+            [
+                new_index.name,
+                '_mapping/%s' % type_name,
+                ES_JSON_SERIALIZER.dumps({'properties': OrderedDict(sorted(changes.items()))}),
+            ])
+
+        # new fields are only filled by copy_to of fields that already had a mapping.
+        # The reindex runs as an Elasticsearch task, so the migration doesn't wait for it
+        old_field_mapping = old_index.field_mapping or {}
+        changed_fields = sorted(field for field in changes if field in old_field_mapping)
+        if changed_fields:
+            schema_editor.execute(
+                "SELECT zdb.request(%s, %s, 'POST', %s)",
+                [
+                    new_index.name,
+                    '_update_by_query?conflicts=proceed&wait_for_completion=false',
+                    ES_JSON_SERIALIZER.dumps({
+                        'query': {
+                            'bool': {
+                                'should': [
+                                    {'exists': {'field': field}} for field in changed_fields
+                                ],
+                                'minimum_should_match': 1,
+                            },
+                        },
+                    }),
+                ])
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        old_index, __, changes = self._get_changes(app_label, to_state, from_state)
+
+        table = schema_editor.quote_name(model._meta.db_table)
+        old_field_mapping = old_index.field_mapping or {}
+        for field in sorted(changes):
+            if field in old_field_mapping:
+                schema_editor.execute(
+                    'SELECT zdb.define_field_mapping(%s, %s, %s)',
+                    [table, field, ES_JSON_SERIALIZER.dumps(old_field_mapping[field])])
+            else:
+                schema_editor.execute(
+                    'DELETE FROM zdb.mappings WHERE table_name = %s::regclass AND field_name = %s',
+                    [table, field])
+
+    def deconstruct(self):
+        kwargs = {
+            'model_name': self.model_name,
+            'name': self.name,
+            'field_mapping': self.field_mapping,
+        }
+        return (
+            self.__class__.__qualname__,
+            [],
+            kwargs,
+        )
+
+    def describe(self):
+        return 'Alter field_mapping of ZomboDB index %s of model %s' % (
+            self.name,
+            self.model_name,
+        )
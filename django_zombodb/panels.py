@@ -0,0 +1,97 @@
+"""
+django-debug-toolbar panel that lists the ZomboDB calls of each request.
+Enable it by adding ``'django_zombodb.panels.ZomboDBPanel'``
+to the ``DEBUG_TOOLBAR_PANELS`` setting.
+"""
+import time
+from collections import OrderedDict
+from contextlib import ExitStack
+
+from django.db import connections
+from django.utils.translation import gettext_lazy as _
+from django.utils.translation import ngettext
+
+from debug_toolbar.panels import Panel
+
+from django_zombodb.statements import get_zombodb_call_kinds
+
+
+class ZomboDBPanel(Panel):
+    """
+    Lists the SQL statements with ZomboDB searches (``==>``), validations
+    (``zdb.request``), score annotations (``zdb.score``), ZomboDB index DDL
+    and other ``zdb`` functions, with their time and number of rows.
+    """
+    title = _('ZomboDB')
+    template = 'django_zombodb/debug_toolbar/panel.html'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._calls = []
+        self._exit_stack = None
+
+    @property
+    def nav_subtitle(self):
+        count = len(self._calls)
+        return ngettext(
+            '%(count)d call in %(time).2fms',
+            '%(count)d calls in %(time).2fms',
+            count) % {'count': count, 'time': self._get_total_time()}
+
+    def _get_total_time(self):
+        return sum(call['time'] for call in self._calls)
+
+    def enable_instrumentation(self):
+        self._exit_stack = ExitStack()
+        for alias in connections:
+            self._exit_stack.enter_context(
+                connections[alias].execute_wrapper(self._execute_wrapper))
+
+    def disable_instrumentation(self):
+        if self._exit_stack is not None:
+            self._exit_stack.close()
+            self._exit_stack = None
+
+    def _execute_wrapper(self, execute, sql, params, many, context):
+        kinds = get_zombodb_call_kinds(sql, params)
+        if not kinds:
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            self._record(kinds, sql, params, many, context, duration)
+
+    def _record(self, kinds, sql, params, many, context, duration):
+        connection = context['connection']
+        cursor = context['cursor']
+        try:
+            executed_sql = connection.ops.last_executed_query(cursor, sql, params)
+        except Exception:  # pylint: disable=broad-except
+            executed_sql = sql
+        executed_sql = executed_sql.strip()
+        # rowcount is unknown for server-side cursors and executemany
+        rows = cursor.rowcount if not many and cursor.rowcount >= 0 else None
+
+        self._calls.append({
+            'alias': connection.alias,
+            'kinds': kinds,
+            'sql': executed_sql,
+            'time': duration,
+            'rows': rows,
+        })
+
+    def generate_stats(self, request, response):
+        counts = OrderedDict()
+        for call in self._calls:
+            for kind in call['kinds']:
+                counts[kind] = counts.get(kind, 0) + 1
+
+        self.record_stats({
+            'calls': self._calls,
+            'counts': counts,
+            'total_calls': len(self._calls),
+            'total_time': self._get_total_time(),
+        })
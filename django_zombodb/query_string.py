@@ -0,0 +1,358 @@
+"""
+Local syntax check for the Elasticsearch query string syntax.
+
+Elasticsearch parses query strings with Lucene's classic ``QueryParser``.
+This module follows the same grammar, so queries that are certainly malformed
+(unbalanced quotes or parentheses, dangling operators, bad ranges...)
+can be rejected without a round trip to Elasticsearch.
+
+The check is conservative: queries that pass it may still be rejected by
+Elasticsearch (e.g. because of mappings), but queries that fail it would
+certainly be rejected by Elasticsearch too.
+"""
+
+_WHITESPACE = frozenset(' \t\n\r\u3000')
+_NON_TERM_START_CHARS = _WHITESPACE | frozenset('+-!():^[]"{}~*?\\/')
+_WILDCARD_CHARS = frozenset('*?')
+_DIGITS = frozenset('0123456789')
+
+# token kinds
+_AND = 'AND'
+_OR = 'OR'
+_NOT = 'NOT'
+_PLUS = 'PLUS'
+_MINUS = 'MINUS'
+_BAREOPER = 'BAREOPER'
+_LPAREN = 'LPAREN'
+_RPAREN = 'RPAREN'
+_COLON = 'COLON'
+_CARAT = 'CARAT'
+_FUZZY_SLOP = 'FUZZY_SLOP'
+_QUOTED = 'QUOTED'
+_TERM = 'TERM'
+_REGEXP = 'REGEXP'
+_RANGE = 'RANGE'
+_EOF = 'EOF'
+
+_KEYWORDS = {
+    'AND': _AND,
+    '&&': _AND,
+    'OR': _OR,
+    '||': _OR,
+    'NOT': _NOT,
+}
+_SINGLE_CHAR_TOKENS = {
+    '(': _LPAREN,
+    ')': _RPAREN,
+    ':': _COLON,
+}
+_MODIFIERS = frozenset([_PLUS, _MINUS, _NOT])
+_SIMPLE_TERMS = frozenset([_TERM, _REGEXP, _BAREOPER])
+
+
+class QueryStringSyntaxError(ValueError):
+    pass
+
+
+def _is_term_start_char(char):
+    return char not in _NON_TERM_START_CHARS
+
+
+def _is_term_char(char):
+    return _is_term_start_char(char) or char in '+-' or char in _WILDCARD_CHARS
+
+
+class _Lexer:
+
+    def __init__(self, query):
+        self.query = query
+        self.pos = 0
+        self.token_start = 0
+
+    def _error(self, message):
+        raise QueryStringSyntaxError(
+            "{message} at position {pos}".format(message=message, pos=self.pos))
+
+    def _peek(self, offset=0):
+        pos = self.pos + offset
+        if pos < len(self.query):
+            return self.query[pos]
+        return None
+
+    def _skip_whitespace(self):
+        while self._peek() is not None and self._peek() in _WHITESPACE:
+            self.pos += 1
+
+    def _read_escape(self):
+        if self._peek(1) is None:
+            self._error("Unfinished escape")
+        self.pos += 2
+
+    def _read_number(self):
+        start = self.pos
+        while self._peek() is not None and self._peek() in _DIGITS:
+            self.pos += 1
+        if self.pos > start and self._peek() == '.' and self._peek(1) in _DIGITS:
+            self.pos += 1
+            while self._peek() is not None and self._peek() in _DIGITS:
+                self.pos += 1
+        return self.pos > start
+
+    def _read_term(self):
+        start = self.pos
+        while self._peek() is not None:
+            char = self._peek()
+            if char == '\\':
+                self._read_escape()
+            elif _is_term_char(char):
+                self.pos += 1
+            else:
+                break
+        return self.query[start:self.pos]
+
+    def _read_quoted(self):
+        self.pos += 1
+        while True:
+            char = self._peek()
+            if char is None:
+                self._error("Unclosed quote")
+            elif char == '\\':
+                self._read_escape()
+            elif char == '"':
+                self.pos += 1
+                return
+            else:
+                self.pos += 1
+
+    def _read_regexp(self):
+        self.pos += 1
+        while True:
+            char = self._peek()
+            if char is None:
+                self._error("Unclosed regular expression")
+            elif char == '\\' and self._peek(1) == '/':
+                self.pos += 2
+            elif char == '/':
+                self.pos += 1
+                return
+            else:
+                self.pos += 1
+
+    def _read_range(self):
+        self.pos += 1
+        goops = []
+        while True:
+            self._skip_whitespace()
+            char = self._peek()
+            if char is None:
+                self._error("Unclosed range")
+            elif char in ']}':
+                self.pos += 1
+                break
+            elif char == '"':
+                self._read_quoted()
+                goops.append('"')
+            else:
+                start = self.pos
+                while self._peek() is not None and self._peek() not in _WHITESPACE \
+                        and self._peek() not in ']}':
+                    self.pos += 1
+                goops.append(self.query[start:self.pos])
+
+        # [lower TO upper] or [lower upper], where lower may also be "TO"
+        if len(goops) == 3 and goops[1] == 'TO':
+            return
+        if len(goops) != 2 or goops[1] == 'TO':
+            self._error("Malformed range")
+
+    def tokens(self):
+        while True:
+            self._skip_whitespace()
+            self.token_start = self.pos
+            char = self._peek()
+            if char is None:
+                yield _EOF
+                return
+
+            if char in _SINGLE_CHAR_TOKENS:
+                self.pos += 1
+                yield _SINGLE_CHAR_TOKENS[char]
+            elif char in '+-!':
+                next_char = self._peek(1)
+                if next_char is not None and next_char in _WHITESPACE:
+                    self.pos += 2
+                    yield _BAREOPER
+                else:
+                    self.pos += 1
+                    yield {'+': _PLUS, '-': _MINUS, '!': _NOT}[char]
+            elif char == '^':
+                self.pos += 1
+                if not self._read_number():
+                    self._error("Boost without a number")
+                yield _CARAT
+            elif char == '~':
+                self.pos += 1
+                self._read_number()
+                yield _FUZZY_SLOP
+            elif char == '"':
+                self._read_quoted()
+                yield _QUOTED
+            elif char == '/':
+                self._read_regexp()
+                yield _REGEXP
+            elif char in '[{':
+                self._read_range()
+                yield _RANGE
+            elif char == '\\' or _is_term_start_char(char) or char in _WILDCARD_CHARS:
+                term = self._read_term()
+                yield _KEYWORDS.get(term, _TERM)
+            else:  # pragma: no cover
+                self._error("Unexpected character")
+
+
+class _Parser:
+    """
+    Recursive descent parser for Lucene's classic query parser grammar:
+
+        Query  := Modifier? Clause ( Conjunction? Modifier? Clause )*
+        Clause := ( TERM COLON )? ( Term | LPAREN Query RPAREN Boost? )
+        Term   := ( TERM | REGEXP | BAREOPER ) FUZZY_SLOP? Boost? FUZZY_SLOP?
+                | RANGE Boost?
+                | QUOTED FUZZY_SLOP? Boost?
+    """
+
+    def __init__(self, query):
+        self.tokens = list(_Lexer(query).tokens())
+        self.pos = 0
+
+    @property
+    def current(self):
+        return self.tokens[self.pos]
+
+    def _next(self):
+        token = self.current
+        self.pos += 1
+        return token
+
+    def _accept(self, *kinds):
+        if self.current in kinds:
+            return self._next()
+        return None
+
+    def _error(self, message):
+        raise QueryStringSyntaxError(
+            "{message} at token {pos} ({token})".format(
+                message=message, pos=self.pos, token=self.current))
+
+    def parse(self):
+        self._query()
+        if self.current != _EOF:
+            self._error("Unexpected token")
+
+    def _query(self):
+        self._accept(*_MODIFIERS)
+        self._clause()
+        while self.current not in (_EOF, _RPAREN):
+            self._accept(_AND, _OR)
+            self._accept(*_MODIFIERS)
+            self._clause()
+
+    def _clause(self):
+        if self.current == _TERM and self.tokens[self.pos + 1] == _COLON:
+            self.pos += 2
+
+        if self._accept(_LPAREN):
+            self._query()
+            if not self._accept(_RPAREN):
+                self._error("Unclosed parenthesis")
+            self._accept(_CARAT)
+        else:
+            self._term()
+
+    def _term(self):
+        token = self._next()
+        if token in _SIMPLE_TERMS:
+            self._accept(_FUZZY_SLOP)
+            if self._accept(_CARAT):
+                self._accept(_FUZZY_SLOP)
+        elif token == _RANGE:
+            self._accept(_CARAT)
+        elif token == _QUOTED:
+            self._accept(_FUZZY_SLOP)
+            self._accept(_CARAT)
+        else:
+            self.pos -= 1
+            self._error("Expected a term")
+
+
+def check_query_string_syntax(query):
+    """
+    Raises :py:class:`QueryStringSyntaxError` if ``query`` is certainly
+    invalid on Elasticsearch's query string syntax.
+
+    Blank queries are not checked, it's up to Elasticsearch to decide
+    what to do with them.
+    """
+    if not query or not query.strip():
+        return
+    _Parser(query).parse()
+
+
+def validate_query_string_syntax(query):
+    """
+    Returns ``False`` if ``query`` is certainly invalid on Elasticsearch's
+    query string syntax, ``True`` otherwise.
+    """
+    try:
+        check_query_string_syntax(query)
+    except QueryStringSyntaxError:
+        return False
+    return True
+
+
+# tokens that replace their text on normalized queries
+_NORMALIZED_TEXTS = {
+    _AND: 'AND',
+    _OR: 'OR',
+    _QUOTED: '?',
+    _REGEXP: '?',
+    _RANGE: '?',
+    _CARAT: '^?',
+}
+_NO_SPACE_AFTER = frozenset([_LPAREN, _PLUS, _MINUS, _COLON])
+_NO_SPACE_BEFORE = frozenset([_RPAREN, _COLON, _CARAT, _FUZZY_SLOP])
+
+
+def normalize_query_string(query):
+    """
+    Returns ``query`` with its values replaced by ``?``, keeping field names,
+    operators and grouping, e.g. ``name:(pizza OR "fast food") AND stars:[4 TO 5]``
+    becomes ``name:(? OR ?) AND stars:?``. Queries that differ only by their
+    values have the same normalized query.
+
+    Returns ``query`` unchanged if it can't be tokenized.
+    """
+    lexer = _Lexer(query)
+    try:
+        tokens = [(kind, query[lexer.token_start:lexer.pos]) for kind in lexer.tokens()]
+    except QueryStringSyntaxError:
+        return query
+
+    parts = []
+    space_before = False
+    for position, (kind, text) in enumerate(tokens[:-1]):  # the last one is EOF
+        if kind == _TERM:
+            is_field = tokens[position + 1][0] == _COLON
+            text = text if is_field else '?'
+        elif kind == _FUZZY_SLOP:
+            text = '~' if text == '~' else '~?'
+        elif kind == _NOT:
+            text = '!' if text == '!' else 'NOT'
+        else:
+            text = _NORMALIZED_TEXTS.get(kind, text.strip())
+
+        if space_before and kind not in _NO_SPACE_BEFORE:
+            parts.append(' ')
+        parts.append(text)
+        space_before = kind not in _NO_SPACE_AFTER and text != '!'
+    return ''.join(parts)
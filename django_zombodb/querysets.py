@@ -1,43 +1,216 @@
-from django.db import connection, models
+import time
+from collections import namedtuple
+
+from django.db import NotSupportedError, connections, models
+from django.db.models import FloatField, Q
 from django.db.models.expressions import RawSQL
+from django.db.models.sql.datastructures import BaseTable
+from django.db.models.sql.where import AND, ExtraWhere
 
 from elasticsearch_dsl import Search
 
+from django_zombodb import metrics, tracing
+from django_zombodb.async_utils import AsyncChunkedIterator, db_sync_to_async
+from django_zombodb.caches import get_compiled_query_cache
 from django_zombodb.exceptions import InvalidElasticsearchQuery
-from django_zombodb.helpers import validate_query_dict, validate_query_string
+from django_zombodb.helpers import (
+    avalidate_query_dict, avalidate_query_string, get_zombodb_index_from_model, validate_query_dict,
+    validate_query_string
+)
+from django_zombodb.registry import registry
 from django_zombodb.serializers import ES_JSON_SERIALIZER
+from django_zombodb.slow_searches import get_slow_search_threshold, log_slow_search
+
+
+ZomboDBSearch = namedtuple('ZomboDBSearch', ['query_str', 'limit', 'query_type', 'sort'])
+
+# Elasticsearch's default index.max_result_window.
+# Deeper slices are done by Postgres, since Elasticsearch would refuse them
+ES_MAX_RESULT_WINDOW = 10000
+COUNT_ENDPOINT = '_count'
+
+
+def _compile_dict_query(query):
+    return ES_JSON_SERIALIZER.dumps(query)
+
+
+def _compile_dsl_query(query):
+    return ES_JSON_SERIALIZER.dumps(query.to_dict())
+
+
+def _compile_query(query, compile_fn, cache):
+    compiled_query_cache = get_compiled_query_cache() if cache else None
+    if compiled_query_cache is None:
+        return compile_fn(query)
+    return compiled_query_cache.get_or_compile(query, compile_fn)
+
+
+def _validate_query_dsl(model, query):
+    return validate_query_dict(model, query.to_dict())
+
+
+async def _avalidate_query_dsl(model, query):
+    return await avalidate_query_dict(model, query.to_dict())
+
+
+class ZomboDBScore(RawSQL):
+
+    def __init__(self, db_table):
+        # zdb.score returns real, cast to double precision like FloatField params,
+        # so filters on the score compare the exact values that were fetched
+        super().__init__(
+            'zdb.score(' + db_table + '."ctid")::float8', [], output_field=FloatField())
+
+
+class ZomboDBSearchWhere(ExtraWhere):
+    """
+    The ``table ==> query`` condition added by the search methods.
+    ``offset``, ``limit`` and ``sort`` are applied on Elasticsearch side,
+    through ZomboDB's DSL.
+    """
+
+    def __init__(self, db_table, query_str, limit=None, sort=None, offset=0):
+        super().__init__([], [])
+        self.db_table = db_table
+        self.query_str = query_str
+        self.limit = limit
+        self.sort = sort
+        self.offset = offset
+
+    def as_sql(self, compiler=None, connection=None):
+        sql = '%s'
+        params = [self.query_str]
+        if self.sort:
+            sql = 'dsl.sort_direct(%s, ' + sql + ')'
+            params.insert(0, ES_JSON_SERIALIZER.dumps(self.sort))
+        if self.offset and self.limit is not None:
+            sql = 'dsl.offset_limit(%s, %s, ' + sql + ')'
+            params[:0] = [self.offset, self.limit]
+        elif self.offset:
+            sql = 'dsl.offset(%s, ' + sql + ')'
+            params.insert(0, self.offset)
+        elif self.limit is not None:
+            sql = 'dsl.limit(%s, ' + sql + ')'
+            params.insert(0, self.limit)
+        return '(' + self.db_table + ' ==> ' + sql + ')', params
 
 
 class SearchQuerySetMixin:
+    _zombodb_searches = ()
+    _zombodb_estimate_count = False
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._zombodb_searches = self._zombodb_searches
+        clone._zombodb_estimate_count = self._zombodb_estimate_count
+        return clone
 
     def annotate_score(self, attr='zombodb_score'):
-        db_table = connection.ops.quote_name(self.model._meta.db_table)
+        db_table = registry.get(self.model).quoted_table
+        return self.annotate(**{attr: ZomboDBScore(db_table)})
+
+    def annotate_highlights(
+            self, fields, attr='zombodb_highlights', fragment_size=None,
+            number_of_fragments=None, pre_tags=None, post_tags=None):
+        """
+        Annotates each result with a ``dict`` of the search highlights of ``fields``,
+        like ``{'name': ['<em>Pizza</em> Hut']}``, using ``zdb.highlight``.
+        Highlights come in the same SQL query of the results.
+        """
+        db_table = registry.get(self.model).quoted_table
+        options = [
+            ('fragment_size', fragment_size),
+            ('number_of_fragments', number_of_fragments),
+            ('pre_tags', pre_tags),
+            ('post_tags', post_tags),
+        ]
+        options_sql = []
+        options_params = []
+        for option, value in options:
+            if value is not None:
+                options_sql.append(option + ' => %s')
+                options_params.append(value)
+        highlight_sql = 'zdb.highlight(' + ', '.join(options_sql) + ')'
+
+        field_sql = '%s::text, zdb.highlight(' + db_table + '."ctid", %s, ' + highlight_sql + ')'
+        sqls = []
+        params = []
+        for field in fields:
+            sqls.append(field_sql)
+            params.extend([field, field] + options_params)
         return self.annotate(**{
-            attr: RawSQL('zdb.score(' + db_table + '."ctid")', [])
+            attr: RawSQL('json_build_object(' + ', '.join(sqls) + ')', params)
         })
 
     def order_by_score(self, score_attr='zombodb_score'):
         return self.annotate_score(score_attr).order_by('-' + score_attr, 'pk')
 
-    def _search(self, query, query_str, validate, validate_fn, sort, score_attr, limit):
+    def search_iterator(self, chunk_size=2000, score_attr='zombodb_score'):
+        """
+        Iterates over the results ordered by score, like ``order_by_score``,
+        fetching ``chunk_size`` results at a time, in constant memory.
+
+        Uses a server-side cursor. If those are disabled on the database settings
+        (``DISABLE_SERVER_SIDE_CURSORS``), uses keyset pagination on (score, pk) instead.
+        Elasticsearch can't filter by score, so each chunk runs the whole search again
+        and Postgres skips the results of previous chunks. For N results that's N / chunk_size
+        searches of N hits each, so prefer a large ``chunk_size`` in that case.
+        """
+        queryset = self.order_by_score(score_attr=score_attr)
+        if not connections[self.db].settings_dict.get('DISABLE_SERVER_SIDE_CURSORS'):
+            yield from queryset.iterator(chunk_size=chunk_size)
+            return
+
+        chunk_queryset = queryset
+        while True:
+            # bypass the slice push down: Elasticsearch could break score ties
+            # differently than the pk, making the keyset skip rows
+            chunk = list(super(SearchQuerySetMixin, chunk_queryset).__getitem__(
+                slice(None, chunk_size)))
+            yield from chunk
+            if len(chunk) < chunk_size:
+                return
+
+            last_score = getattr(chunk[-1], score_attr)
+            after_last_score = Q(**{score_attr + '__lt': last_score})
+            after_last_pk = Q(**{score_attr: last_score, 'pk__gt': chunk[-1].pk})
+            chunk_queryset = queryset.filter(after_last_score | after_last_pk)
+
+    def asearch_iterator(self, chunk_size=2000, score_attr='zombodb_score'):
+        """
+        Async version of ``search_iterator``, for use with ``async for``.
+        Each chunk of ``chunk_size`` results is fetched in a single thread hop.
+        """
+        return AsyncChunkedIterator(
+            lambda: self.search_iterator(chunk_size=chunk_size, score_attr=score_attr),
+            chunk_size=chunk_size)
+
+    def __aiter__(self):
+        # all results are fetched in a single thread hop, like sync iteration does
+        return AsyncChunkedIterator(lambda: self)
+
+    def _search(
+            self, query, query_str, validate, validate_fn, sort, score_attr, limit, query_type):
+        if metrics.metrics_enabled():
+            model_label = self.model._meta.label
+            metrics.SEARCHES.inc(
+                model=model_label, query_type=query_type, limited=limit is not None)
+            if limit is not None:
+                metrics.SEARCH_LIMIT.observe(limit, model=model_label, query_type=query_type)
+
         if validate:
             is_valid = validate_fn(self.model, query)
             if not is_valid:
                 raise InvalidElasticsearchQuery(
                     "Invalid Elasticsearch query: {}".format(query_str))
 
-        if limit is not None:
-            queryset = self.extra(
-                where=[
-                    connection.ops.quote_name(self.model._meta.db_table) + ' ==> dsl.limit(%s, %s)'
-                ],
-                params=[limit, query_str],
-            )
-        else:
-            queryset = self.extra(
-                where=[connection.ops.quote_name(self.model._meta.db_table) + ' ==> %s'],
-                params=[query_str],
-            )
+        assert self.query.can_filter(), \
+            "Cannot change a query once a slice has been taken"
+        queryset = self._chain()
+        queryset.query.where.add(
+            ZomboDBSearchWhere(registry.get(self.model).quoted_table, query_str, limit=limit), AND)
+        queryset._zombodb_searches += (ZomboDBSearch(
+            query_str=query_str, limit=limit, query_type=query_type, sort=bool(sort)),)
         if sort:
             queryset = queryset.order_by_score(score_attr=score_attr)
 
@@ -54,11 +227,15 @@ class SearchQuerySetMixin:
             validate_fn=validate_query_string,
             sort=sort,
             score_attr=score_attr,
-            limit=limit)
+            limit=limit,
+            query_type='query_string')
 
     def dict_search(
-            self, query, validate=False, sort=False, score_attr='zombodb_score', limit=None):
-        query_str = ES_JSON_SERIALIZER.dumps(query)
+            self, query, validate=False, sort=False, score_attr='zombodb_score', limit=None,
+            cache=False):
+        # the structural key of a dict costs about the same as serializing it,
+        # so caching dicts is opt-in
+        query_str = _compile_query(query, _compile_dict_query, cache)
 
         return self._search(
             query=query,
@@ -67,23 +244,425 @@ class SearchQuerySetMixin:
             validate_fn=validate_query_dict,
             sort=sort,
             score_attr=score_attr,
-            limit=limit)
+            limit=limit,
+            query_type='dict')
 
     def dsl_search(
-            self, query, validate=False, sort=False, score_attr='zombodb_score', limit=None):
+            self, query, validate=False, sort=False, score_attr='zombodb_score', limit=None,
+            cache=True):
         if isinstance(query, Search):
             raise InvalidElasticsearchQuery(
                 "Do not use the `Search` class. "
                 "`query` must be an instance of a class inheriting from `DslBase`.")
 
-        query_dict = query.to_dict()
+        query_str = _compile_query(query, _compile_dsl_query, cache)
 
-        return self.dict_search(
-            query=query_dict,
+        return self._search(
+            query=query,
+            query_str=query_str,
             validate=validate,
+            validate_fn=_validate_query_dsl,
             sort=sort,
             score_attr=score_attr,
-            limit=limit)
+            limit=limit,
+            query_type='dsl')
+
+    async def _asearch(
+            self, query, query_str, validate, avalidate_fn, sort, score_attr, limit, query_type):
+        # only validation hits the database, the queryset itself is lazy
+        if validate:
+            is_valid = await avalidate_fn(self.model, query)
+            if not is_valid:
+                raise InvalidElasticsearchQuery(
+                    "Invalid Elasticsearch query: {}".format(query_str))
+
+        return self._search(
+            query=query,
+            query_str=query_str,
+            validate=False,
+            validate_fn=None,
+            sort=sort,
+            score_attr=score_attr,
+            limit=limit,
+            query_type=query_type)
+
+    async def aquery_string_search(
+            self, query, validate=False, sort=False, score_attr='zombodb_score', limit=None):
+        """
+        Async version of ``query_string_search``.
+        """
+        return await self._asearch(
+            query=query,
+            query_str=query,
+            validate=validate,
+            avalidate_fn=avalidate_query_string,
+            sort=sort,
+            score_attr=score_attr,
+            limit=limit,
+            query_type='query_string')
+
+    async def adict_search(
+            self, query, validate=False, sort=False, score_attr='zombodb_score', limit=None,
+            cache=False):
+        """
+        Async version of ``dict_search``.
+        """
+        return await self._asearch(
+            query=query,
+            query_str=_compile_query(query, _compile_dict_query, cache),
+            validate=validate,
+            avalidate_fn=avalidate_query_dict,
+            sort=sort,
+            score_attr=score_attr,
+            limit=limit,
+            query_type='dict')
+
+    async def adsl_search(
+            self, query, validate=False, sort=False, score_attr='zombodb_score', limit=None,
+            cache=True):
+        """
+        Async version of ``dsl_search``.
+        """
+        if isinstance(query, Search):
+            raise InvalidElasticsearchQuery(
+                "Do not use the `Search` class. "
+                "`query` must be an instance of a class inheriting from `DslBase`.")
+
+        return await self._asearch(
+            query=query,
+            query_str=_compile_query(query, _compile_dsl_query, cache),
+            validate=validate,
+            avalidate_fn=_avalidate_query_dsl,
+            sort=sort,
+            score_attr=score_attr,
+            limit=limit,
+            query_type='dsl')
+
+    def _get_search_query_sql(self):
+        if not self._zombodb_searches:
+            return 'dsl.match_all()', []
+
+        sqls = []
+        params = []
+        for search in self._zombodb_searches:
+            sqls.append('%s')
+            params.append(search.query_str)
+        if len(sqls) == 1:
+            return sqls[0], params
+        return 'dsl.and(' + ', '.join(sqls) + ')', params
+
+    def search_count(self, max_count=None):
+        """
+        Returns the number of rows matching the searches of this queryset,
+        counted by Elasticsearch with ``zdb.count``.
+        Unlike ``count``, rows aren't visited on Postgres side,
+        but filters other than the searches are ignored.
+
+        If ``max_count`` is set, the count is capped at ``max_count``.
+        That's useful for showing counts like "10,000+". Elasticsearch first counts
+        with the Count API ``terminate_after``, that stops at ``max_count`` matches
+        per shard, so it's faster for searches with many matches. ``max_count``
+        is returned only when that count stopped early, otherwise the exact
+        ``zdb.count`` is returned. Since the Count API skips ZomboDB's visibility
+        checks, rows deleted or updated but not vacuumed yet may make a count
+        just below ``max_count`` be reported as ``max_count``.
+        """
+        limits = [search.limit for search in self._zombodb_searches if search.limit is not None]
+        if limits and len(self._zombodb_searches) > 1:
+            raise NotSupportedError(
+                "search_count is not supported on querysets with "
+                "multiple searches when one of them has a limit.")
+
+        if max_count is not None:
+            limits.append(max_count)
+            response = self._capped_search_count(max_count)
+            if response['count'] >= max_count and response.get('terminated_early'):
+                return min(limits)
+        count = self._call_search_function(
+            'count', get_result_count=lambda rows: rows[0]['count'])[0]['count']
+        return min([count] + limits)
+
+    def _capped_search_count(self, max_count):
+        """
+        Counts the searches of this queryset with the Elasticsearch Count API,
+        stopping at ``max_count`` matches per shard. Returns the API response.
+        The count includes row versions that aren't visible, so it's only
+        reliable as a lower bound when counting stopped early.
+        """
+        index_name = get_zombodb_index_from_model(self.model).name
+        query_sql, query_params = self._get_search_query_sql()
+        sql = (
+            "SELECT zdb.request(%s::regclass, %s, 'POST', json_build_object("
+            "'query', zdb.dump_query(%s::regclass, " + query_sql + ")::json)::text) AS response")
+        params = [index_name, COUNT_ENDPOINT + '?terminate_after=%d' % max_count, index_name]
+        params.extend(query_params)
+
+        def get_result_count(rows):
+            return ES_JSON_SERIALIZER.loads(rows[0]['response'])['count']
+
+        rows = self._execute_search(
+            'count', get_result_count, self._fetch_search_function, sql, params)
+        return ES_JSON_SERIALIZER.loads(rows[0]['response'])
+
+    async def asearch_count(self, max_count=None):
+        """
+        Async version of ``search_count``.
+        """
+        return await db_sync_to_async(self.search_count)(max_count=max_count)
+
+    def _call_search_function(
+            self, function, args_before_query=(), args_after_query=(), get_result_count=len):
+        """
+        Calls a ZomboDB function that takes the index and the searches
+        of this queryset as arguments, e.g. ``zdb.count`` or ``zdb.terms``.
+        Returns the result rows as dicts.
+        """
+        index_name = get_zombodb_index_from_model(self.model).name
+        query_sql, query_params = self._get_search_query_sql()
+        args_sql = ['%s::regclass']
+        args_sql.extend(['%s'] * len(args_before_query))
+        args_sql.append(query_sql)
+        args_sql.extend(['%s'] * len(args_after_query))
+        params = [index_name] + list(args_before_query) + query_params + list(args_after_query)
+
+        return self._execute_search(
+            function, get_result_count, self._fetch_search_function,
+            'SELECT * FROM zdb.' + function + '(' + ', '.join(args_sql) + ')', params)
+
+    def _fetch_search_function(self, sql, params):
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(sql, params)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def search_aggregate(self, aggs):
+        """
+        Runs Elasticsearch aggregations over the searches of this queryset
+        with ``zdb.arbitrary_agg``. ``aggs`` is a ``dict`` of aggregation names to
+        Elasticsearch JSON aggregations (``dict``) or elasticsearch-dsl-py ``A`` objects.
+        Returns the aggregations results as a ``dict``.
+
+        Like all ``search_aggregate_*`` methods, filters other than the searches
+        and search limits are ignored.
+        """
+        agg_json = ES_JSON_SERIALIZER.dumps({
+            name: agg.to_dict() if hasattr(agg, 'to_dict') else agg
+            for name, agg in aggs.items()
+        })
+        result = self._call_search_function(
+            'arbitrary_agg', args_after_query=[agg_json])[0]['arbitrary_agg']
+        if isinstance(result, str):
+            result = ES_JSON_SERIALIZER.loads(result)
+        return result
+
+    def search_aggregate_terms(self, field, size=None, order_by='count'):
+        """
+        Returns the ``size`` most common terms of ``field`` among the search results,
+        as a list of ``{'term': ..., 'doc_count': ...}`` dicts.
+        ``order_by`` is one of ``'count'``, ``'term'``, ``'reverse_count'``
+        or ``'reverse_term'``.
+        """
+        if size is None:
+            size = 2147483647
+        return self._call_search_function(
+            'terms', args_before_query=[field], args_after_query=[size, order_by])
+
+    def search_aggregate_stats(self, field):
+        """
+        Returns a dict with ``count``, ``min``, ``max``, ``avg`` and ``sum``
+        of the numeric ``field`` among the search results.
+        """
+        return self._call_search_function('stats', args_before_query=[field])[0]
+
+    def search_aggregate_range(self, field, ranges):
+        """
+        Counts the search results by ranges of values of ``field``.
+        ``ranges`` is a list of Elasticsearch range dicts, like ``{'from': 10, 'to': 20}``.
+        Returns a list of ``{'key': ..., 'from': ..., 'to': ..., 'doc_count': ...}`` dicts.
+        """
+        return self._call_search_function(
+            'range',
+            args_before_query=[field],
+            args_after_query=[ES_JSON_SERIALIZER.dumps(ranges)])
+
+    def search_aggregate_date_histogram(self, field, interval, date_format='yyyy-MM-dd'):
+        """
+        Counts the search results by ``interval`` (e.g. ``'month'``) of the date ``field``.
+        ``date_format`` is the format of ``key_as_string``.
+        Returns a list of ``{'key': ..., 'key_as_string': ..., 'doc_count': ...}`` dicts.
+        """
+        return self._call_search_function(
+            'date_histogram',
+            args_before_query=[field],
+            args_after_query=[interval, date_format])
+
+    def estimated_count(self):
+        """
+        Returns the Postgres estimate for the number of rows in the model table,
+        ignoring all filters. Falls back to an exact count of all rows of the table,
+        also ignoring filters, if the table has no statistics yet.
+        """
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [registry.get(self.model).quoted_table])
+            estimate = cursor.fetchone()[0]
+        if estimate <= 0:
+            return self.model._base_manager.using(self.db).count()
+        return estimate
+
+    def _is_single_search(self):
+        # True if the rows of this queryset are exactly the matches of a single search,
+        # i.e. there are no other filters that Elasticsearch doesn't know about
+        if len(self._zombodb_searches) != 1:
+            return False
+
+        query = self.query
+        where_children = query.where.children
+        if len(where_children) != 1 or not isinstance(where_children[0], ZomboDBSearchWhere):
+            return False
+
+        return not any([
+            query.extra_tables,
+            query.distinct,
+            query.group_by is not None,
+            query.combinator is not None,
+            # joins, e.g. through a m2m or a reverse FK, can repeat matches
+            any(not isinstance(table, BaseTable) for table in query.alias_map.values()),
+        ])
+
+    def _can_search_count(self):
+        query = self.query
+        return self._is_single_search() and query.low_mark == 0 and query.high_mark is None
+
+    def _get_search_sort(self):
+        """
+        Translates the ordering of this queryset to an Elasticsearch sort.
+        Returns ``None`` if the ordering can't be done by Elasticsearch
+        in the same way Postgres does it.
+        """
+        query = self.query
+        if query.extra_order_by:
+            return None
+        if query.order_by:
+            ordering = query.order_by
+        elif query.default_ordering:
+            ordering = query.get_meta().ordering
+        else:
+            ordering = ()
+
+        sortable_fields = registry.get(self.model).sortable_fields
+        pk_names = ('pk', self.model._meta.pk.name)
+        sort = []
+        for position, item in enumerate(ordering):
+            if not isinstance(item, str) or item == '?':
+                return None
+
+            is_descending = item.startswith('-')
+            name = item[1:] if is_descending else item
+            order = 'desc' if is_descending else 'asc'
+            if isinstance(query.annotations.get(name), ZomboDBScore):
+                sort.append({'_score': {'order': order}})
+            elif name in sortable_fields:
+                # same as Postgres: nulls last on ascending order, first on descending
+                missing = '_first' if is_descending else '_last'
+                sort.append({name: {'order': order, 'missing': missing}})
+            elif name in pk_names and sort and position == len(ordering) - 1:
+                # pk as a tie-breaker: Elasticsearch breaks ties on its own
+                continue
+            else:
+                return None
+        return sort
+
+    def _push_down_slice(self, start, stop):
+        """
+        Returns a clone that makes Elasticsearch return only the matches
+        from ``start`` to ``stop``, already sorted, or ``None`` if that would
+        change the results.
+        """
+        if not self._is_single_search() or self._zombodb_searches[0].limit is not None:
+            return None
+        if self.query.low_mark != 0 or self.query.high_mark is not None:
+            return None
+        if stop > ES_MAX_RESULT_WINDOW:
+            return None
+
+        sort = self._get_search_sort()
+        if sort is None:
+            return None
+
+        queryset = self._chain()
+        search_where = queryset.query.where.children[0]
+        queryset.query.where.children[0] = ZomboDBSearchWhere(
+            search_where.db_table, search_where.query_str,
+            limit=stop - start, sort=sort, offset=start)
+        # only the page comes from Elasticsearch, so Postgres must not skip rows.
+        # The SQL LIMIT stays, so the queryset still can't be filtered
+        queryset.query.set_limits(0, stop - start)
+        return queryset
+
+    def __getitem__(self, k):
+        if isinstance(k, slice) and self._result_cache is None and k.step is None:
+            start = k.start or 0
+            stop = k.stop
+            if isinstance(start, int) and isinstance(stop, int) and 0 <= start < stop:
+                queryset = self._push_down_slice(start, stop)
+                if queryset is not None:
+                    return queryset
+        return super().__getitem__(k)
+
+    def _get_span_attributes(self, operation):
+        searches = self._zombodb_searches
+        limits = [search.limit for search in searches if search.limit is not None]
+        return {
+            'zombodb.operation': operation,
+            'zombodb.model': self.model._meta.label,
+            'zombodb.index': registry.get(self.model).index_name,
+            'zombodb.query_type': ','.join(search.query_type for search in searches),
+            'zombodb.searches': len(searches),
+            'zombodb.limit': min(limits) if limits else None,
+            'zombodb.sort': any(search.sort for search in searches),
+            'zombodb.score': any(
+                isinstance(annotation, ZomboDBScore)
+                for annotation in self.query.annotations.values()),
+        }
+
+    def _execute_search(self, operation, get_result_count, fn, *args):
+        """
+        Calls ``fn``, which runs the searches of this queryset, inside a tracing span.
+        If it takes longer than ``settings.ZOMBODB_SLOW_SEARCH_THRESHOLD``, logs it.
+        """
+        threshold = get_slow_search_threshold()
+        if not self._zombodb_searches or (threshold is None and not tracing.tracing_enabled()):
+            return fn(*args)
+
+        with tracing.start_span('zombodb.search', self._get_span_attributes(operation)) as span:
+            start = time.perf_counter()
+            result = fn(*args)
+            duration = time.perf_counter() - start
+            span.set_attribute('zombodb.result_count', get_result_count(result))
+
+        if threshold is not None and duration >= threshold:
+            log_slow_search(
+                self.model, registry.get(self.model).index_name,
+                self._zombodb_searches, duration, operation)
+        return result
+
+    def _fetch_all(self):
+        if self._result_cache is None:
+            self._execute_search(
+                'fetch', lambda __: len(self._result_cache), super()._fetch_all)
+        else:
+            super()._fetch_all()
+
+    def count(self):
+        if self._result_cache is None:
+            if self._can_search_count():
+                return self.search_count()
+            if self._zombodb_estimate_count and not self.query.where:
+                return self.estimated_count()
+            return self._execute_search('count', lambda count: count, super().count)
+        return super().count()
 
 
 class SearchQuerySet(SearchQuerySetMixin, models.QuerySet):
@@ -0,0 +1,96 @@
+from collections import namedtuple
+
+from django.db import connection
+
+from django_zombodb.indexes import ZomboDBIndex
+
+
+ZomboDBIndexInfo = namedtuple('ZomboDBIndexInfo', [
+    'index',  # None if the model has no ZomboDBIndex
+    'index_name',
+    'quoted_table',
+    'row_type',
+    'field_mapping',
+    'sortable_fields',  # fields Elasticsearch sorts in the same order as Postgres
+])
+
+# Elasticsearch types with the same sort order on Elasticsearch and Postgres.
+# keyword isn't here because Elasticsearch sorts it by code point,
+# ignoring the database collation
+SORTABLE_TYPES = frozenset([
+    'long', 'integer', 'short', 'byte',
+    'double', 'float', 'half_float', 'scaled_float',
+    'date', 'boolean',
+])
+# Django field types ZomboDB maps to one of SORTABLE_TYPES by default
+SORTABLE_INTERNAL_TYPES = frozenset([
+    'AutoField', 'BigAutoField',
+    'IntegerField', 'BigIntegerField', 'SmallIntegerField',
+    'PositiveIntegerField', 'PositiveSmallIntegerField',
+    'FloatField', 'DateField', 'DateTimeField', 'BooleanField',
+])
+
+
+def _get_sortable_fields(model, index):
+    field_mapping = index.field_mapping or {}
+    sortable_fields = set()
+    for field_name in index.fields:
+        if field_name in field_mapping:
+            is_sortable = field_mapping[field_name].get('type') in SORTABLE_TYPES
+        else:
+            internal_type = model._meta.get_field(field_name).get_internal_type()
+            is_sortable = internal_type in SORTABLE_INTERNAL_TYPES
+        if is_sortable:
+            sortable_fields.add(field_name)
+    return frozenset(sortable_fields)
+
+
+def _build_index_info(model):
+    quoted_table = connection.ops.quote_name(model._meta.db_table)
+    for index in model._meta.indexes:
+        if isinstance(index, ZomboDBIndex):
+            return ZomboDBIndexInfo(
+                index=index,
+                index_name=index.name,
+                quoted_table=quoted_table,
+                row_type=index._get_row_type_name(),
+                field_mapping=index.field_mapping or {},
+                sortable_fields=_get_sortable_fields(model, index))
+
+    return ZomboDBIndexInfo(
+        index=None,
+        index_name=None,
+        quoted_table=quoted_table,
+        row_type=None,
+        field_mapping={},
+        sortable_fields=frozenset())
+
+
+class ZomboDBIndexRegistry:
+    """
+    Holds a :py:class:`ZomboDBIndexInfo` per model, so the search and
+    validation code doesn't need to look for the index on every call.
+
+    Populated by :py:meth:`DjangoZomboDBConfig.ready`.
+    Models not seen there (e.g. when ``django_zombodb`` isn't on ``INSTALLED_APPS``)
+    are added on first use.
+    """
+
+    def __init__(self):
+        self._infos = {}
+
+    def populate(self, models):
+        self._infos = {model: _build_index_info(model) for model in models}
+
+    def get(self, model):
+        try:
+            return self._infos[model]
+        except KeyError:
+            info = self._infos[model] = _build_index_info(model)
+            return info
+
+    def clear(self):
+        self._infos = {}
+
+
+registry = ZomboDBIndexRegistry()
@@ -1,4 +1,99 @@
+import math
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+from elasticsearch.exceptions import SerializationError
 from elasticsearch.serializer import JSONSerializer
 
+from django_zombodb.lazy_settings import LazySetting
+
+
+DEFAULT_JSON_SERIALIZER = 'elasticsearch.serializer.JSONSerializer'
+
+
+def _has_non_finite_float(data):
+    if isinstance(data, float):
+        return math.isinf(data) or math.isnan(data)
+    if isinstance(data, dict):
+        return any(_has_non_finite_float(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(_has_non_finite_float(item) for item in data)
+    return False
+
+
+class OrjsonSerializer(JSONSerializer):
+    """
+    Output equivalent to elasticsearch-py's ``JSONSerializer`` for the supported types,
+    but much faster, through `orjson <https://github.com/ijl/orjson>`_.
+
+    Dates, times, decimals and UUIDs are serialized by ``JSONSerializer.default``,
+    so their output is identical. Floats are the same numbers, but may be formatted
+    differently, e.g. ``1e-05`` is written as ``0.00001``. Data orjson can't handle
+    (e.g. integers larger than 64 bits), and NaN and infinite floats, that orjson
+    would write as ``null``, fall back to ``JSONSerializer``.
+    """
+
+    def __init__(self):
+        try:
+            import orjson
+        except ImportError:
+            raise ImproperlyConfigured(
+                "OrjsonSerializer requires orjson. "
+                "Please install it with `pip install django-zombodb[orjson]`.")
+
+        self._orjson = orjson
+        self._options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def loads(self, s):
+        try:
+            return self._orjson.loads(s)
+        except self._orjson.JSONDecodeError as e:
+            raise SerializationError(s, e)
+
+    def dumps(self, data):
+        # don't serialize strings
+        if isinstance(data, str):
+            return data
+
+        try:
+            output = self._orjson.dumps(data, default=self.default, option=self._options)
+        except self._orjson.JSONEncodeError:
+            return super().dumps(data)
+        if b'null' in output and _has_non_finite_float(data):
+            return super().dumps(data)
+        return output.decode('utf-8')
+
+
+def _create_json_serializer():
+    serializer_path = getattr(settings, 'ZOMBODB_JSON_SERIALIZER', None) or DEFAULT_JSON_SERIALIZER
+    return import_string(serializer_path)()
+
+
+_json_serializer = LazySetting(['ZOMBODB_JSON_SERIALIZER'], _create_json_serializer)
+
+
+def get_json_serializer():
+    """
+    Returns the serializer configured at ``settings.ZOMBODB_JSON_SERIALIZER``,
+    the dotted path of a class with elasticsearch-py's ``JSONSerializer`` interface.
+    Defaults to ``JSONSerializer``.
+    """
+    return _json_serializer.get()
+
+
+class _ConfiguredJSONSerializer:
+    """
+    Delegates to the serializer returned by :py:func:`get_json_serializer`,
+    so the setting is read only when JSON is first needed.
+    """
+
+    def dumps(self, data):
+        return get_json_serializer().dumps(data)
+
+    def loads(self, s):
+        return get_json_serializer().loads(s)
+
 
-ES_JSON_SERIALIZER = JSONSerializer()
+ES_JSON_SERIALIZER = _ConfiguredJSONSerializer()
@@ -0,0 +1,150 @@
+"""
+Logs searches and validations slower than ``settings.ZOMBODB_SLOW_SEARCH_THRESHOLD``,
+in seconds, to the ``django_zombodb.slow_searches`` logger.
+
+Queries are logged normalized, with their values replaced by ``?``, and with a
+fingerprint of the normalized query, so the same kind of slow search can be
+grouped no matter the values. Values are also kept out of logs that way.
+"""
+import hashlib
+import logging
+import os
+import sys
+
+import django
+from django.conf import settings
+
+from django_zombodb.lazy_settings import LazySetting
+from django_zombodb.query_string import normalize_query_string
+from django_zombodb.serializers import ES_JSON_SERIALIZER
+
+
+logger = logging.getLogger(__name__)
+
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def _normalize_json(value):
+    if isinstance(value, dict):
+        normalized = {}
+        for key, item in value.items():
+            if key == 'query_string' and isinstance(item, dict) and \
+                    isinstance(item.get('query'), str):
+                item = dict(_normalize_json(item), query=normalize_query_string(item['query']))
+            else:
+                item = _normalize_json(item)
+            normalized[key] = item
+        return normalized
+    if isinstance(value, list):
+        if all(isinstance(item, _SCALAR_TYPES) for item in value):
+            # lists of values, like on "terms" queries, may have any length
+            return ['?']
+        return [_normalize_json(item) for item in value]
+    return '?'
+
+
+def normalize_query(query_str, query_type):
+    """
+    Returns ``query_str`` with its values replaced by ``?``.
+    ``query_type`` is ``'query_string'`` for query strings, or ``'dict'``, ``'dsl'``
+    or ``'validation'`` for JSON queries.
+    """
+    if query_type == 'query_string':
+        return normalize_query_string(query_str)
+
+    try:
+        query = ES_JSON_SERIALIZER.loads(query_str)
+    except Exception:  # pylint: disable=broad-except
+        return query_str
+    return ES_JSON_SERIALIZER.dumps(_normalize_json(query))
+
+
+def get_query_fingerprint(normalized_query):
+    return hashlib.sha1(normalized_query.encode('utf-8')).hexdigest()[:16]
+
+
+def _get_ignored_dirs():
+    modules = [sys.modules[__name__.split('.')[0]], django]
+    try:
+        import asgiref
+        modules.append(asgiref)
+    except ImportError:
+        pass
+    return tuple(os.path.dirname(os.path.abspath(module.__file__)) + os.sep for module in modules)
+
+
+def get_calling_site():
+    """
+    Returns the first frame of the call stack outside of django-zombodb, Django
+    and asgiref, formatted as ``'path/to/file.py:42 in function'``, or ``None``.
+    """
+    ignored_dirs = _get_ignored_dirs()
+    frame = sys._getframe(1)  # pylint: disable=protected-access
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not os.path.abspath(filename).startswith(ignored_dirs):
+            return '{filename}:{lineno} in {function}'.format(
+                filename=filename, lineno=frame.f_lineno, function=frame.f_code.co_name)
+        frame = frame.f_back
+    return None
+
+
+_threshold = LazySetting(
+    ['ZOMBODB_SLOW_SEARCH_THRESHOLD'],
+    lambda: getattr(settings, 'ZOMBODB_SLOW_SEARCH_THRESHOLD', None))
+
+
+def get_slow_search_threshold():
+    """
+    Returns ``settings.ZOMBODB_SLOW_SEARCH_THRESHOLD``, in seconds,
+    or ``None`` if slow searches aren't logged.
+    """
+    return _threshold.get()
+
+
+def _log(message, info):
+    info['calling_site'] = get_calling_site()
+    logger.warning(
+        message + " took %(elapsed_ms).1fms: %(query)s "
+        "(fingerprint=%(fingerprint)s limit=%(limit)s sort=%(sort)s) at %(calling_site)s",
+        info, extra={'zombodb': info})
+
+
+def log_slow_search(model, index_name, searches, elapsed, operation):
+    """
+    Logs the ``searches`` of a queryset that took ``elapsed`` seconds
+    on ``operation``, like ``'fetch'`` or ``'count'``.
+    """
+    normalized_queries = [
+        normalize_query(search.query_str, search.query_type) for search in searches]
+    normalized_query = ' AND '.join(normalized_queries)
+    limits = [search.limit for search in searches if search.limit is not None]
+    _log("Slow ZomboDB search %(operation)s on %(model)s (index %(index)s)", {
+        'operation': operation,
+        'model': model._meta.label,
+        'index': index_name,
+        'query_type': ','.join(search.query_type for search in searches),
+        'query': normalized_query,
+        'fingerprint': get_query_fingerprint(normalized_query),
+        'limit': min(limits) if limits else None,
+        'sort': any(search.sort for search in searches),
+        'elapsed_ms': elapsed * 1000,
+    })
+
+
+def log_slow_validation(index_name, post_data, elapsed):
+    """
+    Logs a validation of ``post_data`` that took ``elapsed`` seconds.
+    """
+    normalized_query = normalize_query(post_data, 'validation')
+    _log("Slow ZomboDB validation on index %(index)s", {
+        'operation': 'validation',
+        'model': None,
+        'index': index_name,
+        'query_type': 'validation',
+        'query': normalized_query,
+        'fingerprint': get_query_fingerprint(normalized_query),
+        'limit': None,
+        'sort': False,
+        'elapsed_ms': elapsed * 1000,
+    })
@@ -0,0 +1,57 @@
+"""
+Inspection of the SQL statements django-zombodb sends to ZomboDB,
+used by the debug toolbar panel and the metrics.
+"""
+import re
+from collections import OrderedDict
+
+
+VALIDATION_ENDPOINT = '_validate/query'
+
+_SEARCH_RE = re.compile(r'"([^"]+)"\s==>\s')
+_ZDB_FUNCTION_RE = re.compile(r'\bzdb\.(\w+)\(')
+_CREATE_INDEX_RE = re.compile(r'\bCREATE INDEX\b[^;]*\bUSING zombodb\b', re.IGNORECASE)
+# ZomboDBIndex.remove_sql drops the row type with the index
+_DROP_INDEX_RE = re.compile(r'\bDROP TYPE IF EXISTS\b[^;]*_row_type\b', re.IGNORECASE)
+_INDEX_NAME_RE = re.compile(
+    r'\b(?:CREATE INDEX|DROP INDEX(?: IF EXISTS)?)\s+"?([^"\s]+)"?', re.IGNORECASE)
+
+
+def get_zombodb_call_kinds(sql, params):
+    """
+    Returns the kinds of ZomboDB calls of a SQL statement, like
+    ``['search', 'score']``, or an empty list if it doesn't call ZomboDB.
+    Kinds are ``'search'`` for the ``==>`` operator, ``'create_index'`` and
+    ``'drop_index'`` for ZomboDB index DDL, ``'validation'`` for ``zdb.request``
+    calls to the Validate API, and the function name for other ``zdb`` functions.
+    """
+    kinds = []
+    if _SEARCH_RE.search(sql):
+        kinds.append('search')
+    if _CREATE_INDEX_RE.search(sql):
+        kinds.append('create_index')
+    if _DROP_INDEX_RE.search(sql):
+        kinds.append('drop_index')
+    for function in OrderedDict.fromkeys(_ZDB_FUNCTION_RE.findall(sql)):
+        if function == 'request' and isinstance(params, dict) and \
+                params.get('endpoint') == VALIDATION_ENDPOINT:
+            function = 'validation'
+        kinds.append(function)
+    return kinds
+
+
+def get_search_table(sql):
+    """
+    Returns the name of the table searched by a SQL statement
+    with the ``==>`` operator, or ``None``.
+    """
+    match = _SEARCH_RE.search(sql)
+    return match.group(1) if match else None
+
+
+def get_ddl_index_name(sql):
+    """
+    Returns the name of the index created or dropped by a SQL statement, or ``None``.
+    """
+    match = _INDEX_NAME_RE.search(sql)
+    return match.group(1) if match else None
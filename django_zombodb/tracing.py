@@ -0,0 +1,89 @@
+"""
+OpenTelemetry spans of searches, validations, admin searches and ZomboDB index DDL.
+
+Spans are emitted only if ``opentelemetry-api`` is installed, otherwise
+tracing is a no-op. Spans go to the tracer provider configured by the
+application, like any other OpenTelemetry instrumentation.
+"""
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from django_zombodb import __version__
+from django_zombodb.statements import get_ddl_index_name, get_zombodb_call_kinds
+
+
+try:
+    from opentelemetry import trace
+except ImportError:
+    trace = None
+
+
+DDL_KINDS = ('create_index', 'drop_index')
+
+
+class _NoOpSpan:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+
+_NO_OP_SPAN = _NoOpSpan()
+
+if trace is not None:
+    _tracer = trace.get_tracer(__name__.split('.')[0], __version__)
+else:
+    _tracer = None
+
+
+def tracing_enabled():
+    return _tracer is not None
+
+
+def start_span(name, attributes):
+    """
+    Returns a context manager that starts a client span named ``name`` as the
+    current span, with ``attributes`` whose values aren't ``None``. The span
+    has a ``set_attribute`` method for attributes known only at the end,
+    like the number of results.
+    """
+    if _tracer is None:
+        return _NO_OP_SPAN
+
+    attributes = {key: value for key, value in attributes.items() if value is not None}
+    attributes['db.system'] = 'postgresql'
+    return _tracer.start_as_current_span(
+        name, kind=trace.SpanKind.CLIENT, attributes=attributes)
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    # DDL statements are the only ones traced here, searches and validations
+    # are traced where the model and the query are known
+    if 'zombodb' not in sql and '_row_type' not in sql:
+        return execute(sql, params, many, context)
+
+    ddl_kinds = [kind for kind in get_zombodb_call_kinds(sql, params) if kind in DDL_KINDS]
+    if not ddl_kinds:
+        return execute(sql, params, many, context)
+
+    with start_span('zombodb.' + ddl_kinds[0], {
+        'zombodb.operation': ddl_kinds[0],
+        'zombodb.index': get_ddl_index_name(sql),
+    }):
+        return execute(sql, params, many, context)
+
+
+def _install_execute_wrapper(connection):
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+@receiver(connection_created)
+def _on_connection_created(sender, connection, **kwargs):  # pylint: disable=unused-argument
+    if tracing_enabled():
+        _install_execute_wrapper(connection)
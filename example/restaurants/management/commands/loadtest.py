@@ -0,0 +1,248 @@
+import bisect
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from elasticsearch_dsl import Q as ElasticsearchQ
+
+from restaurants.models import Restaurant
+
+
+REPOSITORY_DIR = os.path.dirname(settings.BASE_DIR)
+DEFAULT_ZDB_STUB_PATH = os.path.join(REPOSITORY_DIR, 'benchmarks', 'zdb_stub.sql')
+TERMS = [
+    'pizza', 'sushi', 'coffee', 'burger', 'thai', 'bbq', 'bakery',
+    'steak', 'chinese', 'tacos', 'grill', 'deli', 'seafood', 'cafe',
+]
+SEARCH_KINDS = ('query_string', 'dict', 'dsl')
+
+
+def _search_query_string(term, sort):
+    return Restaurant.objects.query_string_search(
+        'name:{term} OR categories:{term}'.format(term=term), validate=True, sort=sort)
+
+
+def _search_dict(term, sort):
+    return Restaurant.objects.dict_search({
+        'bool': {
+            'should': [
+                {'match': {'name': term}},
+                {'match': {'categories': term}},
+            ],
+        },
+    }, validate=True, sort=sort)
+
+
+def _search_dsl(term, sort):
+    query = ElasticsearchQ('match', name=term) | ElasticsearchQ('match', categories=term)
+    return Restaurant.objects.dsl_search(query, validate=True, sort=sort)
+
+
+SEARCH_FUNCTIONS = {
+    'query_string': _search_query_string,
+    'dict': _search_dict,
+    'dsl': _search_dsl,
+}
+
+
+def _run_worker(worker_id, mix, duration, limit, sort):
+    """
+    Runs searches for ``duration`` seconds. Returns a dict of search kind
+    to the list of latencies, in seconds, and the number of errors.
+    """
+    rng = random.Random(worker_id)
+    kinds = list(mix)
+    cumulative_weights = list(itertools.accumulate(mix[kind] for kind in kinds))
+    latencies = defaultdict(list)
+    errors = 0
+
+    deadline = time.perf_counter() + duration
+    try:
+        while time.perf_counter() < deadline:
+            kind = kinds[bisect.bisect(
+                cumulative_weights, rng.random() * cumulative_weights[-1])]
+            term = rng.choice(TERMS)
+            start = time.perf_counter()
+            try:
+                list(SEARCH_FUNCTIONS[kind](term, sort)[:limit])
+            except Exception:  # pylint: disable=broad-except
+                errors += 1
+                continue
+            latencies[kind].append(time.perf_counter() - start)
+    finally:
+        connection.close()
+
+    return dict(latencies), errors
+
+
+def _percentile(sorted_values, percent):
+    # nearest-rank percentile
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(percent / 100.0 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+def _summarize(latencies, elapsed):
+    sorted_latencies = sorted(latencies)
+    summary = {'count': len(sorted_latencies), 'qps': len(sorted_latencies) / elapsed}
+    for percent in (50, 95, 99):
+        value = _percentile(sorted_latencies, percent)
+        summary['p{}_ms'.format(percent)] = value * 1000 if value is not None else None
+    return summary
+
+
+def _parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        kind, __, weight = item.partition('=')
+        kind = kind.strip()
+        if kind not in SEARCH_KINDS:
+            raise CommandError(
+                "Unknown search kind {!r} on --mix. Use {}.".format(kind, ', '.join(SEARCH_KINDS)))
+        try:
+            mix[kind] = float(weight) if weight else 1.0
+        except ValueError:
+            raise CommandError("Invalid weight {!r} on --mix.".format(weight))
+    if not any(mix.values()):
+        raise CommandError("At least one search kind on --mix needs a positive weight.")
+    return mix
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs concurrent searches on Restaurant for a while and reports '
+        'latency percentiles and queries per second.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Number of concurrent workers. Default: %(default)s')
+        parser.add_argument(
+            '--processes', action='store_true',
+            help='Use processes instead of threads for workers.')
+        parser.add_argument(
+            '--duration', type=float, default=10.0,
+            help='Duration of the test, in seconds. Default: %(default)s')
+        parser.add_argument(
+            '--mix', default='query_string=1,dict=1,dsl=1',
+            help='Weights of each search kind. Default: %(default)s')
+        parser.add_argument(
+            '--limit', type=int, default=50,
+            help='Number of results fetched by each search. Default: %(default)s')
+        parser.add_argument(
+            '--no-sort', action='store_false', dest='sort',
+            help="Don't sort results by score.")
+        parser.add_argument(
+            '--zdb-stub', nargs='?', const=DEFAULT_ZDB_STUB_PATH, default=None,
+            help=(
+                'Run against a stand-in zdb schema on a plain PostgreSQL, '
+                'without ZomboDB and Elasticsearch. Optionally takes the path of the '
+                'stub SQL file. Default: benchmarks/zdb_stub.sql of the repository.'))
+        parser.add_argument(
+            '--output',
+            help='Path of a JSON file to write the results to.')
+
+    def _setup_zdb_stub(self, stub_path):
+        # the stub helpers are shared with the benchmarks of the repository
+        if REPOSITORY_DIR not in sys.path:
+            sys.path.append(REPOSITORY_DIR)
+        from benchmarks.database import create_model_table, install_zdb_stub
+
+        install_zdb_stub(stub_path)
+        create_model_table(Restaurant)
+
+        if not Restaurant.objects.exists():
+            call_command('filldata', stdout=self.stdout)
+
+    def handle(self, *args, **options):
+        mix = _parse_mix(options['mix'])
+        if options['workers'] < 1:
+            raise CommandError("--workers must be at least 1.")
+        if settings.DEBUG:
+            self.stderr.write(self.style.WARNING(
+                "DEBUG is True, so Django records every query. "
+                "Results are more realistic with DEBUG=False."))
+
+        if options['zdb_stub']:
+            self._setup_zdb_stub(options['zdb_stub'])
+
+        worker_args = [
+            (worker_id, mix, options['duration'], options['limit'], options['sort'])
+            for worker_id in range(options['workers'])
+        ]
+        if options['processes']:
+            # forked workers must not share the parent connection
+            connections.close_all()
+            executor = ProcessPoolExecutor(
+                max_workers=options['workers'], mp_context=get_context('fork'))
+        else:
+            executor = ThreadPoolExecutor(max_workers=options['workers'])
+
+        self.stdout.write("Running {workers} {kind} for {duration}s...".format(
+            workers=options['workers'],
+            kind='processes' if options['processes'] else 'threads',
+            duration=options['duration']))
+        start = time.perf_counter()
+        with executor:
+            futures = [executor.submit(_run_worker, *args) for args in worker_args]
+            results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+
+        latencies_by_kind = defaultdict(list)
+        errors = 0
+        for worker_latencies, worker_errors in results:
+            errors += worker_errors
+            for kind, latencies in worker_latencies.items():
+                latencies_by_kind[kind].extend(latencies)
+        all_latencies = [
+            latency for latencies in latencies_by_kind.values() for latency in latencies]
+
+        report = {
+            'workers': options['workers'],
+            'processes': options['processes'],
+            'duration_s': elapsed,
+            'mix': mix,
+            'limit': options['limit'],
+            'sort': options['sort'],
+            'zdb_stub': bool(options['zdb_stub']),
+            'errors': errors,
+            'total': _summarize(all_latencies, elapsed),
+            'by_kind': {
+                kind: _summarize(latencies, elapsed)
+                for kind, latencies in sorted(latencies_by_kind.items())
+            },
+        }
+        self._write_report(report)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump(report, output_file, indent=2)
+
+    def _write_report(self, report):
+        row = '{:<14} {:>8} {:>10} {:>10} {:>10} {:>10}'
+        self.stdout.write(row.format('search', 'count', 'qps', 'p50 ms', 'p95 ms', 'p99 ms'))
+        rows = sorted(report['by_kind'].items()) + [('total', report['total'])]
+        for name, summary in rows:
+            if not summary['count']:
+                self.stdout.write(row.format(name, 0, '-', '-', '-', '-'))
+                continue
+            self.stdout.write(row.format(
+                name, summary['count'], '{:.1f}'.format(summary['qps']),
+                '{:.2f}'.format(summary['p50_ms']),
+                '{:.2f}'.format(summary['p95_ms']),
+                '{:.2f}'.format(summary['p99_ms'])))
+        if report['errors']:
+            self.stdout.write(self.style.ERROR('{} searches failed'.format(report['errors'])))
+        else:
+            self.stdout.write(self.style.SUCCESS('No searches failed'))
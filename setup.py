@@ -55,6 +55,8 @@ setup(
     url='https://github.com/vintasoftware/django-zombodb',
     packages=[
         'django_zombodb',
+        'django_zombodb.management',
+        'django_zombodb.management.commands',
     ],
     include_package_data=True,
     install_requires=[
@@ -62,6 +64,12 @@ setup(
         'elasticsearch>=6.3.1',
         'psycopg2>=2.7.7',
     ],
+    extras_require={
+        'async': ['asgiref>=3.2'],
+        'orjson': ['orjson>=3.0'],
+        'prometheus': ['prometheus_client>=0.4'],
+        'opentelemetry': ['opentelemetry-api>=1.0'],
+    },
     zip_safe=False,
     keywords='django-zombodb',
     classifiers=[
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.28 on 2026-10-18 08:51
+
+from django.db import migrations, models
+import django_zombodb.indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0002_datetimearraymodel_integerarraymodel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Book',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.TextField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=django_zombodb.indexes.ZomboDBIndex(fields=['title'], name='tests_book_title_8518ec_zombodb'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.28 on 2026-10-18 09:10
+
+from django.db import migrations, models
+import django_zombodb.indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0004_review'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Article',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.TextField()),
+                ('rating', models.IntegerField()),
+                ('published', models.DateField(null=True)),
+                ('tag', models.TextField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=django_zombodb.indexes.ZomboDBIndex(field_mapping={'tag': {'type': 'keyword'}}, fields=['title', 'rating', 'published', 'tag'], name='tests_artic_title_086a1c_zombodb'),
+        ),
+    ]
@@ -1,6 +1,9 @@
 from django.contrib.postgres.fields import ArrayField
 from django.db import models
 
+from django_zombodb.indexes import ZomboDBIndex
+from django_zombodb.querysets import SearchQuerySet
+
 
 class IntegerArrayModel(models.Model):
     field = ArrayField(models.IntegerField(), default=list, blank=True)
@@ -10,3 +13,37 @@ class DateTimeArrayModel(models.Model):
     datetimes = ArrayField(models.DateTimeField())
     dates = ArrayField(models.DateField())
     times = ArrayField(models.TimeField())
+
+
+class Book(models.Model):
+    title = models.TextField()
+
+    objects = models.Manager.from_queryset(SearchQuerySet)()
+
+    class Meta:
+        indexes = [
+            ZomboDBIndex(fields=['title']),
+        ]
+
+
+class Review(models.Model):
+    restaurant = models.ForeignKey(
+        'restaurants.Restaurant', related_name='reviews', on_delete=models.CASCADE)
+    text = models.TextField()
+
+
+class Article(models.Model):
+    title = models.TextField()
+    rating = models.IntegerField()
+    published = models.DateField(null=True)
+    tag = models.TextField()
+
+    objects = models.Manager.from_queryset(SearchQuerySet)()
+
+    class Meta:
+        indexes = [
+            ZomboDBIndex(
+                fields=['title', 'rating', 'published', 'tag'],
+                field_mapping={'tag': {'type': 'keyword'}},
+            ),
+        ]
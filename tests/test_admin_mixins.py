@@ -1,10 +1,12 @@
 from django.contrib import admin
 from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TransactionTestCase
 from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from django_zombodb.admin_mixins import ZomboDBAdminMixin
+from django_zombodb.admin_mixins import ZomboDBAdminMixin, ZomboDBChangeList
 
 from .restaurants.admin import RestaurantAdmin
 from .restaurants.models import Restaurant
@@ -135,3 +137,49 @@ class AdminMixinsTests(TransactionTestCase):
         self.assertContains(response, self.tj.name)
         self.assertContains(response, self.soleil.name)
         self.assertContains(response, '<td class="field-_zombodb_score">')
+
+    def test_uses_zombodb_changelist(self):
+        restaurant_admin = RestaurantAdmin(Restaurant, admin.site)
+        request = self._mocked_authenticated_request(
+            '/restaurant/', {'q': 'skillman'}, self.superuser)
+        cl = restaurant_admin.get_changelist_instance(request)
+        self.assertIsInstance(cl, ZomboDBChangeList)
+
+    def test_search_result_count_on_elasticsearch(self):
+        restaurant_admin = RestaurantAdmin(Restaurant, admin.site)
+        request = self._mocked_authenticated_request(
+            '/restaurant/', {'q': 'skillman'}, self.superuser)
+        with CaptureQueriesContext(connection) as captured:
+            cl = restaurant_admin.get_changelist_instance(request)
+        self.assertEqual(cl.result_count, 2)
+        self.assertTrue(any('zdb.count' in q['sql'] for q in captured.captured_queries))
+
+    def test_search_result_count_max_search_results(self):
+        restaurant_admin = RestaurantAdmin(Restaurant, admin.site)
+        restaurant_admin.max_search_results = 1
+        request = self._mocked_authenticated_request(
+            '/restaurant/', {'q': 'skillman'}, self.superuser)
+        cl = restaurant_admin.get_changelist_instance(request)
+        self.assertEqual(cl.result_count, 1)
+
+    def test_full_result_count_is_estimated(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE restaurants_restaurant')
+
+        restaurant_admin = RestaurantAdmin(Restaurant, admin.site)
+        restaurant_admin.estimate_full_result_count = True
+        request = self._mocked_authenticated_request(
+            '/restaurant/', {'q': 'skillman'}, self.superuser)
+        with CaptureQueriesContext(connection) as captured:
+            cl = restaurant_admin.get_changelist_instance(request)
+        self.assertEqual(cl.full_result_count, 3)
+        self.assertTrue(any('reltuples' in q['sql'] for q in captured.captured_queries))
+
+    def test_full_result_count_not_estimated_by_default(self):
+        restaurant_admin = RestaurantAdmin(Restaurant, admin.site)
+        request = self._mocked_authenticated_request(
+            '/restaurant/', {'q': 'skillman'}, self.superuser)
+        with CaptureQueriesContext(connection) as captured:
+            cl = restaurant_admin.get_changelist_instance(request)
+        self.assertEqual(cl.full_result_count, 3)
+        self.assertFalse(any('reltuples' in q['sql'] for q in captured.captured_queries))
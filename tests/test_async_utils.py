@@ -0,0 +1,106 @@
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from asgiref.sync import async_to_sync
+from elasticsearch_dsl.query import Term
+
+from django_zombodb.async_utils import AsyncChunkedIterator, db_sync_to_async
+from django_zombodb.exceptions import InvalidElasticsearchQuery
+from django_zombodb.helpers import avalidate_query_dict, avalidate_query_string
+
+from .restaurants.models import Restaurant
+from .utils import create_alcove, create_tj
+
+
+async def _collect(async_iterable):
+    items = []
+    async for item in async_iterable:
+        items.append(item)
+    return items
+
+
+class AsyncChunkedIteratorTests(SimpleTestCase):
+
+    def test_chunks(self):
+        with mock.patch(
+                'django_zombodb.async_utils.db_sync_to_async',
+                side_effect=db_sync_to_async) as db_sync_to_async_mock:
+            items = async_to_sync(_collect)(AsyncChunkedIterator(lambda: range(5), chunk_size=2))
+        self.assertEqual(items, [0, 1, 2, 3, 4])
+        self.assertEqual(db_sync_to_async_mock.call_count, 3)
+
+    def test_all_at_once(self):
+        with mock.patch(
+                'django_zombodb.async_utils.db_sync_to_async',
+                side_effect=db_sync_to_async) as db_sync_to_async_mock:
+            items = async_to_sync(_collect)(AsyncChunkedIterator(lambda: range(5)))
+        self.assertEqual(items, [0, 1, 2, 3, 4])
+        self.assertEqual(db_sync_to_async_mock.call_count, 1)
+
+    def test_empty(self):
+        items = async_to_sync(_collect)(AsyncChunkedIterator(lambda: [], chunk_size=2))
+        self.assertEqual(items, [])
+
+    def test_requires_asgiref(self):
+        with mock.patch.dict('sys.modules', {'asgiref.sync': None}):
+            with self.assertRaises(ImproperlyConfigured):
+                db_sync_to_async(list)
+
+
+@override_settings(ZOMBODB_ELASTICSEARCH_URL='http://localhost:9200/')
+class AsyncSearchTests(TransactionTestCase):
+
+    def setUp(self):
+        self.alcove = create_alcove()
+        self.tj = create_tj()
+
+    def test_aquery_string_search(self):
+        with CaptureQueriesContext(connection) as captured:
+            results = async_to_sync(Restaurant.objects.aquery_string_search)('skillman')
+        self.assertEqual(len(captured.captured_queries), 0)
+        self.assertEqual(async_to_sync(_collect)(results), [self.tj])
+
+    def test_adict_search(self):
+        results = async_to_sync(Restaurant.objects.adict_search)(
+            {'match': {'street': 'skillman'}}, validate=True)
+        self.assertEqual(async_to_sync(_collect)(results), [self.tj])
+
+    def test_adsl_search(self):
+        results = async_to_sync(Restaurant.objects.adsl_search)(
+            Term(email='alcove@example.org'), validate=True)
+        self.assertEqual(async_to_sync(_collect)(results), [self.alcove])
+
+    def test_aquery_string_search_validate(self):
+        with self.assertRaises(InvalidElasticsearchQuery):
+            async_to_sync(Restaurant.objects.aquery_string_search)('skillman AND', validate=True)
+
+    def test_asearch_count(self):
+        results = Restaurant.objects.query_string_search('skillman OR alcove')
+        self.assertEqual(async_to_sync(results.asearch_count)(), 2)
+        self.assertEqual(async_to_sync(results.asearch_count)(max_count=1), 1)
+
+    def test_asearch_iterator(self):
+        results = Restaurant.objects.query_string_search('skillman OR alcove')
+        self.assertEqual(
+            async_to_sync(_collect)(results.asearch_iterator(chunk_size=1)),
+            list(results.order_by_score()))
+
+    def test_avalidate(self):
+        self.assertIs(async_to_sync(avalidate_query_string)(Restaurant, 'skillman'), True)
+        self.assertIs(async_to_sync(avalidate_query_dict)(Restaurant, {'wrong': 'query'}), False)
+
+        # syntax errors don't hit the database
+        with CaptureQueriesContext(connection) as captured:
+            self.assertIs(async_to_sync(avalidate_query_string)(Restaurant, 'sushi AND'), False)
+        self.assertEqual(len(captured.captured_queries), 0)
+
+    @override_settings(ZOMBODB_VALIDATION_CACHE={'TIMEOUT': 60})
+    def test_avalidate_uses_cache(self):
+        self.assertIs(async_to_sync(avalidate_query_string)(Restaurant, 'skillman'), True)
+        with CaptureQueriesContext(connection) as captured:
+            self.assertIs(async_to_sync(avalidate_query_string)(Restaurant, 'skillman'), True)
+        self.assertEqual(len(captured.captured_queries), 0)
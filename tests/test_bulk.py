@@ -0,0 +1,187 @@
+import json
+import tempfile
+import uuid
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection, transaction
+from django.db.transaction import TransactionManagementError
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from django_zombodb.bulk import _iter_chunks, bulk_indexing_mode, bulk_load
+from django_zombodb.helpers import get_zombodb_index_from_model
+
+from .models import Book
+from .restaurants.models import Restaurant
+
+
+CSV_HEADER = 'id,url,name,street,zip_code,city,state,phone,email,website,categories\n'
+CSV_ROWS = [
+    '8818b239-af04-554c-3d78-e50fde37b2be,http://example.org?ital,Ital Uil Usa,199 Revere St,'
+    '02151,Revere,MA,(781) 284-6425,,,"{Italian,Restaurants}"\n',
+    '24db17d5-7d8d-ef6e-0e9d-8b4086a13457,http://example.org?sbarro,"Sbarro\nPizza",'
+    '455 Arsenal St,02472,Watertown,MA,(617) 926-9372,,http://www.sbarro.com,{Pizza}\n',
+]
+
+
+def _get_jsonl_row(number):
+    return json.dumps({
+        'id': str(uuid.uuid4()),
+        'url': 'http://example.org?{}'.format(number),
+        'name': 'Restaurant {}'.format(number),
+        'street': '41-11 49th St',
+        'zip_code': '11104',
+        'city': 'New York City',
+        'state': 'NY',
+        'phone': '+1 347-813-4159',
+        'email': 'alcove@example.org',
+        'website': None,
+        'categories': ['Gastropub', 'Tapas'],
+    }) + '\n'
+
+
+class IterChunksTests(SimpleTestCase):
+
+    def test_chunk_size(self):
+        lines = ['a\n', 'b\n', 'c\n']
+        self.assertEqual(list(_iter_chunks(lines, 4, count_quotes=True)), ['a\nb\n', 'c\n'])
+
+    def test_quoted_line_breaks(self):
+        lines = ['"a\n', 'b"\n', 'c\n']
+        self.assertEqual(list(_iter_chunks(lines, 1, count_quotes=True)), ['"a\nb"\n', 'c\n'])
+
+    def test_blank_lines(self):
+        lines = ['{}\n', '\n', '{}\n']
+        self.assertEqual(list(_iter_chunks(lines, 100, count_quotes=False)), ['{}\n{}\n'])
+
+
+@override_settings(ZOMBODB_ELASTICSEARCH_URL='http://localhost:9200/')
+class BulkLoadTests(TransactionTestCase):
+
+    def test_csv(self):
+        progress = []
+        result = bulk_load(
+            Restaurant, StringIO(CSV_HEADER + ''.join(CSV_ROWS)),
+            chunk_size=1, progress=progress.append)
+
+        self.assertEqual((result.rows, result.chunks), (2, 2))
+        self.assertEqual(progress, [1, 2])
+        sbarro = Restaurant.objects.get(url='http://example.org?sbarro')
+        self.assertEqual(sbarro.name, 'Sbarro\nPizza')
+        self.assertEqual(sbarro.categories, ['Pizza'])
+        ital = Restaurant.objects.get(url='http://example.org?ital')
+        self.assertEqual(ital.website, '')
+        self.assertEqual(ital.categories, ['Italian', 'Restaurants'])
+        self.assertEqual(Restaurant.objects.query_string_search('sbarro').count(), 1)
+
+    def test_csv_columns_and_expressions(self):
+        bulk_load(
+            Restaurant,
+            StringIO(
+                'Uniq Id,Url,Name,Street,Zip,City,State,Phone,Email,Website,Categories\n'
+                '8818b239-af04-554c-3d78-e50fde37b2be,http://example.org?ital,Ital Uil Usa,'
+                '199 Revere St,02151,Revere,MA,(781) 284-6425,,,"Italian, Restaurants"\n'),
+            columns=CSV_HEADER.strip().split(','),
+            expressions={'categories': "regexp_split_to_array({column}, '\\s*,\\s*')"})
+
+        self.assertEqual(Restaurant.objects.get().categories, ['Italian', 'Restaurants'])
+
+    def test_csv_auto_field(self):
+        result = bulk_load(Book, StringIO('id,title\n1,Dune\n2,Emma\n'))
+
+        self.assertEqual(result.rows, 2)
+        self.assertEqual(
+            list(Book.objects.order_by('id').values_list('id', 'title')),
+            [(1, 'Dune'), (2, 'Emma')])
+
+    def test_jsonl(self):
+        rows = ''.join(_get_jsonl_row(number) for number in range(10))
+        result = bulk_load(Restaurant, StringIO(rows), format='jsonl', chunk_size=1000, workers=2)
+
+        self.assertEqual(result.rows, 10)
+        self.assertEqual(Restaurant.objects.count(), 10)
+        restaurant = Restaurant.objects.get(url='http://example.org?3')
+        self.assertEqual(restaurant.name, 'Restaurant 3')
+        self.assertEqual(restaurant.website, '')
+        self.assertEqual(restaurant.categories, ['Gastropub', 'Tapas'])
+
+    def test_unknown_field(self):
+        with self.assertRaisesRegex(ValueError, "has no field 'rating'"):
+            bulk_load(Restaurant, StringIO('name,rating\nPizza,5\n'))
+
+    def test_command(self):
+        out = StringIO()
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl') as jsonl_file:
+            jsonl_file.write(_get_jsonl_row(1))
+            jsonl_file.flush()
+            call_command(
+                'zombodb_bulk_load', 'restaurants.Restaurant', jsonl_file.name, stdout=out)
+
+        self.assertIn('Loaded 1 rows into restaurants.Restaurant in 1 chunk(s)', out.getvalue())
+        self.assertIn('rows/s', out.getvalue())
+        self.assertEqual(Restaurant.objects.count(), 1)
+
+    def test_command_unknown_model(self):
+        with self.assertRaises(CommandError):
+            call_command('zombodb_bulk_load', 'restaurants.Unknown', 'restaurants.csv')
+
+
+def _get_index_options(model):
+    index_name = get_zombodb_index_from_model(model).name
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reloptions FROM pg_class WHERE relname = %s", [index_name])
+        reloptions = cursor.fetchone()[0] or []
+    return dict(option.split('=', 1) for option in reloptions)
+
+
+@override_settings(ZOMBODB_ELASTICSEARCH_URL='http://localhost:9200/')
+class BulkIndexingModeTests(TransactionTestCase):
+
+    def test_context_manager(self):
+        options = _get_index_options(Restaurant)
+
+        with bulk_indexing_mode(Restaurant, bulk_concurrency=4):
+            self.assertEqual(
+                _get_index_options(Restaurant),
+                dict(options, refresh_interval='-1', replicas='0', bulk_concurrency='4'))
+
+        self.assertEqual(_get_index_options(Restaurant), options)
+
+    def test_decorator(self):
+        options = _get_index_options(Restaurant)
+
+        @bulk_indexing_mode(Restaurant, replicas=None)
+        def load():
+            self.assertEqual(_get_index_options(Restaurant), dict(options, refresh_interval='-1'))
+
+        load()
+        self.assertEqual(_get_index_options(Restaurant), options)
+
+    def test_restore_on_error(self):
+        options = _get_index_options(Restaurant)
+
+        with self.assertRaises(ValueError):
+            with bulk_indexing_mode(Restaurant):
+                raise ValueError
+
+        self.assertEqual(_get_index_options(Restaurant), options)
+
+    def test_restore_on_database_error(self):
+        options = _get_index_options(Restaurant)
+
+        with self.assertRaises(IntegrityError):
+            with bulk_indexing_mode(Restaurant):
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.execute('INSERT INTO restaurants_restaurant (id) VALUES (NULL)')
+
+        self.assertEqual(_get_index_options(Restaurant), options)
+
+    def test_atomic_block(self):
+        options = _get_index_options(Restaurant)
+
+        with self.assertRaises(TransactionManagementError):
+            with transaction.atomic(), bulk_indexing_mode(Restaurant):
+                pass
+
+        self.assertEqual(_get_index_options(Restaurant), options)
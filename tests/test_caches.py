@@ -0,0 +1,204 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from elasticsearch_dsl import Q as ElasticsearchQ
+
+from django_zombodb.caches import (
+    DEFAULT_MAX_ENTRIES, CompiledQueryCache, DjangoValidationCache, LocMemValidationCache,
+    get_compiled_query_cache, get_validation_cache
+)
+from django_zombodb.helpers import validate_query_dict, validate_query_string
+
+from .restaurants.models import Restaurant
+
+
+class LocMemValidationCacheTests(SimpleTestCase):
+
+    def test_get_set(self):
+        cache = LocMemValidationCache()
+        self.assertIsNone(cache.get('index', '{"query": 1}'))
+        cache.set('index', '{"query": 1}', True)
+        cache.set('index', '{"query": 2}', False)
+        self.assertIs(cache.get('index', '{"query": 1}'), True)
+        self.assertIs(cache.get('index', '{"query": 2}'), False)
+        self.assertIsNone(cache.get('other-index', '{"query": 1}'))
+        self.assertEqual(cache.stats(), {'hits': 2, 'misses': 2})
+
+    def test_evicts_least_recently_used(self):
+        cache = LocMemValidationCache(max_entries=2)
+        cache.set('index', 'a', True)
+        cache.set('index', 'b', True)
+        cache.get('index', 'a')
+        cache.set('index', 'c', True)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIs(cache.get('index', 'a'), True)
+        self.assertIsNone(cache.get('index', 'b'))
+        self.assertIs(cache.get('index', 'c'), True)
+
+    @mock.patch('django_zombodb.caches.time.monotonic')
+    def test_expires_entries(self, monotonic_mock):
+        cache = LocMemValidationCache(timeout=10)
+        monotonic_mock.return_value = 100
+        cache.set('index', 'a', True)
+
+        monotonic_mock.return_value = 109
+        self.assertIs(cache.get('index', 'a'), True)
+
+        monotonic_mock.return_value = 110
+        self.assertIsNone(cache.get('index', 'a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_clear(self):
+        cache = LocMemValidationCache()
+        cache.set('index', 'a', True)
+        cache.clear()
+        self.assertIsNone(cache.get('index', 'a'))
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+})
+class DjangoValidationCacheTests(SimpleTestCase):
+
+    def tearDown(self):
+        caches['default'].clear()
+
+    def test_get_set(self):
+        cache = DjangoValidationCache()
+        self.assertIsNone(cache.get('index', 'a'))
+        cache.set('index', 'a', False)
+        self.assertIs(cache.get('index', 'a'), False)
+        self.assertIs(DjangoValidationCache().get('index', 'a'), False)
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1})
+
+
+class GetValidationCacheTests(SimpleTestCase):
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(get_validation_cache())
+
+    @override_settings(ZOMBODB_VALIDATION_CACHE={'TIMEOUT': 60, 'MAX_ENTRIES': 10})
+    def test_default_backend(self):
+        cache = get_validation_cache()
+        self.assertIsInstance(cache, LocMemValidationCache)
+        self.assertEqual(cache.timeout, 60)
+        self.assertEqual(cache.max_entries, 10)
+        self.assertIs(get_validation_cache(), cache)
+
+    @override_settings(ZOMBODB_VALIDATION_CACHE={
+        'BACKEND': 'django_zombodb.caches.DjangoValidationCache',
+        'ALIAS': 'other',
+    })
+    def test_django_backend(self):
+        cache = get_validation_cache()
+        self.assertIsInstance(cache, DjangoValidationCache)
+        self.assertEqual(cache.alias, 'other')
+
+
+@override_settings(ZOMBODB_VALIDATION_CACHE={'TIMEOUT': 60})
+class ValidationCacheIntegrationTests(TransactionTestCase):
+
+    def test_validate_query_string_uses_cache(self):
+        cache = get_validation_cache()
+        self.assertIs(validate_query_string(Restaurant, 'skillman'), True)
+        self.assertIs(validate_query_string(Restaurant, 'coffee'), True)
+        self.assertEqual(cache.stats(), {'hits': 0, 'misses': 2})
+
+        with mock.patch('django_zombodb.helpers.connection') as connection_mock:
+            self.assertIs(validate_query_string(Restaurant, 'skillman'), True)
+            self.assertIs(validate_query_string(Restaurant, 'coffee'), True)
+        connection_mock.cursor.assert_not_called()
+        self.assertEqual(cache.stats(), {'hits': 2, 'misses': 2})
+
+    def test_validate_query_dict_uses_cache(self):
+        cache = get_validation_cache()
+        query = {'match': {'street': 'skillman'}}
+        self.assertIs(validate_query_dict(Restaurant, query), True)
+        self.assertIs(validate_query_dict(Restaurant, query), True)
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1})
+
+
+class CompiledQueryCacheTests(SimpleTestCase):
+
+    def test_get_or_compile(self):
+        cache = CompiledQueryCache()
+        compile_fn = mock.Mock(side_effect=lambda query: str(query))
+        self.assertEqual(cache.get_or_compile({'term': {'a': 1}}, compile_fn), "{'term': {'a': 1}}")
+        self.assertEqual(cache.get_or_compile({'term': {'a': 1}}, compile_fn), "{'term': {'a': 1}}")
+        self.assertEqual(compile_fn.call_count, 1)
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1})
+
+    def test_keys_are_structural(self):
+        cache = CompiledQueryCache()
+        self.assertEqual(
+            cache.make_key(ElasticsearchQ('match', name='pizza') & ElasticsearchQ('term', a=1)),
+            cache.make_key(ElasticsearchQ('match', name='pizza') & ElasticsearchQ('term', a=1)))
+        self.assertNotEqual(
+            cache.make_key(ElasticsearchQ('match', name='pizza')),
+            cache.make_key(ElasticsearchQ('match', name='hut')))
+        self.assertNotEqual(
+            cache.make_key(ElasticsearchQ('match', name='pizza')),
+            cache.make_key({'match': {'name': 'pizza'}}))
+        # equal on Python, but serialized differently
+        self.assertNotEqual(cache.make_key({'a': True}), cache.make_key({'a': 1}))
+        self.assertNotEqual(cache.make_key({'a': 1.0}), cache.make_key({'a': 1}))
+        self.assertNotEqual(cache.make_key({'a': []}), cache.make_key({'a': {}}))
+
+    def test_does_not_cache_unknown_values(self):
+        cache = CompiledQueryCache()
+        compile_fn = mock.Mock(return_value='compiled')
+        cache.get_or_compile({'a': object()}, compile_fn)
+        cache.get_or_compile({'a': object()}, compile_fn)
+        self.assertEqual(compile_fn.call_count, 2)
+        self.assertEqual(len(cache), 0)
+
+    def test_evicts_least_recently_used(self):
+        cache = CompiledQueryCache(max_entries=2)
+        cache.get_or_compile({'a': 1}, str)
+        cache.get_or_compile({'b': 1}, str)
+        cache.get_or_compile({'a': 1}, str)
+        cache.get_or_compile({'c': 1}, str)
+        self.assertEqual(len(cache), 2)
+
+        compile_fn = mock.Mock(return_value='compiled')
+        cache.get_or_compile({'a': 1}, compile_fn)
+        compile_fn.assert_not_called()
+        cache.get_or_compile({'b': 1}, compile_fn)
+        compile_fn.assert_called_once_with({'b': 1})
+
+    def test_enabled_by_default(self):
+        self.assertIsInstance(get_compiled_query_cache(), CompiledQueryCache)
+
+    @override_settings(ZOMBODB_COMPILED_QUERY_CACHE={'MAX_ENTRIES': 10})
+    def test_setting(self):
+        self.assertEqual(get_compiled_query_cache().max_entries, 10)
+
+    @override_settings(ZOMBODB_COMPILED_QUERY_CACHE=True)
+    def test_setting_true(self):
+        self.assertEqual(get_compiled_query_cache().max_entries, DEFAULT_MAX_ENTRIES)
+
+    @override_settings(ZOMBODB_COMPILED_QUERY_CACHE=None)
+    def test_disabled(self):
+        self.assertIsNone(get_compiled_query_cache())
+
+    @override_settings(ZOMBODB_COMPILED_QUERY_CACHE={})
+    def test_searches_use_cache(self):
+        cache = get_compiled_query_cache()
+        query = ElasticsearchQ('match', name='pizza')
+        results = Restaurant.objects.dsl_search(query)
+        self.assertEqual(cache.stats(), {'hits': 0, 'misses': 1})
+        self.assertEqual(
+            str(Restaurant.objects.dsl_search(ElasticsearchQ('match', name='pizza')).query),
+            str(results.query))
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1})
+
+        Restaurant.objects.dsl_search(query, cache=False)
+        Restaurant.objects.dict_search(query.to_dict())
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1})
+
+        Restaurant.objects.dict_search(query.to_dict(), cache=True)
+        Restaurant.objects.dict_search(query.to_dict(), cache=True)
+        self.assertEqual(cache.stats(), {'hits': 2, 'misses': 2})
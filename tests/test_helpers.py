@@ -0,0 +1,59 @@
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from elasticsearch_dsl import Q as ElasticsearchQ
+
+from django_zombodb.caches import get_validation_cache
+from django_zombodb.helpers import validate_queries
+
+from .restaurants.models import Restaurant, RestaurantNoIndex
+
+
+class ValidateQueriesTests(TransactionTestCase):
+
+    def test_validate_queries(self):
+        queries = [
+            'skillman',
+            {'match': {'street': 'skillman'}},
+            'sushi AND AND',
+            {'wrong': 'query'},
+            ElasticsearchQ('match', street='skillman').to_dict(),
+            'skillman',
+        ]
+        with CaptureQueriesContext(connection) as captured:
+            results = validate_queries(Restaurant, queries)
+
+        self.assertEqual(results, [True, True, False, False, True, True])
+        self.assertEqual(len(captured.captured_queries), 1)
+
+    def test_validate_queries_chunks(self):
+        queries = ['name:{}'.format(i) for i in range(5)]
+        with CaptureQueriesContext(connection) as captured:
+            results = validate_queries(Restaurant, queries, chunk_size=2)
+
+        self.assertEqual(results, [True] * 5)
+        self.assertEqual(len(captured.captured_queries), 3)
+
+    def test_validate_queries_empty(self):
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(validate_queries(Restaurant, []), [])
+            self.assertEqual(validate_queries(Restaurant, ['AND']), [False])
+        self.assertEqual(len(captured.captured_queries), 0)
+
+    @override_settings(ZOMBODB_VALIDATION_CACHE={'TIMEOUT': 60})
+    def test_validate_queries_uses_cache(self):
+        self.assertEqual(validate_queries(Restaurant, ['skillman', 'coffee']), [True, True])
+
+        with mock.patch('django_zombodb.helpers.connection') as connection_mock:
+            self.assertEqual(
+                validate_queries(Restaurant, ['coffee', 'skillman']), [True, True])
+        connection_mock.cursor.assert_not_called()
+        self.assertEqual(get_validation_cache().stats(), {'hits': 2, 'misses': 2})
+
+    def test_validate_queries_fails_if_no_zombodb_index_in_model(self):
+        with self.assertRaises(ImproperlyConfigured):
+            validate_queries(RestaurantNoIndex, ['skillman'])
@@ -251,6 +251,24 @@ class ZomboDBIndexTests(TestCase):
             }
         )
 
+    def test_get_alter_options_sql(self):
+        index = ZomboDBIndex(fields=['title'], name='test_title_zombodb')
+        statements = index.get_alter_options_sql(
+            connection.ops.quote_name,
+            {'bulk_concurrency': None, 'refresh_interval': '-1', 'replicas': 0, 'llapi': True})
+        self.assertEqual(
+            statements,
+            [
+                'ALTER INDEX "test_title_zombodb" SET '
+                '(replicas = 0, refresh_interval = \'-1\', llapi = true)',
+                'ALTER INDEX "test_title_zombodb" RESET (bulk_concurrency)',
+            ]
+        )
+
+    def test_get_alter_options_sql_no_options(self):
+        index = ZomboDBIndex(fields=['title'], name='test_title_zombodb')
+        self.assertEqual(index.get_alter_options_sql(connection.ops.quote_name, {}), [])
+
 
 class ZomboDBIndexURLTests(TestCase):
 
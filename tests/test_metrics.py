@@ -0,0 +1,199 @@
+from unittest import mock, skipIf
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from elasticsearch_dsl import Q as ElasticsearchQ
+
+from django_zombodb import metrics
+from django_zombodb.helpers import validate_queries, validate_query_string
+from django_zombodb.metrics import (
+    Counter, Histogram, LocMemMetricsExporter, PrometheusMetricsExporter, get_metrics_exporters,
+    metrics_enabled
+)
+from django_zombodb.registry import registry
+
+from .restaurants.models import Restaurant
+from .utils import create_alcove
+
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+
+LOCMEM_EXPORTER = 'django_zombodb.metrics.LocMemMetricsExporter'
+
+
+class LocMemMetricsExporterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.exporter = LocMemMetricsExporter()
+        self.counter = Counter('test_total', 'Test counter.', ['kind'])
+        self.histogram = Histogram('test_seconds', 'Test histogram.', ['kind'], buckets=(1, 5))
+
+    def test_counter(self):
+        self.exporter.inc(self.counter, {'kind': 'a'}, 1)
+        self.exporter.inc(self.counter, {'kind': 'a'}, 2)
+        self.exporter.inc(self.counter, {'kind': True}, 1)
+
+        self.assertEqual(self.exporter.get_sample_value('test_total', {'kind': 'a'}), 3)
+        self.assertEqual(self.exporter.get_sample_value('test_total', {'kind': 'true'}), 1)
+        self.assertIsNone(self.exporter.get_sample_value('test_total', {'kind': 'b'}))
+
+    def test_histogram(self):
+        for value in (0.5, 1, 3, 10):
+            self.exporter.observe(self.histogram, {'kind': 'a'}, value)
+
+        self.assertEqual(self.exporter.get_sample_value('test_seconds_count', {'kind': 'a'}), 4)
+        self.assertEqual(self.exporter.get_sample_value('test_seconds_sum', {'kind': 'a'}), 14.5)
+        self.assertEqual(
+            self.exporter.get_sample_value('test_seconds_bucket', {'kind': 'a', 'le': '1'}), 2)
+        self.assertEqual(
+            self.exporter.get_sample_value('test_seconds_bucket', {'kind': 'a', 'le': '5'}), 3)
+
+    def test_render(self):
+        self.exporter.inc(self.counter, {'kind': 'say "hi"'}, 1)
+        self.exporter.observe(self.histogram, {'kind': 'a'}, 2)
+
+        self.assertEqual(self.exporter.render(), '\n'.join([
+            '# HELP test_total Test counter.',
+            '# TYPE test_total counter',
+            'test_total{kind="say \\"hi\\""} 1.0',
+            '# HELP test_seconds Test histogram.',
+            '# TYPE test_seconds histogram',
+            'test_seconds_bucket{kind="a",le="1"} 0.0',
+            'test_seconds_bucket{kind="a",le="5"} 1.0',
+            'test_seconds_bucket{kind="a",le="+Inf"} 1.0',
+            'test_seconds_count{kind="a"} 1.0',
+            'test_seconds_sum{kind="a"} 2.0',
+        ]) + '\n')
+
+    def test_clear(self):
+        self.exporter.inc(self.counter, {'kind': 'a'}, 1)
+        self.exporter.clear()
+        self.assertEqual(self.exporter.render(), '')
+
+
+@skipIf(prometheus_client is None, "prometheus_client isn't installed")
+class PrometheusMetricsExporterTests(SimpleTestCase):
+
+    def test_export(self):
+        registry = prometheus_client.CollectorRegistry()
+        exporter = PrometheusMetricsExporter(registry=registry)
+        exporter.inc(metrics.SEARCHES, {
+            'model': 'restaurants.Restaurant', 'query_type': 'dsl', 'limited': False}, 1)
+        exporter.observe(metrics.SEARCH_DURATION, {'table': 'restaurants_restaurant'}, 0.02)
+
+        self.assertEqual(registry.get_sample_value('zombodb_searches_total', {
+            'model': 'restaurants.Restaurant', 'query_type': 'dsl', 'limited': 'false'}), 1)
+        self.assertEqual(registry.get_sample_value(
+            'zombodb_search_duration_seconds_count', {'table': 'restaurants_restaurant'}), 1)
+
+    def test_missing_prometheus_client(self):
+        with mock.patch.dict('sys.modules', {'prometheus_client': None}):
+            with self.assertRaisesRegex(ImproperlyConfigured, 'prometheus_client'):
+                PrometheusMetricsExporter()
+
+
+class MetricsExportersTests(SimpleTestCase):
+
+    def test_disabled_by_default(self):
+        self.assertEqual(get_metrics_exporters(), ())
+        self.assertFalse(metrics_enabled())
+        # no-op without exporters
+        metrics.SEARCHES.inc(model='restaurants.Restaurant', query_type='dsl', limited=False)
+
+    @override_settings(ZOMBODB_METRICS_EXPORTERS=[
+        LOCMEM_EXPORTER,
+        {'BACKEND': LOCMEM_EXPORTER},
+    ])
+    def test_configured(self):
+        exporters = get_metrics_exporters()
+        self.assertEqual(len(exporters), 2)
+        self.assertIsInstance(exporters[0], LocMemMetricsExporter)
+        self.assertIsInstance(exporters[1], LocMemMetricsExporter)
+        self.assertTrue(metrics_enabled())
+
+    @override_settings(ZOMBODB_METRICS_EXPORTERS=[LOCMEM_EXPORTER])
+    def test_searches(self):
+        exporter = get_metrics_exporters()[0]
+
+        Restaurant.objects.query_string_search('pizza')
+        Restaurant.objects.dict_search({'match': {'name': 'pizza'}}, limit=50)
+        Restaurant.objects.dsl_search(ElasticsearchQ('match', name='pizza'), limit=5000)
+
+        for query_type, limited in (('query_string', False), ('dict', True), ('dsl', True)):
+            self.assertEqual(exporter.get_sample_value('zombodb_searches_total', {
+                'model': 'restaurants.Restaurant',
+                'query_type': query_type,
+                'limited': limited,
+            }), 1)
+        self.assertEqual(exporter.get_sample_value('zombodb_search_limit_bucket', {
+            'model': 'restaurants.Restaurant', 'query_type': 'dsl', 'le': '10000'}), 1)
+
+    @override_settings(ZOMBODB_METRICS_EXPORTERS=[LOCMEM_EXPORTER])
+    def test_syntax_errors(self):
+        exporter = get_metrics_exporters()[0]
+        index_name = registry.get(Restaurant).index_name
+
+        self.assertFalse(validate_query_string(Restaurant, 'name:"pizza'))
+
+        self.assertEqual(exporter.get_sample_value(
+            'zombodb_validation_syntax_errors_total', {'index': index_name}), 1)
+
+
+@override_settings(
+    ZOMBODB_ELASTICSEARCH_URL='http://localhost:9200/',
+    ZOMBODB_METRICS_EXPORTERS=[LOCMEM_EXPORTER])
+class MetricsTests(TransactionTestCase):
+
+    def setUp(self):
+        self.exporter = get_metrics_exporters()[0]
+        self.index_name = registry.get(Restaurant).index_name
+        create_alcove()
+
+    def test_search_duration(self):
+        list(Restaurant.objects.query_string_search('alcove'))
+
+        self.assertEqual(self.exporter.get_sample_value(
+            'zombodb_search_duration_seconds_count', {'table': 'restaurants_restaurant'}), 1)
+
+    def test_validations(self):
+        validate_query_string(Restaurant, 'name:alcove')
+        validate_query_string(Restaurant, 'name:alcove AND')
+        validate_queries(Restaurant, ['name:alcove', {'match': {'name': 'alcove'}}])
+
+        self.assertEqual(self.exporter.get_sample_value(
+            'zombodb_validations_total', {'index': self.index_name, 'result': 'valid'}), 3)
+        self.assertEqual(self.exporter.get_sample_value(
+            'zombodb_validation_syntax_errors_total', {'index': self.index_name}), 1)
+        self.assertEqual(self.exporter.get_sample_value(
+            'zombodb_validation_duration_seconds_count', {'index': self.index_name}), 2)
+
+    @override_settings(ZOMBODB_VALIDATION_CACHE={
+        'BACKEND': 'django_zombodb.caches.LocMemValidationCache'})
+    def test_validation_cache(self):
+        validate_query_string(Restaurant, 'name:alcove')
+        validate_query_string(Restaurant, 'name:alcove')
+
+        for result in ('hit', 'miss'):
+            self.assertEqual(self.exporter.get_sample_value(
+                'zombodb_validation_cache_requests_total',
+                {'index': self.index_name, 'result': result}), 1)
+
+    def test_admin_searches(self):
+        self.client.force_login(User.objects.create_superuser(
+            username='super', email='a@b.com', password='xxx'))
+        url = reverse('admin:restaurants_restaurant_changelist')
+
+        self.client.get(url, {'q': 'alcove'})
+        self.client.get(url, {'q': 'alcove AND'})
+
+        for valid in (True, False):
+            self.assertEqual(self.exporter.get_sample_value(
+                'zombodb_admin_searches_total',
+                {'model': 'restaurants.Restaurant', 'valid': valid}), 1)
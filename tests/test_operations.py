@@ -0,0 +1,374 @@
+from io import StringIO
+
+from django.core.management import call_command, get_commands
+from django.db import connection, models
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.questioner import MigrationQuestioner
+from django.db.migrations.state import ModelState, ProjectState
+from django.test import SimpleTestCase, TestCase
+
+from django_zombodb.autodetector import ZomboDBMigrationAutodetector
+from django_zombodb.indexes import ZomboDBIndex
+from django_zombodb.operations import (
+    AlterZomboDBFieldMapping, AlterZomboDBIndexOptions, get_field_mapping_changes,
+    get_index_changes
+)
+
+
+def _get_project_state(*indexes):
+    state = ProjectState()
+    state.add_model(ModelState(
+        'tests',
+        'Book',
+        [
+            ('id', models.AutoField(primary_key=True)),
+            ('title', models.CharField(max_length=255)),
+        ],
+        {'indexes': list(indexes)},
+    ))
+    return state
+
+
+def _get_operations(before, after, autodetector_class=ZomboDBMigrationAutodetector):
+    autodetector = autodetector_class(before, after, MigrationQuestioner())
+    changes = autodetector._detect_changes()
+    return [
+        operation
+        for migration in changes.get('tests', [])
+        for operation in migration.operations
+    ]
+
+
+class GetFieldMappingChangesTests(SimpleTestCase):
+
+    def test_additive_changes(self):
+        old_field_mapping = {
+            'title': {'type': 'text', 'copy_to': 'zdb_all'},
+            'author': {'type': 'object', 'properties': {'name': {'type': 'keyword'}}},
+        }
+        new_field_mapping = {
+            'title': {
+                'type': 'text',
+                'copy_to': ['zdb_all', 'title_author'],
+                'fields': {'raw': {'type': 'keyword'}},
+            },
+            'author': {
+                'type': 'object',
+                'properties': {'name': {'type': 'keyword'}, 'email': {'type': 'keyword'}},
+            },
+            'title_author': {'type': 'text'},
+        }
+        self.assertEqual(
+            get_field_mapping_changes(old_field_mapping, new_field_mapping, ['title', 'author']),
+            new_field_mapping)
+
+    def test_no_changes(self):
+        field_mapping = {'title': {'type': 'text'}}
+        self.assertEqual(get_field_mapping_changes(field_mapping, field_mapping, ['title']), {})
+        self.assertEqual(get_field_mapping_changes(None, {}, ['title']), {})
+
+    def test_changed_type(self):
+        self.assertIsNone(get_field_mapping_changes(
+            {'title': {'type': 'text'}}, {'title': {'type': 'keyword'}}, ['title']))
+
+    def test_removed_copy_to(self):
+        self.assertIsNone(get_field_mapping_changes(
+            {'title': {'type': 'text', 'copy_to': ['a', 'b']}},
+            {'title': {'type': 'text', 'copy_to': 'a'}},
+            ['title']))
+
+    def test_removed_sub_field(self):
+        self.assertIsNone(get_field_mapping_changes(
+            {'title': {'type': 'text', 'fields': {'raw': {'type': 'keyword'}}}},
+            {'title': {'type': 'text'}},
+            ['title']))
+
+    def test_removed_field(self):
+        self.assertIsNone(get_field_mapping_changes({'title': {'type': 'text'}}, {}, ['title']))
+
+    def test_new_indexed_field(self):
+        self.assertIsNone(get_field_mapping_changes(
+            None, {'title': {'type': 'keyword'}}, ['title']))
+
+
+class GetIndexChangesTests(SimpleTestCase):
+
+    def test_online_options(self):
+        old_index = ZomboDBIndex(fields=['title'], name='book_title_zombodb', replicas=1)
+        new_index = ZomboDBIndex(
+            fields=['title'], name='book_title_zombodb', refresh_interval='-1')
+        self.assertEqual(
+            get_index_changes(old_index, new_index),
+            ({'replicas': None, 'refresh_interval': '-1'}, {}))
+
+    def test_field_mapping(self):
+        old_index = ZomboDBIndex(fields=['title'], name='book_title_zombodb')
+        new_index = ZomboDBIndex(
+            fields=['title'], name='book_title_zombodb', field_mapping={'all': {'type': 'text'}})
+        self.assertEqual(
+            get_index_changes(old_index, new_index), ({}, {'all': {'type': 'text'}}))
+
+    def test_rebuild(self):
+        old_index = ZomboDBIndex(fields=['title'], name='book_title_zombodb', replicas=1)
+        new_index = ZomboDBIndex(
+            fields=['title'], name='book_title_zombodb', replicas=2, shards=10)
+        self.assertIsNone(get_index_changes(old_index, new_index))
+
+    def test_rebuild_field_mapping(self):
+        old_index = ZomboDBIndex(fields=['title'], name='book_title_zombodb', replicas=1)
+        new_index = ZomboDBIndex(
+            fields=['title'], name='book_title_zombodb', replicas=2,
+            field_mapping={'title': {'type': 'keyword'}})
+        self.assertIsNone(get_index_changes(old_index, new_index))
+
+
+class AlterZomboDBIndexOptionsTests(SimpleTestCase):
+
+    def test_state_forwards(self):
+        state = _get_project_state(
+            ZomboDBIndex(fields=['title'], name='book_title_zombodb', replicas=1, shards=3))
+        operation = AlterZomboDBIndexOptions(
+            'Book', 'book_title_zombodb', {'replicas': 2, 'batch_size': 1024})
+        operation.state_forwards('tests', state)
+
+        index, = state.models['tests', 'book'].options['indexes']
+        self.assertEqual(index.name, 'book_title_zombodb')
+        self.assertEqual(index.replicas, 2)
+        self.assertEqual(index.batch_size, 1024)
+        self.assertEqual(index.shards, 3)
+
+    def test_unknown_index(self):
+        state = _get_project_state()
+        operation = AlterZomboDBIndexOptions('Book', 'book_title_zombodb', {'replicas': 2})
+        with self.assertRaisesRegex(ValueError, "has no index named 'book_title_zombodb'"):
+            operation.state_forwards('tests', state)
+
+    def test_offline_options(self):
+        with self.assertRaisesRegex(ValueError, "Options shards can't be altered"):
+            AlterZomboDBIndexOptions('Book', 'book_title_zombodb', {'shards': 2})
+
+    def test_deconstruct(self):
+        operation = AlterZomboDBIndexOptions('Book', 'book_title_zombodb', {'replicas': 2})
+        self.assertEqual(
+            operation.deconstruct(),
+            (
+                'AlterZomboDBIndexOptions',
+                [],
+                {
+                    'model_name': 'Book',
+                    'name': 'book_title_zombodb',
+                    'options': {'replicas': 2},
+                },
+            )
+        )
+
+    def test_describe(self):
+        operation = AlterZomboDBIndexOptions(
+            'Book', 'book_title_zombodb', {'replicas': 2, 'refresh_interval': '1s'})
+        self.assertEqual(
+            operation.describe(),
+            'Alter options refresh_interval, replicas of ZomboDB index book_title_zombodb '
+            'of model Book')
+
+
+class AlterZomboDBIndexOptionsDatabaseTests(TestCase):
+
+    def test_database_forwards_and_backwards(self):
+        before = _get_project_state(
+            ZomboDBIndex(fields=['title'], name='book_title_zombodb', replicas=1))
+        after = before.clone()
+        operation = AlterZomboDBIndexOptions(
+            'Book', 'book_title_zombodb', {'replicas': None, 'refresh_interval': '-1'})
+        operation.state_forwards('tests', after)
+
+        with connection.schema_editor(collect_sql=True) as editor:
+            operation.database_forwards('tests', editor, before, after)
+            operation.database_backwards('tests', editor, after, before)
+
+        self.assertEqual(
+            editor.collected_sql,
+            [
+                'ALTER INDEX "book_title_zombodb" SET (refresh_interval = \'-1\');',
+                'ALTER INDEX "book_title_zombodb" RESET (replicas);',
+                'ALTER INDEX "book_title_zombodb" SET (replicas = 1);',
+                'ALTER INDEX "book_title_zombodb" RESET (refresh_interval);',
+            ]
+        )
+
+
+class AlterZomboDBFieldMappingTests(SimpleTestCase):
+
+    def test_state_forwards(self):
+        state = _get_project_state(
+            ZomboDBIndex(fields=['title'], name='book_title_zombodb', replicas=1))
+        field_mapping = {'title_all': {'type': 'text'}}
+        operation = AlterZomboDBFieldMapping('Book', 'book_title_zombodb', field_mapping)
+        operation.state_forwards('tests', state)
+
+        index, = state.models['tests', 'book'].options['indexes']
+        self.assertEqual(index.field_mapping, field_mapping)
+        self.assertEqual(index.replicas, 1)
+
+    def test_deconstruct(self):
+        field_mapping = {'title_all': {'type': 'text'}}
+        operation = AlterZomboDBFieldMapping('Book', 'book_title_zombodb', field_mapping)
+        self.assertEqual(
+            operation.deconstruct(),
+            (
+                'AlterZomboDBFieldMapping',
+                [],
+                {
+                    'model_name': 'Book',
+                    'name': 'book_title_zombodb',
+                    'field_mapping': field_mapping,
+                },
+            )
+        )
+
+    def test_describe(self):
+        operation = AlterZomboDBFieldMapping('Book', 'book_title_zombodb', {})
+        self.assertEqual(
+            operation.describe(),
+            'Alter field_mapping of ZomboDB index book_title_zombodb of model Book')
+
+
+class AlterZomboDBFieldMappingDatabaseTests(TestCase):
+
+    def _get_states(self, old_field_mapping, new_field_mapping):
+        before = _get_project_state(ZomboDBIndex(
+            fields=['title'], name='book_title_zombodb', field_mapping=old_field_mapping))
+        after = before.clone()
+        operation = AlterZomboDBFieldMapping('Book', 'book_title_zombodb', new_field_mapping)
+        operation.state_forwards('tests', after)
+        return operation, before, after
+
+    def test_database_forwards(self):
+        operation, before, after = self._get_states(
+            {'title': {'type': 'text'}},
+            {'title': {'type': 'text', 'copy_to': 'all'}, 'all': {'type': 'text'}})
+
+        with connection.schema_editor(collect_sql=True) as editor:
+            operation.database_forwards('tests', editor, before, after)
+
+        self.assertEqual(
+            editor.collected_sql,
+            [
+                'SELECT zdb.define_field_mapping(\'"tests_book"\', \'all\', '
+                '\'{"type":"text"}\');',
+                'SELECT zdb.define_field_mapping(\'"tests_book"\', \'title\', '
+                '\'{"type":"text","copy_to":"all"}\');',
+                'SELECT zdb.request(\'book_title_zombodb\', '
+                '\'_mapping/doc\', \'PUT\', '
+                '\'{"properties":{"all":{"type":"text"},'
+                '"title":{"type":"text","copy_to":"all"}}}\');',
+                'SELECT zdb.request(\'book_title_zombodb\', '
+                '\'_update_by_query?conflicts=proceed&wait_for_completion=false\', \'POST\', '
+                '\'{"query":{"bool":{"should":[{"exists":{"field":"title"}}],'
+                '"minimum_should_match":1}}}\');',
+            ]
+        )
+
+    def test_database_backwards(self):
+        operation, before, after = self._get_states(
+            {'title': {'type': 'text'}},
+            {'title': {'type': 'text', 'copy_to': 'all'}, 'all': {'type': 'text'}})
+
+        with connection.schema_editor(collect_sql=True) as editor:
+            operation.database_backwards('tests', editor, after, before)
+
+        self.assertEqual(
+            editor.collected_sql,
+            [
+                'DELETE FROM zdb.mappings WHERE table_name = \'"tests_book"\'::regclass '
+                'AND field_name = \'all\';',
+                'SELECT zdb.define_field_mapping(\'"tests_book"\', \'title\', '
+                '\'{"type":"text"}\');',
+            ]
+        )
+
+    def test_not_additive(self):
+        operation, before, after = self._get_states(
+            {'title': {'type': 'text'}}, {'title': {'type': 'keyword'}})
+
+        with self.assertRaisesRegex(ValueError, "aren't additive"):
+            with connection.schema_editor(collect_sql=True) as editor:
+                operation.database_forwards('tests', editor, before, after)
+
+
+class ZomboDBMigrationAutodetectorTests(SimpleTestCase):
+
+    def test_alter_options(self):
+        before = _get_project_state(
+            ZomboDBIndex(fields=['title'], name='book_title_zombodb', replicas=1))
+        after = _get_project_state(
+            ZomboDBIndex(
+                fields=['title'], name='book_title_zombodb', replicas=0, compression_level=9))
+
+        operation, = _get_operations(before, after)
+        self.assertIsInstance(operation, AlterZomboDBIndexOptions)
+        self.assertEqual(operation.model_name, 'book')
+        self.assertEqual(operation.name, 'book_title_zombodb')
+        self.assertEqual(operation.options, {'replicas': 0, 'compression_level': 9})
+
+    def test_rebuild(self):
+        before = _get_project_state(
+            ZomboDBIndex(fields=['title'], name='book_title_zombodb', replicas=1))
+        after = _get_project_state(
+            ZomboDBIndex(fields=['title'], name='book_title_zombodb', replicas=0, shards=2))
+
+        operations = _get_operations(before, after)
+        self.assertEqual(
+            [operation.__class__.__name__ for operation in operations],
+            ['RemoveIndex', 'AddIndex'])
+
+    def test_alter_field_mapping(self):
+        before = _get_project_state(
+            ZomboDBIndex(fields=['title'], name='book_title_zombodb', replicas=1))
+        field_mapping = {'title_all': {'type': 'text'}}
+        after = _get_project_state(
+            ZomboDBIndex(
+                fields=['title'], name='book_title_zombodb', replicas=0,
+                field_mapping=field_mapping))
+
+        options_operation, field_mapping_operation = _get_operations(before, after)
+        self.assertIsInstance(options_operation, AlterZomboDBIndexOptions)
+        self.assertEqual(options_operation.options, {'replicas': 0})
+        self.assertIsInstance(field_mapping_operation, AlterZomboDBFieldMapping)
+        self.assertEqual(field_mapping_operation.name, 'book_title_zombodb')
+        self.assertEqual(field_mapping_operation.field_mapping, field_mapping)
+
+    def test_rebuild_field_mapping(self):
+        before = _get_project_state(ZomboDBIndex(
+            fields=['title'], name='book_title_zombodb',
+            field_mapping={'title': {'type': 'text'}}))
+        after = _get_project_state(ZomboDBIndex(
+            fields=['title'], name='book_title_zombodb',
+            field_mapping={'title': {'type': 'keyword'}}))
+
+        operations = _get_operations(before, after)
+        self.assertEqual(
+            [operation.__class__.__name__ for operation in operations],
+            ['RemoveIndex', 'AddIndex'])
+
+    def test_django_autodetector(self):
+        before = _get_project_state(
+            ZomboDBIndex(fields=['title'], name='book_title_zombodb', replicas=1))
+        after = _get_project_state(
+            ZomboDBIndex(fields=['title'], name='book_title_zombodb', replicas=0))
+
+        operations = _get_operations(before, after, MigrationAutodetector)
+        self.assertEqual(
+            [operation.__class__.__name__ for operation in operations],
+            ['RemoveIndex', 'AddIndex'])
+
+
+class ZomboDBMakemigrationsCommandTests(TestCase):
+
+    def test_command(self):
+        commands = get_commands()
+        self.assertEqual(commands['makemigrations'], 'django.core')
+        self.assertEqual(commands['zombodb_makemigrations'], 'django_zombodb')
+
+        out = StringIO()
+        call_command('zombodb_makemigrations', 'tests', dry_run=True, stdout=out)
+        self.assertEqual(out.getvalue(), "No changes detected in app 'tests'\n")
@@ -0,0 +1,66 @@
+from django.test import RequestFactory, TransactionTestCase, override_settings
+
+from debug_toolbar.toolbar import DebugToolbar
+from elasticsearch_dsl import Q as ElasticsearchQ
+
+from django_zombodb.helpers import validate_query_string
+from django_zombodb.panels import ZomboDBPanel
+
+from .restaurants.models import Restaurant
+from .utils import create_alcove
+
+
+@override_settings(ZOMBODB_ELASTICSEARCH_URL='http://localhost:9200/')
+class ZomboDBPanelTests(TransactionTestCase):
+
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+        self.toolbar = DebugToolbar(self.request, lambda request: None)
+        self.panel = ZomboDBPanel(self.toolbar, lambda request: None)
+
+    def _record(self, func):
+        self.panel.enable_instrumentation()
+        try:
+            func()
+        finally:
+            self.panel.disable_instrumentation()
+        self.panel.generate_stats(self.request, None)
+        return self.panel.get_stats()
+
+    def test_records_search_with_score(self):
+        create_alcove()
+        query = ElasticsearchQ('match', name='alcove')
+
+        stats = self._record(lambda: list(
+            Restaurant.objects.dsl_search(query).annotate_score()))
+
+        self.assertEqual(stats['total_calls'], 1)
+        call = stats['calls'][0]
+        self.assertEqual(call['kinds'], ['search', 'score'])
+        self.assertEqual(call['rows'], 1)
+        self.assertIn('==>', call['sql'])
+        self.assertIn('"match"', call['sql'])
+        self.assertEqual(stats['counts'], {'search': 1, 'score': 1})
+
+    def test_records_validation(self):
+        stats = self._record(lambda: validate_query_string(Restaurant, 'name:pizza'))
+
+        self.assertEqual(stats['total_calls'], 1)
+        self.assertEqual(stats['calls'][0]['kinds'], ['validation'])
+
+    def test_ignores_other_queries(self):
+        stats = self._record(lambda: list(Restaurant.objects.all()))
+
+        self.assertEqual(stats['total_calls'], 0)
+
+    def test_disable_instrumentation(self):
+        self._record(lambda: None)
+        list(Restaurant.objects.query_string_search('pizza'))
+
+        self.assertEqual(self.panel.get_stats()['total_calls'], 0)
+
+    def test_content(self):
+        self._record(lambda: list(Restaurant.objects.query_string_search('pizza')))
+
+        self.assertIn('search', self.panel.content)
+        self.assertIn('1 call in', self.panel.nav_subtitle)
@@ -0,0 +1,110 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, TransactionTestCase
+
+from django_zombodb.helpers import validate_query_string
+from django_zombodb.query_string import (
+    QueryStringSyntaxError, check_query_string_syntax, normalize_query_string,
+    validate_query_string_syntax
+)
+
+from .restaurants.models import Restaurant
+
+
+class QueryStringSyntaxTests(SimpleTestCase):
+
+    def test_valid_queries(self):
+        queries = [
+            '',
+            'coffee',
+            'sushi asian japanese 11377',
+            'email:alcove@example.org',
+            'brasil~ AND steak*',
+            'qu?ck bro*',
+            'a && b || c',
+            '(a OR b) AND NOT c',
+            '-a +b !c',
+            'a - b',
+            'foo-bar',
+            'name:"The Alcove"~2^3',
+            'name:(pizza hut)^2',
+            'a^2~',
+            'a ^2',
+            'age:[1 TO 5]',
+            'age:{1 TO 5]',
+            'age:[1 5]',
+            'date:[* TO 2012-01-01]',
+            'age:>=10',
+            '_exists_:title',
+            '/jo.*n/',
+            'http\\://example.org',
+            '*:foo',
+        ]
+        for query in queries:
+            with self.subTest(query=query):
+                self.assertIs(validate_query_string_syntax(query), True)
+
+    def test_invalid_queries(self):
+        queries = [
+            'skillman AND',
+            'sushi AND AND',
+            'AND steak*',
+            'a OR OR b',
+            'NOT',
+            'NOT NOT a',
+            'a -',
+            '"unbalanced',
+            '(a OR b',
+            'a OR b)',
+            '()',
+            'age:[1 TO 5',
+            'age:[1]',
+            'age:[1 TO]',
+            'age:[1 TO 5 7]',
+            'a:',
+            ':a',
+            'a:b:c',
+            'a^',
+            'a^x',
+            'foo\\',
+            '/unclosed',
+        ]
+        for query in queries:
+            with self.subTest(query=query):
+                self.assertIs(validate_query_string_syntax(query), False)
+
+    def test_check_raises(self):
+        with self.assertRaises(QueryStringSyntaxError):
+            check_query_string_syntax('(a OR b')
+
+
+class NormalizeQueryStringTests(SimpleTestCase):
+
+    def test_normalize(self):
+        queries = [
+            ('coffee', '?'),
+            ('sushi asian 11377', '? ? ?'),
+            ('name:(pizza OR "fast food") AND stars:[4 TO 5]', 'name:(? OR ?) AND stars:?'),
+            ('a && b || NOT c', '? AND ? OR NOT ?'),
+            ('-street:school~2 +city:NY^2', '-street:?~? +city:?^?'),
+            ('/jo.*n/ AND age:>=10', '? AND age:?'),
+        ]
+        for query, normalized in queries:
+            with self.subTest(query=query):
+                self.assertEqual(normalize_query_string(query), normalized)
+
+    def test_same_normalization_for_different_values(self):
+        self.assertEqual(
+            normalize_query_string('name:pizza AND city:"New York"'),
+            normalize_query_string('name:sushi AND city:Boston'))
+
+    def test_invalid_query_unchanged(self):
+        self.assertEqual(normalize_query_string('"unbalanced'), '"unbalanced')
+
+
+class ValidateQueryStringSyntaxTests(TransactionTestCase):
+
+    def test_syntax_errors_dont_reach_elasticsearch(self):
+        with mock.patch('django_zombodb.helpers.connection') as connection_mock:
+            self.assertIs(validate_query_string(Restaurant, 'sushi AND AND'), False)
+        connection_mock.cursor.assert_not_called()
@@ -1,5 +1,10 @@
+import datetime
+from unittest import mock
+
 from django.core.exceptions import ImproperlyConfigured
+from django.db import NotSupportedError, connection
 from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
 from elasticsearch_dsl import Q as ElasticsearchQ
 from elasticsearch_dsl import Search
@@ -7,6 +12,7 @@ from elasticsearch_dsl.query import Term
 
 from django_zombodb.exceptions import InvalidElasticsearchQuery
 
+from .models import Article, Review
 from .restaurants.models import Restaurant, RestaurantNoIndex
 
 
@@ -342,3 +348,263 @@ class SearchQuerySetTests(TransactionTestCase):
 
         self.assertEqual(len(results), 2)
         self.assertEqual([r.name for r in results], [self.soleil.name] * 2)
+
+    def test_search_count(self):
+        self.assertEqual(Restaurant.objects.query_string_search('skillman').search_count(), 2)
+        self.assertEqual(Restaurant.objects.dict_search(
+            {'match': {'street': 'skillman'}}).search_count(), 2)
+        self.assertEqual(Restaurant.objects.dsl_search(
+            Term(email='alcove@example.org')).search_count(), 1)
+        self.assertEqual(Restaurant.objects.query_string_search('nothing').search_count(), 0)
+
+    def test_search_count_ignores_other_filters(self):
+        results = Restaurant.objects.filter(name='TJ Asian Bistro').query_string_search('skillman')
+        self.assertEqual(results.search_count(), 2)
+
+    def test_search_count_multiple_searches(self):
+        results = Restaurant.objects.query_string_search(
+            'skillman'
+        ).query_string_search('coffee')
+        self.assertEqual(results.search_count(), 1)
+
+    def test_search_count_limit(self):
+        results = Restaurant.objects.query_string_search('skillman', limit=1)
+        self.assertEqual(results.search_count(), 1)
+
+        results = results.query_string_search('coffee')
+        with self.assertRaises(NotSupportedError):
+            results.search_count()
+
+    def test_search_count_max_count(self):
+        results = Restaurant.objects.query_string_search('skillman OR alcove')
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(results.search_count(max_count=2), 2)
+        self.assertEqual(len(captured.captured_queries), 1)
+        self.assertIn('_count?terminate_after=2', captured.captured_queries[0]['sql'])
+
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(results.search_count(max_count=10), 3)
+        self.assertEqual(len(captured.captured_queries), 2)
+        self.assertIn('zdb.count', captured.captured_queries[1]['sql'])
+
+    def test_search_count_max_count_skips_deleted_rows(self):
+        self.alcove.delete()
+        results = Restaurant.objects.query_string_search('skillman OR alcove')
+        self.assertEqual(results.search_count(max_count=10), 2)
+
+    def test_estimated_count_ignores_filters(self):
+        results = Restaurant.objects.query_string_search('alcove')
+        self.assertEqual(results.estimated_count(), 3)
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE restaurants_restaurant')
+        self.assertEqual(results.estimated_count(), 3)
+
+    def test_count_uses_search_count(self):
+        results = Restaurant.objects.query_string_search('skillman', sort=True)
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(results.count(), 2)
+        self.assertIn('zdb.count', captured.captured_queries[0]['sql'])
+
+    def test_count_with_other_filters(self):
+        results = Restaurant.objects.query_string_search('skillman').filter(name='TJ Asian Bistro')
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(results.count(), 1)
+        self.assertNotIn('zdb.count', captured.captured_queries[0]['sql'])
+
+        results = Restaurant.objects.query_string_search('skillman', limit=1)
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(results.count(), 1)
+        self.assertNotIn('zdb.count', captured.captured_queries[0]['sql'])
+
+    def test_search_aggregate_terms(self):
+        results = Restaurant.objects.query_string_search('skillman OR alcove')
+        self.assertEqual(
+            results.search_aggregate_terms('zip_code'),
+            [{'term': '11377', 'doc_count': 2}, {'term': '11104', 'doc_count': 1}])
+        self.assertEqual(
+            results.search_aggregate_terms('zip_code', size=1),
+            [{'term': '11377', 'doc_count': 2}])
+        self.assertEqual(
+            results.search_aggregate_terms('zip_code', order_by='term'),
+            [{'term': '11104', 'doc_count': 1}, {'term': '11377', 'doc_count': 2}])
+
+    def test_search_aggregate(self):
+        results = Restaurant.objects.dsl_search(ElasticsearchQ('match', street='skillman'))
+        aggregations = results.search_aggregate({
+            'zip_codes': {'terms': {'field': 'zip_code'}},
+        })
+        self.assertEqual(
+            [(b['key'], b['doc_count']) for b in aggregations['zip_codes']['buckets']],
+            [('11377', 2)])
+
+    def test_annotate_highlights(self):
+        results = Restaurant.objects.query_string_search(
+            'skillman'
+        ).annotate_highlights(['name', 'street']).order_by('name')
+        self.assertEqual(len(results), 2)
+        self.assertEqual(
+            results[0].zombodb_highlights,
+            {'name': None, 'street': ['50-12 <em>Skillman</em> Ave']})
+        self.assertEqual(
+            results[1].zombodb_highlights,
+            {'name': None, 'street': ['50-19 <em>Skillman</em> Ave']})
+
+    def test_annotate_highlights_options(self):
+        results = Restaurant.objects.query_string_search(
+            'alcove'
+        ).annotate_highlights(
+            ['name'], attr='custom_highlights', pre_tags=['<b>'], post_tags=['</b>'])
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].custom_highlights, {'name': ['The <b>Alcove</b>']})
+
+    def test_search_iterator(self):
+        # duplicate tj and soleil
+        self.tj.pk = None
+        self.tj.save()
+        self.soleil.pk = None
+        self.soleil.save()
+
+        results = Restaurant.objects.query_string_search('skillman')
+        expected = list(results.order_by_score())
+        self.assertEqual(list(results.search_iterator(chunk_size=1)), expected)
+        self.assertEqual(list(results.search_iterator(chunk_size=3)), expected)
+
+    def test_search_iterator_keyset(self):
+        # duplicate tj and soleil
+        self.tj.pk = None
+        self.tj.save()
+        self.soleil.pk = None
+        self.soleil.save()
+
+        results = Restaurant.objects.query_string_search('skillman')
+        expected = list(results.order_by_score())
+        with mock.patch.dict(connection.settings_dict, DISABLE_SERVER_SIDE_CURSORS=True):
+            with CaptureQueriesContext(connection) as captured:
+                self.assertEqual(list(results.search_iterator(chunk_size=2)), expected)
+            self.assertEqual(len(captured.captured_queries), 3)
+
+            self.assertEqual(
+                list(results.search_iterator(chunk_size=1, score_attr='custom_score')),
+                expected)
+
+    def test_search_iterator_keyset_tied_scores(self):
+        # copies of tj have the same score, so ties cross the chunk boundaries
+        for __ in range(4):
+            self.tj.pk = None
+            self.tj.save()
+
+        results = Restaurant.objects.query_string_search('skillman')
+        expected = list(results.order_by_score())
+        with mock.patch.dict(connection.settings_dict, DISABLE_SERVER_SIDE_CURSORS=True):
+            for chunk_size in (1, 2, 3):
+                iterated = list(results.search_iterator(chunk_size=chunk_size))
+                self.assertEqual(iterated, expected)
+                self.assertEqual(len({restaurant.pk for restaurant in iterated}), 6)
+
+    def test_slice_pushes_down_score_ordering(self):
+        results = Restaurant.objects.query_string_search('skillman OR alcove').order_by_score()
+        expected = list(results)
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(list(results[:2]), expected[:2])
+        sql = captured.captured_queries[0]['sql']
+        self.assertIn('dsl.limit(2, dsl.sort_direct(', sql)
+        self.assertIn('"_score"', sql)
+
+    def test_slice_pushes_down_limit_without_ordering(self):
+        results = Restaurant.objects.query_string_search('skillman')
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(len(results[:1]), 1)
+        sql = captured.captured_queries[0]['sql']
+        self.assertIn('dsl.limit(1, ', sql)
+        self.assertNotIn('dsl.sort_direct', sql)
+
+    def test_joins_are_not_pushed_down(self):
+        Review.objects.create(restaurant=self.tj, text='Great sushi')
+        Review.objects.create(restaurant=self.tj, text='Slow service')
+        results = Restaurant.objects.query_string_search('skillman', sort=True).values(
+            'name', 'reviews__text')
+
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(results.count(), 3)
+            self.assertEqual(len(results[:3]), 3)
+        for query in captured.captured_queries:
+            self.assertNotIn('zdb.count', query['sql'])
+            self.assertNotIn('dsl.', query['sql'])
+
+    def test_slice_does_not_push_down_unsupported_ordering(self):
+        results = Restaurant.objects.query_string_search('skillman OR alcove').order_by('name')
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(list(results[:2]), [self.soleil, self.tj])
+        self.assertNotIn('dsl.', captured.captured_queries[0]['sql'])
+
+    def test_slice_does_not_push_down_with_other_filters(self):
+        results = Restaurant.objects.query_string_search(
+            'skillman OR alcove'
+        ).filter(zip_code='11377').order_by_score()
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(len(results[:1]), 1)
+        self.assertNotIn('dsl.', captured.captured_queries[0]['sql'])
+
+    def test_slice_does_not_push_down_search_with_limit(self):
+        results = Restaurant.objects.query_string_search(
+            'skillman OR alcove', limit=2).order_by_score()
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(len(results[:1]), 1)
+        self.assertNotIn('dsl.sort_direct', captured.captured_queries[0]['sql'])
+
+    def test_slice_pushes_down_offset(self):
+        results = Restaurant.objects.query_string_search('skillman OR alcove').order_by_score()
+        expected = list(results)
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(list(results[1:3]), expected[1:3])
+        sql = captured.captured_queries[0]['sql']
+        self.assertIn('dsl.offset_limit(1, 2, dsl.sort_direct(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+        self.assertEqual(list(results[1:3][1:2]), expected[2:3])
+        self.assertEqual(results[2:3].get(), expected[2])
+        with self.assertRaises(AssertionError):
+            results[1:3].filter(name='TJ Asian Bistro')
+
+    def test_slice_does_not_push_down_beyond_max_result_window(self):
+        results = Restaurant.objects.query_string_search('skillman OR alcove').order_by_score()
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(list(results[10000:10001]), [])
+        self.assertNotIn('dsl.', captured.captured_queries[0]['sql'])
+
+
+@override_settings(ZOMBODB_ELASTICSEARCH_URL='http://localhost:9200/')
+class SlicePushDownSortTests(TransactionTestCase):
+
+    def setUp(self):
+        self.first = Article.objects.create(
+            title='ZomboDB first steps', rating=5, published=datetime.date(2019, 1, 2), tag='b')
+        self.second = Article.objects.create(
+            title='ZomboDB and Django', rating=3, published=datetime.date(2019, 3, 4), tag='B')
+        self.draft = Article.objects.create(
+            title='ZomboDB internals', rating=4, published=None, tag='a')
+
+    def test_slice_pushes_down_numeric_ordering(self):
+        results = Article.objects.query_string_search('zombodb').order_by('-rating')
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(list(results[:2]), [self.first, self.draft])
+        sql = captured.captured_queries[0]['sql']
+        self.assertIn('dsl.limit(2, dsl.sort_direct(', sql)
+        self.assertIn('[{"rating":{"order":"desc","missing":"_first"}}]', sql)
+
+    def test_slice_pushes_down_date_ordering(self):
+        results = Article.objects.query_string_search('zombodb').order_by('published', 'pk')
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(list(results[1:3]), [self.second, self.draft])
+        sql = captured.captured_queries[0]['sql']
+        self.assertIn('dsl.offset_limit(1, 2, dsl.sort_direct(', sql)
+        # pk is only a tie-breaker, so it's left out of the sort
+        self.assertIn('[{"published":{"order":"asc","missing":"_last"}}]', sql)
+
+    def test_slice_does_not_push_down_keyword_ordering(self):
+        results = Article.objects.query_string_search('zombodb').order_by('tag')
+        expected = list(Article.objects.order_by('tag'))
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(list(results[:2]), expected[:2])
+        self.assertNotIn('dsl.', captured.captured_queries[0]['sql'])
@@ -0,0 +1,49 @@
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+
+from django_zombodb.indexes import ZomboDBIndex
+from django_zombodb.registry import ZomboDBIndexRegistry, _get_sortable_fields, registry
+
+from .models import Article
+from .restaurants.models import Restaurant, RestaurantNoIndex
+
+
+class ZomboDBIndexRegistryTests(SimpleTestCase):
+
+    def test_populated_on_ready(self):
+        self.assertIn(Restaurant, registry._infos)
+        self.assertIn(RestaurantNoIndex, registry._infos)
+
+    def test_get(self):
+        info = registry.get(Restaurant)
+        index = Restaurant._meta.indexes[1]
+        self.assertIsInstance(index, ZomboDBIndex)
+        self.assertIs(info.index, index)
+        self.assertEqual(info.index_name, index.name)
+        self.assertEqual(
+            info.quoted_table, connection.ops.quote_name(Restaurant._meta.db_table))
+        self.assertEqual(info.row_type, index.name + '_row_type')
+        self.assertEqual(info.field_mapping, {})
+
+    def test_get_model_without_index(self):
+        info = registry.get(RestaurantNoIndex)
+        self.assertIsNone(info.index)
+        self.assertIsNone(info.index_name)
+        self.assertEqual(
+            info.quoted_table, connection.ops.quote_name(RestaurantNoIndex._meta.db_table))
+
+    def test_get_unpopulated_model(self):
+        other_registry = ZomboDBIndexRegistry()
+        self.assertEqual(other_registry.get(Restaurant), registry.get(Restaurant))
+        self.assertIn(Restaurant, other_registry._infos)
+
+    @override_settings(ZOMBODB_ELASTICSEARCH_URL='http://localhost:9200/')
+    def test_sortable_fields(self):
+        index = ZomboDBIndex(
+            name='sortable-index',
+            fields=['name', 'zip_code', 'phone'],
+            field_mapping={'zip_code': {'type': 'long'}, 'phone': {'type': 'keyword'}})
+        self.assertEqual(_get_sortable_fields(Restaurant, index), {'zip_code'})
+        self.assertEqual(registry.get(Restaurant).sortable_fields, set())
+        self.assertEqual(registry.get(RestaurantNoIndex).sortable_fields, set())
+        self.assertEqual(registry.get(Article).sortable_fields, {'rating', 'published'})
@@ -0,0 +1,100 @@
+import datetime
+import decimal
+import unittest
+import uuid
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from elasticsearch.exceptions import SerializationError
+from elasticsearch.serializer import JSONSerializer
+
+from django_zombodb.serializers import ES_JSON_SERIALIZER, OrjsonSerializer, get_json_serializer
+
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+@unittest.skipIf(orjson is None, "orjson is not installed")
+class OrjsonSerializerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.serializer = OrjsonSerializer()
+
+    def test_dumps_same_as_json_serializer(self):
+        data = {
+            'query': {
+                'bool': {
+                    'must': [{'match': {'name': 'Côté "Soleil"\n'}}],
+                    'filter': [
+                        {'range': {'date': {'gte': datetime.date(2019, 1, 2)}}},
+                        {'range': {'datetime': {'gte': datetime.datetime(2019, 1, 2, 3, 4, 5, 6)}}},
+                        {'range': {'aware': {'gte': timezone.now()}}},
+                        {'range': {'price': {'lte': decimal.Decimal('10.10')}}},
+                        {'term': {'id': uuid.uuid4()}},
+                        {'terms': {'flags': [True, False, None, 1, 2.5]}},
+                    ],
+                },
+            },
+            1: 'non-str key',
+        }
+        self.assertEqual(
+            JSONSerializer().loads(self.serializer.dumps(data)),
+            JSONSerializer().loads(JSONSerializer().dumps(data)))
+
+    def test_dumps_floats(self):
+        data = {'floats': [0.1, 1e-05, 1e20, -2.5, 1 / 3]}
+        self.assertEqual(self.serializer.loads(self.serializer.dumps(data)), data)
+        self.assertEqual(
+            JSONSerializer().loads(self.serializer.dumps(data)),
+            JSONSerializer().loads(JSONSerializer().dumps(data)))
+
+    def test_dumps_non_finite_floats_same_as_json_serializer(self):
+        data = {'range': {'price': {'gte': float('nan'), 'lte': float('inf')}}, 'a': None}
+        self.assertEqual(self.serializer.dumps(data), JSONSerializer().dumps(data))
+        self.assertEqual(
+            self.serializer.dumps([float('-inf')]), JSONSerializer().dumps([float('-inf')]))
+
+    def test_dumps_str(self):
+        self.assertEqual(self.serializer.dumps('{"already": "json"}'), '{"already": "json"}')
+
+    def test_dumps_falls_back_to_json_serializer(self):
+        data = {'a': 2 ** 70}  # too large for orjson
+        self.assertEqual(self.serializer.loads(self.serializer.dumps(data)), data)
+
+    def test_dumps_error(self):
+        with self.assertRaises(SerializationError):
+            self.serializer.dumps({'a': object()})
+
+    def test_loads(self):
+        self.assertEqual(self.serializer.loads('{"valid": true}'), {'valid': True})
+        with self.assertRaises(SerializationError):
+            self.serializer.loads('{"valid": ')
+
+    def test_requires_orjson(self):
+        with mock.patch.dict('sys.modules', {'orjson': None}):
+            with self.assertRaises(ImproperlyConfigured):
+                OrjsonSerializer()
+
+
+class GetJSONSerializerTests(SimpleTestCase):
+
+    def test_default(self):
+        self.assertIsInstance(get_json_serializer(), JSONSerializer)
+        self.assertNotIsInstance(get_json_serializer(), OrjsonSerializer)
+
+    @unittest.skipIf(orjson is None, "orjson is not installed")
+    @override_settings(ZOMBODB_JSON_SERIALIZER='django_zombodb.serializers.OrjsonSerializer')
+    def test_setting(self):
+        serializer = get_json_serializer()
+        self.assertIsInstance(serializer, OrjsonSerializer)
+        self.assertIs(get_json_serializer(), serializer)
+
+        with mock.patch.object(serializer, 'dumps', return_value='{}') as dumps_mock:
+            self.assertEqual(ES_JSON_SERIALIZER.dumps({}), '{}')
+        dumps_mock.assert_called_once_with({})
@@ -0,0 +1,110 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from django_zombodb.helpers import validate_query_string
+from django_zombodb.registry import registry
+from django_zombodb.slow_searches import (
+    get_calling_site, get_query_fingerprint, get_slow_search_threshold, normalize_query
+)
+
+from .restaurants.models import Restaurant
+from .utils import create_alcove
+
+
+class NormalizeQueryTests(SimpleTestCase):
+
+    def test_query_string(self):
+        self.assertEqual(
+            normalize_query('name:pizza AND stars:5', 'query_string'), 'name:? AND stars:?')
+
+    def test_json(self):
+        self.assertEqual(
+            normalize_query(
+                '{"bool":{"must":[{"match":{"name":"pizza"}},{"terms":{"city":["NY","LA"]}}]}}',
+                'dsl'),
+            '{"bool":{"must":[{"match":{"name":"?"}},{"terms":{"city":["?"]}}]}}')
+
+    def test_nested_query_string(self):
+        self.assertEqual(
+            normalize_query(
+                '{"query":{"query_string":{"query":"name:pizza","default_operator":"AND"}}}',
+                'validation'),
+            '{"query":{"query_string":{"query":"name:?","default_operator":"?"}}}')
+
+    def test_invalid_json_unchanged(self):
+        self.assertEqual(normalize_query('{"match"', 'dict'), '{"match"')
+
+    def test_fingerprint(self):
+        fingerprint = get_query_fingerprint(normalize_query('name:pizza', 'query_string'))
+        self.assertEqual(len(fingerprint), 16)
+        self.assertEqual(
+            fingerprint, get_query_fingerprint(normalize_query('name:sushi', 'query_string')))
+        self.assertNotEqual(
+            fingerprint, get_query_fingerprint(normalize_query('city:sushi', 'query_string')))
+
+
+class SlowSearchThresholdTests(SimpleTestCase):
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(get_slow_search_threshold())
+
+    @override_settings(ZOMBODB_SLOW_SEARCH_THRESHOLD=0.5)
+    def test_configured(self):
+        self.assertEqual(get_slow_search_threshold(), 0.5)
+
+    def test_calling_site(self):
+        self.assertRegex(get_calling_site(), r'test_slow_searches\.py:\d+ in test_calling_site$')
+
+    def test_fast_searches_not_logged(self):
+        with override_settings(ZOMBODB_SLOW_SEARCH_THRESHOLD=60), \
+                mock.patch('django_zombodb.slow_searches.logger') as logger_mock:
+            self.assertFalse(validate_query_string(Restaurant, 'name:"pizza'))
+            len(Restaurant.objects.none().query_string_search('pizza'))
+        logger_mock.warning.assert_not_called()
+
+
+@override_settings(
+    ZOMBODB_ELASTICSEARCH_URL='http://localhost:9200/',
+    ZOMBODB_SLOW_SEARCH_THRESHOLD=0)
+class SlowSearchesTests(TransactionTestCase):
+
+    def setUp(self):
+        self.index_name = registry.get(Restaurant).index_name
+        create_alcove()
+
+    def test_search(self):
+        with self.assertLogs('django_zombodb.slow_searches', 'WARNING') as logs:
+            list(Restaurant.objects.query_string_search('name:alcove', sort=True, limit=10))
+
+        self.assertEqual(len(logs.records), 1)
+        info = logs.records[0].zombodb
+        self.assertEqual(info['operation'], 'fetch')
+        self.assertEqual(info['model'], 'restaurants.Restaurant')
+        self.assertEqual(info['index'], self.index_name)
+        self.assertEqual(info['query_type'], 'query_string')
+        self.assertEqual(info['query'], 'name:?')
+        self.assertEqual(info['limit'], 10)
+        self.assertIs(info['sort'], True)
+        self.assertGreaterEqual(info['elapsed_ms'], 0)
+        self.assertRegex(info['calling_site'], r'test_slow_searches\.py:\d+ in test_search$')
+        self.assertNotIn('alcove', logs.output[0])
+
+    def test_search_count(self):
+        with self.assertLogs('django_zombodb.slow_searches', 'WARNING') as logs:
+            Restaurant.objects.dict_search({'match': {'name': 'alcove'}}).search_count()
+
+        info = logs.records[0].zombodb
+        self.assertEqual(info['operation'], 'count')
+        self.assertEqual(info['query'], '{"match":{"name":"?"}}')
+        self.assertIsNone(info['limit'])
+        self.assertIs(info['sort'], False)
+
+    def test_validation(self):
+        with self.assertLogs('django_zombodb.slow_searches', 'WARNING') as logs:
+            validate_query_string(Restaurant, 'name:alcove')
+
+        info = logs.records[0].zombodb
+        self.assertEqual(info['operation'], 'validation')
+        self.assertEqual(info['index'], self.index_name)
+        self.assertEqual(info['query'], '{"query":{"query_string":{"query":"name:?"}}}')
@@ -0,0 +1,71 @@
+from django.test import SimpleTestCase
+
+from django_zombodb.statements import get_ddl_index_name, get_search_table, get_zombodb_call_kinds
+
+
+SEARCH_SQL = (
+    'SELECT "restaurants_restaurant"."id", zdb.score("restaurants_restaurant"."ctid") '
+    'FROM "restaurants_restaurant" WHERE ("restaurants_restaurant" ==> %s)')
+
+
+class GetZomboDBCallKindsTests(SimpleTestCase):
+
+    def test_search_and_score(self):
+        self.assertEqual(get_zombodb_call_kinds(SEARCH_SQL, ['pizza']), ['search', 'score'])
+
+    def test_validation(self):
+        sql = "SELECT zdb.request(%(index_name)s, %(endpoint)s, 'POST', %(post_data)s);"
+        self.assertEqual(
+            get_zombodb_call_kinds(sql, {'endpoint': '_validate/query'}), ['validation'])
+        self.assertEqual(get_zombodb_call_kinds(sql, {'endpoint': '_search'}), ['request'])
+
+    def test_other_functions(self):
+        self.assertEqual(
+            get_zombodb_call_kinds('SELECT * FROM zdb.count(%s::regclass, %s)', []), ['count'])
+
+    def test_not_zombodb(self):
+        self.assertEqual(
+            get_zombodb_call_kinds('SELECT "name" FROM "restaurants_restaurant"', []), [])
+
+    def test_create_index(self):
+        sql = (
+            'CREATE TYPE "restaurants_row_type" AS (name text); '
+            'SELECT zdb.define_field_mapping(\'"restaurants_restaurant"\', \'name\', \'{}\');'
+            'CREATE INDEX "restaurants_zombodb" ON "restaurants_restaurant" USING zombodb '
+            '((ROW(name)::"restaurants_row_type")) WITH (shards = 2) ')
+        self.assertEqual(
+            get_zombodb_call_kinds(sql, None), ['create_index', 'define_field_mapping'])
+
+    def test_drop_index(self):
+        sql = (
+            'DROP INDEX IF EXISTS "restaurants_zombodb"; '
+            'DROP TYPE IF EXISTS "restaurants_row_type";')
+        self.assertEqual(get_zombodb_call_kinds(sql, None), ['drop_index'])
+
+    def test_other_index_ddl(self):
+        sql = 'CREATE INDEX "restaurants_url" ON "restaurants_restaurant" ("url")'
+        self.assertEqual(get_zombodb_call_kinds(sql, None), [])
+
+
+class GetSearchTableTests(SimpleTestCase):
+
+    def test_search(self):
+        self.assertEqual(get_search_table(SEARCH_SQL), 'restaurants_restaurant')
+
+    def test_not_search(self):
+        self.assertIsNone(get_search_table('SELECT zdb.score("t"."ctid") FROM "t"'))
+
+
+class GetDDLIndexNameTests(SimpleTestCase):
+
+    def test_create_index(self):
+        self.assertEqual(get_ddl_index_name(
+            'CREATE TYPE "idx_row_type" AS (name text); '
+            'CREATE INDEX "idx" ON "t" USING zombodb ((ROW(name)::"idx_row_type"))'), 'idx')
+
+    def test_drop_index(self):
+        self.assertEqual(get_ddl_index_name(
+            'DROP INDEX IF EXISTS "idx"; DROP TYPE IF EXISTS "idx_row_type";'), 'idx')
+
+    def test_not_ddl(self):
+        self.assertIsNone(get_ddl_index_name(SEARCH_SQL))
@@ -0,0 +1,114 @@
+from unittest import mock, skipIf
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from django_zombodb import tracing
+from django_zombodb.helpers import validate_queries, validate_query_string
+from django_zombodb.indexes import ZomboDBIndex
+from django_zombodb.registry import registry
+
+from .models import IntegerArrayModel
+from .restaurants.models import Restaurant
+from .utils import create_alcove
+
+
+try:
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+except ImportError:
+    TracerProvider = None
+
+
+class TracingDisabledTests(SimpleTestCase):
+
+    def test_no_op_without_opentelemetry(self):
+        with mock.patch.object(tracing, '_tracer', None):
+            self.assertFalse(tracing.tracing_enabled())
+            with tracing.start_span('zombodb.search', {'zombodb.limit': None}) as span:
+                span.set_attribute('zombodb.result_count', 0)
+            self.assertEqual(len(Restaurant.objects.none().query_string_search('alcove')), 0)
+
+
+@skipIf(TracerProvider is None, "opentelemetry-sdk isn't installed")
+@override_settings(ZOMBODB_ELASTICSEARCH_URL='http://localhost:9200/')
+class TracingTests(TransactionTestCase):
+
+    def setUp(self):
+        self.exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(self.exporter))
+        patcher = mock.patch.object(tracing, '_tracer', provider.get_tracer('tests'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.index_name = registry.get(Restaurant).index_name
+        create_alcove()
+
+    def get_spans(self, name):
+        return [span for span in self.exporter.get_finished_spans() if span.name == name]
+
+    def test_search(self):
+        list(Restaurant.objects.query_string_search('alcove', sort=True, limit=10))
+
+        span, = self.get_spans('zombodb.search')
+        self.assertEqual(dict(span.attributes), {
+            'db.system': 'postgresql',
+            'zombodb.operation': 'fetch',
+            'zombodb.model': 'restaurants.Restaurant',
+            'zombodb.index': self.index_name,
+            'zombodb.query_type': 'query_string',
+            'zombodb.searches': 1,
+            'zombodb.limit': 10,
+            'zombodb.sort': True,
+            'zombodb.score': True,
+            'zombodb.result_count': 1,
+        })
+
+    def test_search_count(self):
+        Restaurant.objects.dict_search({'match': {'name': 'alcove'}}).search_count()
+
+        span, = self.get_spans('zombodb.search')
+        self.assertEqual(span.attributes['zombodb.operation'], 'count')
+        self.assertEqual(span.attributes['zombodb.query_type'], 'dict')
+        self.assertIs(span.attributes['zombodb.score'], False)
+        self.assertEqual(span.attributes['zombodb.result_count'], 1)
+        self.assertNotIn('zombodb.limit', span.attributes)
+
+    def test_validations(self):
+        validate_query_string(Restaurant, 'name:alcove')
+        validate_queries(Restaurant, ['name:pizza', {'match': {'name': 'pizza'}}])
+
+        single, batch = self.get_spans('zombodb.validation')
+        self.assertEqual(single.attributes['zombodb.index'], self.index_name)
+        self.assertEqual(single.attributes['zombodb.queries'], 1)
+        self.assertIs(single.attributes['zombodb.valid'], True)
+        self.assertEqual(batch.attributes['zombodb.queries'], 2)
+
+    def test_admin_search(self):
+        self.client.force_login(User.objects.create_superuser(
+            username='super', email='a@b.com', password='xxx'))
+        self.client.get(reverse('admin:restaurants_restaurant_changelist'), {'q': 'alcove'})
+
+        span, = self.get_spans('zombodb.admin_search')
+        self.assertEqual(span.attributes['zombodb.model'], 'restaurants.Restaurant')
+        self.assertIs(span.attributes['zombodb.valid'], True)
+        self.assertEqual(span.attributes['zombodb.result_count'], 1)
+        search_spans = self.get_spans('zombodb.search')
+        self.assertTrue(search_spans)
+        self.assertEqual(search_spans[0].parent.span_id, span.context.span_id)
+
+    def test_ddl(self):
+        index = ZomboDBIndex(fields=['field'], name='integer_array_tracing_zombodb')
+        with connection.schema_editor() as editor:
+            editor.add_index(IntegerArrayModel, index)
+        with connection.schema_editor() as editor:
+            editor.remove_index(IntegerArrayModel, index)
+
+        create_span, = self.get_spans('zombodb.create_index')
+        drop_span, = self.get_spans('zombodb.drop_index')
+        self.assertEqual(create_span.attributes['zombodb.index'], 'integer_array_tracing_zombodb')
+        self.assertEqual(drop_span.attributes['zombodb.index'], 'integer_array_tracing_zombodb')
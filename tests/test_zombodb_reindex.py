@@ -0,0 +1,67 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from django_zombodb.management.commands.zombodb_reindex import _format_progress, get_zombodb_indexes
+from django_zombodb.registry import registry
+
+from .models import DateTimeArrayModel, IntegerArrayModel
+from .restaurants.models import Restaurant
+from .utils import create_alcove
+
+
+class GetZomboDBIndexesTests(SimpleTestCase):
+
+    def test_all_models(self):
+        models = [model for model, __ in get_zombodb_indexes()]
+        self.assertIn(Restaurant, models)
+        self.assertNotIn(IntegerArrayModel, models)
+        self.assertNotIn(DateTimeArrayModel, models)
+
+    def test_labels(self):
+        self.assertEqual(
+            get_zombodb_indexes(['restaurants.Restaurant']),
+            [(Restaurant, registry.get(Restaurant).index)])
+        self.assertEqual(
+            get_zombodb_indexes(['restaurants']),
+            get_zombodb_indexes(['restaurants.Restaurant']))
+        self.assertEqual(get_zombodb_indexes(['auth']), [])
+
+    def test_unknown_label(self):
+        with self.assertRaises(CommandError):
+            get_zombodb_indexes(['unknown'])
+
+    def test_format_progress(self):
+        self.assertEqual(
+            _format_progress(('t', 1, 'building index', 10, 40, 0, 0)),
+            'building index: 10/40 blocks (25%)')
+        self.assertEqual(
+            _format_progress(('t', 1, 'building index', 40, 40, 1500, 2000)),
+            'building index: 1,500/2,000 rows (75%)')
+
+
+@override_settings(ZOMBODB_ELASTICSEARCH_URL='http://localhost:9200/')
+class ZomboDBReindexCommandTests(TransactionTestCase):
+
+    def test_reindex(self):
+        create_alcove()
+        out = StringIO()
+        call_command(
+            'zombodb_reindex', 'restaurants', workers=2, progress_interval=0, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('with 1 worker(s)', output)
+        self.assertIn(registry.get(Restaurant).index_name + ' done in', output)
+        self.assertIn('total', output)
+        self.assertEqual(Restaurant.objects.query_string_search('alcove').count(), 1)
+
+    def test_no_indexes(self):
+        out = StringIO()
+        call_command('zombodb_reindex', 'auth', stdout=out)
+        self.assertEqual(out.getvalue(), 'No ZomboDB indexes found.\n')
+
+    def test_invalid_workers(self):
+        with self.assertRaises(CommandError):
+            call_command('zombodb_reindex', workers=0)
@@ -0,0 +1,31 @@
+from .restaurants.models import Restaurant
+
+
+def create_alcove():
+    return Restaurant.objects.create(
+        url='http://example.org?thealcove',
+        name='The Alcove',
+        street='41-11 49th St',
+        zip_code='11104',
+        city='New York City',
+        state='NY',
+        phone='+1 347-813-4159',
+        email='alcove@example.org',
+        website='https://www.facebook.com/thealcoveny/',
+        categories=['Gastropub', 'Tapas', 'Bar'],
+    )
+
+
+def create_tj():
+    return Restaurant.objects.create(
+        url='http://example.org?tjasianbistro',
+        name='TJ Asian Bistro',
+        street='50-19 Skillman Ave',
+        zip_code='11377',
+        city='New York City',
+        state='NY',
+        phone='+1 718-205-2088',
+        email='tjasianbistro@example.org',
+        website='http://www.tjsushi.com/',
+        categories=['Sushi', 'Asian', 'Japanese'],
+    )